@@ -10,6 +10,8 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
+import tempfile
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -44,6 +46,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'store.profiling.ProfilingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -83,6 +86,115 @@ DATABASES = {
     }
 }
 
+# Production SQLite: WAL lets readers run alongside the single writer, and
+# BEGIN IMMEDIATE takes the write lock when a transaction starts, so a writer
+# waits out busy_timeout instead of failing when it upgrades a read lock.
+# Writes that still meet a locked database are retried by core.db.retry_on_lock.
+SQLITE_PRODUCTION_OPTIONS = {
+    'transaction_mode': 'IMMEDIATE',
+    'timeout': 5,  # seconds; sets busy_timeout
+    'init_command': ';'.join([
+        'PRAGMA journal_mode=WAL',
+        'PRAGMA synchronous=NORMAL',  # durable at checkpoints; WAL keeps it corruption-safe
+        'PRAGMA cache_size=-65536',  # 64 MiB page cache per connection
+        'PRAGMA mmap_size=268435456',  # 256 MiB
+        'PRAGMA temp_store=MEMORY',
+    ]),
+}
+if os.environ.get('SQLITE_PRODUCTION', '0' if DEBUG else '1') == '1':
+    DATABASES['default']['OPTIONS'] = SQLITE_PRODUCTION_OPTIONS
+
+DB_WRITE_RETRY = {
+    'ATTEMPTS': 5,
+    'BASE_DELAY': 0.02,  # seconds, doubled per attempt with full jitter
+    'MAX_DELAY': 1.0,
+}
+
+
+# Caches
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# LocMemCache evicts least-recently-used entries once MAX_ENTRIES is reached.
+# It is per process: with several workers point "store_responses" at a shared
+# backend (FileBasedCache, Redis, Memcached) so data versions are shared too.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'store_responses': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'store-responses',
+        'OPTIONS': {'MAX_ENTRIES': 5000},
+    },
+    # Saved report results: written by the refresh_reports command and read by
+    # the web workers, so never a per-process backend.
+    'reports': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ.get('REPORT_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'ai-book-reports')),
+    },
+}
+
+STORE_RESPONSE_CACHE = {
+    'ALIAS': 'store_responses',
+    'ENABLED': True,
+    'TIMEOUT': None,  # entries are invalidated by data versions, not by age
+    'VERSION_ALIASES': ['reports'],  # writes bump the report cache's data versions too
+}
+
+# Abandoned carts: purge_carts deletes carts whose last activity is older than
+# TTL_DAYS (EMPTY_TTL_DAYS for carts without items).
+STORE_CARTS = {
+    'TTL_DAYS': 30,
+    'EMPTY_TTL_DAYS': 2,
+    'TOUCH_INTERVAL': 3600,  # seconds; reads refresh last_activity_at at most this often
+    'PURGE_BATCH_SIZE': 500,
+}
+
+# /api/products/facets/ groups effective prices into buckets bounded by these
+# values (the first bucket is open below, the last one open above).
+STORE_FACETS = {
+    'PRICE_BUCKETS': [10, 25, 50, 100],
+}
+
+# Per-request SQL/serializer timing, reported as Server-Timing headers and JSON
+# records on the "store.profiling" logger. SAMPLE_RATE is the fraction of
+# requests profiled (0 disables it, 1 profiles everything); off by default
+# under DEBUG so local runs and the test suite stay quiet.
+STORE_PROFILING = {
+    'SAMPLE_RATE': float(os.environ.get('STORE_PROFILING_SAMPLE_RATE', '0' if DEBUG else '0.01')),
+    'DUPLICATE_THRESHOLD': 3,  # same statement this many times in one request is flagged as N+1
+    'SERVER_TIMING': True,
+    'LOG': True,
+}
+
+# core.audit buffers AuditLog rows and bulk-inserts them from a background
+# thread; BACKGROUND=False writes each entry as it is recorded.
+AUDIT_LOG = {
+    'ENABLED': True,
+    'BACKGROUND': True,
+    'BATCH_SIZE': 200,
+    'FLUSH_INTERVAL': 1.0,  # seconds
+    'MAX_QUEUE': 10000,  # a full queue makes the caller flush synchronously
+    'RETENTION_DAYS': 90,  # prune_audit_log default
+}
+
+# Where run_exports writes ScheduledExport files
+EXPORTS_ROOT = Path(os.environ.get('EXPORTS_ROOT', BASE_DIR / 'exports'))
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'store.profiling': {'handlers': ['console'], 'level': 'INFO', 'propagate': False},
+        'core.scheduler': {'handlers': ['console'], 'level': 'INFO', 'propagate': False},
+        'core.db': {'handlers': ['console'], 'level': 'WARNING', 'propagate': False},
+        'core.audit': {'handlers': ['console'], 'level': 'WARNING', 'propagate': False},
+    },
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -21,6 +21,7 @@ from store import views as store_views
 
 urlpatterns = [
     path("admin/", admin.site.urls),
+    path("api/core/", include("core.urls")),
     path("api/", include("store.urls")),          
     path("", store_views.courses_page, name="courses_page"),
     path("books/", store_views.books_page, name="books_page"),
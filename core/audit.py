@@ -0,0 +1,188 @@
+import atexit
+import logging
+import queue
+import threading
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.utils import timezone
+
+from .db import retry_on_lock
+from .models import AuditLog
+
+logger = logging.getLogger("core.audit")
+
+
+def _config():
+    return {
+        "ENABLED": True,
+        "BACKGROUND": True,
+        "BATCH_SIZE": 200,
+        "FLUSH_INTERVAL": 1.0,
+        "MAX_QUEUE": 10_000,
+        "RETENTION_DAYS": 90,
+        **getattr(settings, "AUDIT_LOG", {}),
+    }
+
+
+def audit_settings():
+    """The AUDIT_LOG settings merged over their defaults."""
+    return _config()
+
+
+class AuditBuffer:
+    """
+    Collects AuditLog rows in memory and writes them with ``bulk_create``.
+
+    A daemon thread flushes every ``flush_interval`` seconds, or as soon as a
+    batch is full; one INSERT per batch instead of one per action keeps audit
+    writes off the SQLite writer lock that carts and checkouts need. The queue
+    is bounded: when it is full the caller flushes synchronously instead of
+    dropping entries. Whatever is still queued is written at interpreter exit.
+    ``created_at`` is stamped when an entry is recorded, not when it is flushed.
+    With ``background=False`` every entry is written as it is queued.
+    """
+
+    def __init__(self, batch_size=200, flush_interval=1.0, max_queue=10_000, background=True):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.background = background
+        self.queue = queue.Queue(maxsize=max_queue)
+        self._flush_lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def put(self, entry):
+        try:
+            self.queue.put_nowait(entry)
+        except queue.Full:
+            # Back-pressure: the caller pays for one batch write rather than losing entries
+            self.flush()
+            self.queue.put(entry)
+        if not self.background:
+            self.flush()
+            return
+        self._ensure_thread()
+        if self.queue.qsize() >= self.batch_size:
+            self.wake()
+
+    def wake(self):
+        self._wake.set()
+
+    def flush(self):
+        written = 0
+        with self._flush_lock:
+            while True:
+                batch = []
+                while len(batch) < self.batch_size:
+                    try:
+                        batch.append(self.queue.get_nowait())
+                    except queue.Empty:
+                        break
+                if not batch:
+                    return written
+                try:
+                    retry_on_lock(AuditLog.objects.bulk_create)(batch)
+                    written += len(batch)
+                except Exception:
+                    logger.exception("Dropped %d audit entries", len(batch))
+
+    def _ensure_thread(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name="audit-log-writer", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            close_old_connections()
+            self.flush()
+        self.flush()
+        connection.close()
+
+    def close(self):
+        self._stop.set()
+        self.wake()
+        if self._thread is not None:
+            self._thread.join(timeout=10)
+            self._thread = None
+        # Entries queued after the thread stopped (or in synchronous mode)
+        self.flush()
+
+
+_buffer = None
+_buffer_lock = threading.Lock()
+
+
+def get_buffer():
+    global _buffer
+    if _buffer is None:
+        with _buffer_lock:
+            if _buffer is None:
+                config = _config()
+                _buffer = AuditBuffer(
+                    batch_size=config["BATCH_SIZE"],
+                    flush_interval=config["FLUSH_INTERVAL"],
+                    max_queue=config["MAX_QUEUE"],
+                    background=config["BACKGROUND"],
+                )
+                atexit.register(_buffer.close)
+    return _buffer
+
+
+def audit(action, instance=None, *, actor=None, model=None, object_id=None, meta=None, using=None):
+    """
+    Record an audit entry without writing it now.
+
+    Inside a transaction the entry is only queued once it commits, so rolled
+    back changes leave no trail; commit also wakes the writer so the entry is
+    flushed promptly.
+    """
+    if not _config()["ENABLED"]:
+        return
+    if instance is not None:
+        model = model or instance._meta.label
+        object_id = instance.pk if object_id is None else object_id
+    if actor is not None and not getattr(actor, "is_authenticated", False):
+        actor = None
+    entry = AuditLog(
+        actor=actor, action=action, model=model or "", object_id=str(object_id or ""), meta=meta or {},
+        created_at=timezone.now(),
+    )
+    buffer = get_buffer()
+    if transaction.get_connection(using).in_atomic_block:
+        transaction.on_commit(lambda: _enqueue(buffer, entry), using=using, robust=True)
+    else:
+        buffer.put(entry)
+
+
+def _enqueue(buffer, entry):
+    buffer.put(entry)
+    buffer.wake()
+
+
+class AuditMutationsMixin:
+    """Audit create/update/destroy on a DRF viewset as ``<basename>.<action>``."""
+
+    def _audit(self, verb, instance, **meta):
+        audit(f"{self.basename}.{verb}", instance, actor=self.request.user, meta=meta)
+
+    def perform_create(self, serializer):
+        super().perform_create(serializer)
+        self._audit("create", serializer.instance)
+
+    def perform_update(self, serializer):
+        super().perform_update(serializer)
+        self._audit("update", serializer.instance, fields=sorted(serializer.validated_data))
+
+    def perform_destroy(self, instance):
+        pk = instance.pk
+        super().perform_destroy(instance)
+        audit(f"{self.basename}.destroy", model=instance._meta.label, object_id=pk, actor=self.request.user)
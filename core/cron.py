@@ -0,0 +1,124 @@
+import calendar
+from datetime import datetime, timedelta
+
+from django.utils import timezone
+
+ALIASES = {
+    "@yearly": "0 0 1 1 *",
+    "@annually": "0 0 1 1 *",
+    "@monthly": "0 0 1 * *",
+    "@weekly": "0 0 * * 0",
+    "@daily": "0 0 * * *",
+    "@midnight": "0 0 * * *",
+    "@hourly": "0 * * * *",
+}
+
+MONTH_NAMES = {name.lower(): n for n, name in enumerate(calendar.month_abbr) if name}
+# cron counts Sunday as 0 (7 is accepted too)
+DAY_NAMES = {name.lower(): (n + 1) % 7 for n, name in enumerate(calendar.day_abbr)}
+
+
+class CronError(ValueError):
+    pass
+
+
+def _value(token, low, high, names):
+    token = token.lower()
+    value = names.get(token) if token in names else None
+    if value is None:
+        try:
+            value = int(token)
+        except ValueError:
+            raise CronError(f"invalid value {token!r}")
+    if not low <= value <= high:
+        raise CronError(f"{value} is outside {low}-{high}")
+    return value
+
+
+def _field(text, low, high, names=None):
+    names = names or {}
+    values = set()
+    for part in text.split(","):
+        step = 1
+        if "/" in part:
+            part, step_text = part.split("/", 1)
+            if not step_text.isdigit() or int(step_text) == 0:
+                raise CronError(f"invalid step {step_text!r}")
+            step = int(step_text)
+        if part == "*":
+            start, end = low, high
+        elif "-" in part:
+            start, end = (_value(token, low, high, names) for token in part.split("-", 1))
+            if start > end:
+                raise CronError(f"invalid range {part!r}")
+        else:
+            start = _value(part, low, high, names)
+            end = high if step > 1 else start
+        values.update(range(start, end + 1, step))
+    return frozenset(values)
+
+
+class CronExpression:
+    """
+    A standard five-field cron expression (minute hour day month weekday).
+
+    Supports ``*``, lists, ranges, steps, month and weekday names and the
+    ``@daily``-style aliases. As in cron, when both day-of-month and weekday
+    are restricted a day matching either one fires.
+    """
+
+    def __init__(self, text):
+        self.text = text
+        fields = ALIASES.get(text.strip().lower(), text).split()
+        if len(fields) != 5:
+            raise CronError(f"expected 5 fields, got {len(fields)}: {text!r}")
+        minute, hour, day, month, weekday = fields
+        self.minutes = sorted(_field(minute, 0, 59))
+        self.hours = sorted(_field(hour, 0, 23))
+        self.days = _field(day, 1, 31)
+        self.months = sorted(_field(month, 1, 12, MONTH_NAMES))
+        self.weekdays = frozenset(d % 7 for d in _field(weekday, 0, 7, DAY_NAMES))
+        self.any_day = day.startswith("*")
+        self.any_weekday = weekday.startswith("*")
+
+    def __str__(self):
+        return self.text
+
+    def matches_day(self, day):
+        in_month = day.day in self.days
+        in_week = (day.isoweekday() % 7) in self.weekdays
+        if self.any_day or self.any_weekday:
+            return in_month and in_week
+        return in_month or in_week
+
+    def next_after(self, moment):
+        """
+        The first matching minute strictly after ``moment``.
+
+        Whole days that cannot match are skipped at once and hours and minutes
+        are looked up in the sorted field values, so the search is bounded by
+        the number of candidate days rather than by minutes.
+        """
+        tz = timezone.get_current_timezone() if timezone.is_aware(moment) else None
+        local = timezone.localtime(moment, tz).replace(tzinfo=None) if tz else moment
+        start = local.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        day = start.date()
+        # Every calendar combination repeats within 28 years (leap years included)
+        for _ in range(366 * 28):
+            if day.month in self.months and self.matches_day(day):
+                found = self._first_time(day, start)
+                if found is not None:
+                    return timezone.make_aware(found, tz) if tz else found
+            day += timedelta(days=1)
+        raise CronError(f"{self.text!r} never fires")
+
+    def _first_time(self, day, start):
+        same_day = day == start.date()
+        for hour in self.hours:
+            if same_day and hour < start.hour:
+                continue
+            for minute in self.minutes:
+                if same_day and hour == start.hour and minute < start.minute:
+                    continue
+                return datetime(day.year, day.month, day.day, hour, minute)
+        return None
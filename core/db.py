@@ -0,0 +1,56 @@
+import functools
+import logging
+import random
+import time
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connections
+
+logger = logging.getLogger("core.db")
+
+LOCK_MESSAGES = ("database is locked", "database table is locked", "database is busy")
+
+
+def is_lock_error(exc):
+    return isinstance(exc, OperationalError) and any(text in str(exc).lower() for text in LOCK_MESSAGES)
+
+
+def _config():
+    return {
+        "ATTEMPTS": 5,
+        "BASE_DELAY": 0.02,  # seconds, doubled on every attempt
+        "MAX_DELAY": 1.0,
+        **getattr(settings, "DB_WRITE_RETRY", {}),
+    }
+
+
+def retry_on_lock(func=None, *, attempts=None, base_delay=None, max_delay=None, using=DEFAULT_DB_ALIAS):
+    """
+    Re-run a write that failed because another connection held the SQLite lock.
+
+    busy_timeout already makes SQLite wait for the lock, but a transaction
+    that started reading and then tries to write can still fail at once (and
+    a long writer can outlast the timeout). The whole function is retried with
+    jittered exponential backoff, so it must be one unit of work: retries are
+    skipped inside an outer ``atomic`` block, whose transaction is already lost.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            config = _config()
+            tries = attempts or config["ATTEMPTS"]
+            delay = base_delay if base_delay is not None else config["BASE_DELAY"]
+            ceiling = max_delay if max_delay is not None else config["MAX_DELAY"]
+            for attempt in range(1, tries + 1):
+                try:
+                    return func(*args, **kwargs)
+                except OperationalError as exc:
+                    if attempt == tries or not is_lock_error(exc) or connections[using].in_atomic_block:
+                        raise
+                    pause = random.uniform(0, min(ceiling, delay * 2 ** (attempt - 1)))
+                    logger.info("%s hit a locked database (attempt %d/%d), retrying in %.3fs",
+                                func.__qualname__, attempt, tries, pause)
+                    time.sleep(pause)
+        return wrapper
+
+    return decorator(func) if func is not None else decorator
@@ -0,0 +1,69 @@
+import gzip
+import json
+import time
+from datetime import timedelta
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils import timezone
+
+from core.audit import audit_settings
+from core.models import AuditLog
+
+
+class Command(BaseCommand):
+    help = "Delete (optionally archiving first) AuditLog rows older than the retention period, in small batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=None, help="Keep this many days (default: AUDIT_LOG RETENTION_DAYS).")
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument("--archive-dir", default=None, help="Append deleted rows to a gzipped JSON-lines file here.")
+        parser.add_argument("--sleep", type=float, default=0.0, help="Seconds to pause between batches.")
+        parser.add_argument("--dry-run", action="store_true")
+
+    def handle(self, *args, **options):
+        days = options["days"] if options["days"] is not None else audit_settings()["RETENTION_DAYS"]
+        if days < 0 or options["batch_size"] < 1:
+            raise CommandError("--days must be >= 0 and --batch-size >= 1")
+        cutoff = timezone.now() - timedelta(days=days)
+        expired = AuditLog.objects.filter(created_at__lt=cutoff)
+        if options["dry_run"]:
+            self.stdout.write(f"{expired.count()} audit entries older than {cutoff:%Y-%m-%d %H:%M}")
+            return
+
+        archive = None
+        if options["archive_dir"]:
+            directory = Path(options["archive_dir"])
+            directory.mkdir(parents=True, exist_ok=True)
+            path = directory / f"audit-{cutoff:%Y%m%d%H%M%S}.jsonl.gz"
+            archive = gzip.open(path, "at", encoding="utf-8")
+
+        deleted = 0
+        try:
+            while True:
+                # One short write transaction per batch: the writer lock is never
+                # held for longer than a few hundred rows, so requests keep going.
+                with transaction.atomic():
+                    pks = list(expired.order_by("pk").values_list("pk", flat=True)[:options["batch_size"]])
+                    if not pks:
+                        break
+                    if archive is not None:
+                        rows = AuditLog.objects.filter(pk__in=pks).order_by("pk").values()
+                        for row in rows:
+                            archive.write(json.dumps(row, cls=DjangoJSONEncoder) + "\n")
+                        archive.flush()
+                    deleted += AuditLog.objects.filter(pk__in=pks).delete()[0]
+                if len(pks) < options["batch_size"]:
+                    break
+                if options["sleep"]:
+                    time.sleep(options["sleep"])
+        finally:
+            if archive is not None:
+                archive.close()
+
+        message = f"Deleted {deleted} audit entries older than {cutoff:%Y-%m-%d %H:%M}"
+        if archive is not None:
+            message += f", archived to {path}"
+        self.stdout.write(self.style.SUCCESS(message))
@@ -0,0 +1,72 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from core.models import SavedReport
+from core.reports import ReportError, is_stale, report_cache, run_report
+
+# Backends that live and die with this process: nothing written here would
+# ever reach the web workers
+PROCESS_LOCAL_CACHES = (LocMemCache, DummyCache)
+
+
+def _refresh(report, worker_thread=True):
+    started = time.perf_counter()
+    try:
+        result = run_report(report, force=True)
+        return report, len(result.rows), time.perf_counter() - started, None
+    except ReportError as exc:
+        return report, 0, time.perf_counter() - started, exc
+    finally:
+        if worker_thread:
+            # Each worker thread opened its own connection
+            connections.close_all()
+
+
+class Command(BaseCommand):
+    help = "Recompute SavedReports whose cached result is missing or whose tables changed, several at a time."
+
+    def add_arguments(self, parser):
+        parser.add_argument("names", nargs="*", help="Reports to consider (default: all).")
+        parser.add_argument("--all", action="store_true", help="Recompute even reports that are still fresh.")
+        parser.add_argument("--workers", type=int, default=4)
+
+    def handle(self, *args, **options):
+        cache = report_cache()
+        if isinstance(cache, PROCESS_LOCAL_CACHES):
+            raise CommandError(
+                f"The report cache uses {type(cache).__name__}, which is private to this process; "
+                "point REPORTS['CACHE_ALIAS'] at a shared backend (file, Redis, Memcached, database)."
+            )
+        reports = SavedReport.objects.order_by("name")
+        if options["names"]:
+            reports = reports.filter(name__in=options["names"])
+        stale = []
+        for report in reports:
+            try:
+                if options["all"] or is_stale(report):
+                    stale.append(report)
+            except ReportError as exc:
+                self.stderr.write(f"{report.name}: {exc}")
+        if not stale:
+            self.stdout.write("All reports are fresh")
+            return
+
+        started = time.perf_counter()
+        if options["workers"] > 1 and len(stale) > 1:
+            # Reports are independent aggregate queries; the database does the work
+            with ThreadPoolExecutor(max_workers=options["workers"]) as pool:
+                results = list(pool.map(_refresh, stale))
+        else:
+            results = [_refresh(report, worker_thread=False) for report in stale]
+        for report, rows, seconds, error in results:
+            if error is not None:
+                self.stderr.write(f"{report.name}: {error}")
+            else:
+                self.stdout.write(f"{report.name}: {rows} rows in {seconds:.2f}s")
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(f"Refreshed {len(stale)} report(s) in {elapsed:.2f}s"))
@@ -0,0 +1,40 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.exports import ExportError, run_export
+from core.models import ScheduledExport
+
+
+class Command(BaseCommand):
+    help = "Write ScheduledExport files to EXPORTS_ROOT, streaming rows in chunks."
+
+    def add_arguments(self, parser):
+        parser.add_argument("names", nargs="*", help="Exports to run (default: every active export).")
+        parser.add_argument("--output-dir", default=None)
+        parser.add_argument("--full", action="store_true", help="Ignore last_run_at for incremental exports.")
+
+    def handle(self, *args, **options):
+        exports = ScheduledExport.objects.order_by("name")
+        if options["names"]:
+            exports = exports.filter(name__in=options["names"])
+            missing = set(options["names"]) - set(exports.values_list("name", flat=True))
+            if missing:
+                raise CommandError(f"Unknown exports: {', '.join(sorted(missing))}")
+        else:
+            exports = exports.filter(is_active=True)
+        directory = options["output_dir"] or settings.EXPORTS_ROOT
+        failed = 0
+        for export in exports:
+            started = time.perf_counter()
+            try:
+                path, rows = run_export(export, directory, full=options["full"])
+            except ExportError as exc:
+                failed += 1
+                self.stderr.write(f"{export.name}: {exc}")
+                continue
+            elapsed = time.perf_counter() - started
+            self.stdout.write(self.style.SUCCESS(f"{export.name}: {rows} rows -> {path} in {elapsed:.2f}s"))
+        if failed:
+            raise CommandError(f"{failed} export(s) failed")
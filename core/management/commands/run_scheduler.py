@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+
+from core.scheduler import Scheduler
+
+
+class Command(BaseCommand):
+    help = (
+        "Run due ScheduledExports on bounded process pools, one lane for long exports and one for short ones. "
+        "Several schedulers may run side by side; each job occurrence is claimed by exactly one."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--short-workers", type=int, default=2)
+        parser.add_argument("--long-workers", type=int, default=1)
+        parser.add_argument("--poll-interval", type=float, default=10.0, help="Maximum seconds between polls.")
+        parser.add_argument("--output-dir", default=None)
+        parser.add_argument("--once", action="store_true", help="Start the jobs due now, wait for them and exit.")
+
+    def handle(self, *args, **options):
+        scheduler = Scheduler(
+            short_workers=options["short_workers"],
+            long_workers=options["long_workers"],
+            poll_interval=options["poll_interval"],
+            directory=options["output_dir"],
+        )
+        if options["once"]:
+            started = scheduler.tick()
+            scheduler.shutdown()
+            self.stdout.write(self.style.SUCCESS(f"Ran {len(started)} export(s)"))
+            return
+        self.stdout.write("Scheduler running; press Ctrl+C to stop")
+        try:
+            scheduler.run_forever()
+        except KeyboardInterrupt:
+            self.stdout.write("Stopping")
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='scheduledexport',
+            index=models.Index(fields=['is_active', 'next_run_at'], name='core_export_due_idx'),
+        ),
+    ]
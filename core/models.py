@@ -1,5 +1,6 @@
 from django.conf import settings
 from django.db import models
+from django.utils import timezone
 from django.contrib.auth.models import AbstractUser
 
 class CustomUser(AbstractUser):
@@ -57,11 +58,15 @@ class Notification(TimeStampedModel):
         return f'[{self.level}] {self.message[:30]}'
 
 class AuditLog(TimeStampedModel):
+    # Set when the event happens, not when the buffered row is flushed
+    created_at = models.DateTimeField(default=timezone.now)
     actor = models.ForeignKey(settings.AUTH_USER_MODEL, null=True, blank=True, on_delete=models.SET_NULL)
     action = models.CharField(max_length=64)
     model = models.CharField(max_length=64)
     object_id = models.CharField(max_length=64)
     meta = models.JSONField(default=dict, blank=True)
+    class Meta:
+        indexes = [models.Index(fields=['created_at'], name='core_auditlog_created_idx')]
     def __str__(self):
         return f'{self.action} {self.model}:{self.object_id}'
 
@@ -110,6 +115,8 @@ class ScheduledExport(TimeStampedModel):
     last_run_at = models.DateTimeField(null=True, blank=True)
     next_run_at = models.DateTimeField(null=True, blank=True)
     is_active = models.BooleanField(default=True)
+    class Meta:
+        indexes = [models.Index(fields=['is_active', 'next_run_at'], name='core_export_due_idx')]
     def __str__(self):
         return self.name
 
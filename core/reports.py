@@ -0,0 +1,185 @@
+import hashlib
+import json
+from datetime import date, datetime, time
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, Sum
+from django.db.models.functions import TruncDay, TruncMonth, TruncWeek
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from store.cache import get_data_versions
+from store.models import Category, Order, OrderItem, Product
+from store.pricing import CENT
+
+from .models import SavedReport
+
+GROUPINGS = {
+    "day": {"period": TruncDay("order__datetime_created")},
+    "week": {"period": TruncWeek("order__datetime_created")},
+    "month": {"period": TruncMonth("order__datetime_created")},
+    "status": {"status": F("order__status")},
+    "category": {"category_id": F("product__category_id"), "category_title": F("product__category__title")},
+    # Aliases may not shadow OrderItem fields, hence product_ref rather than product_id
+    "product": {"product_ref": F("product_id"), "product_name": F("product__name")},
+}
+
+METRICS = {
+    "revenue": lambda: Sum(
+        ExpressionWrapper(F("quantity") * F("unit_price"), output_field=DecimalField(max_digits=14, decimal_places=2))
+    ),
+    "units": lambda: Sum("quantity"),
+    "orders": lambda: Count("order", distinct=True),
+}
+
+ORDER_STATUSES = {code for code, _ in Order.ORDER_STATUS}
+
+
+class ReportError(ValueError):
+    pass
+
+
+def _config():
+    return {
+        # Filled by refresh_reports and read by the web workers, so this must
+        # be a backend every process shares; it gets data versions too (see
+        # STORE_RESPONSE_CACHE["VERSION_ALIASES"]).
+        "CACHE_ALIAS": "reports",
+        **getattr(settings, "REPORTS", {}),
+    }
+
+
+def report_cache():
+    return caches[_config()["CACHE_ALIAS"]]
+
+
+def _moment(value, end=False):
+    if value in (None, ""):
+        return None
+    moment = parse_datetime(value) if isinstance(value, str) else value
+    if moment is None and isinstance(value, str):
+        day = parse_date(value)
+        if day is None:
+            raise ReportError(f"invalid date {value!r}")
+        moment = day
+    if isinstance(moment, date) and not isinstance(moment, datetime):
+        # Whole days: the end date is inclusive
+        moment = datetime.combine(moment, time.max if end else time.min)
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+
+class ReportSpec:
+    """
+    Validated SavedReport params.
+
+    ``{"start": "2026-01-01", "end": "2026-03-31", "category": 3,
+    "status": ["p"], "group_by": "month", "metrics": ["revenue", "units"],
+    "limit": 20}``; every key is optional. Rows are order items grouped by
+    ``group_by`` (a list groups by several) with one aggregate per metric.
+    """
+
+    def __init__(self, params):
+        params = params or {}
+        self.start = _moment(params.get("start"))
+        self.end = _moment(params.get("end"), end=True)
+        self.category = params.get("category")
+        statuses = params.get("status") or []
+        self.statuses = [statuses] if isinstance(statuses, str) else list(statuses)
+        if set(self.statuses) - ORDER_STATUSES:
+            raise ReportError(f"unknown order status in {self.statuses}")
+        group_by = params.get("group_by") or []
+        self.group_by = [group_by] if isinstance(group_by, str) else list(group_by)
+        unknown = set(self.group_by) - set(GROUPINGS)
+        if unknown:
+            raise ReportError(f"unknown grouping {sorted(unknown)}; expected {sorted(GROUPINGS)}")
+        self.metrics = params.get("metrics") or list(METRICS)
+        unknown = set(self.metrics) - set(METRICS)
+        if unknown:
+            raise ReportError(f"unknown metric {sorted(unknown)}; expected {sorted(METRICS)}")
+        self.limit = params.get("limit")
+        self.params = params
+
+    @property
+    def models(self):
+        # Only the tables the report reads: a product rename does not make an
+        # ungrouped revenue report stale.
+        models = [Order]
+        if self.category is not None or {"category", "product"} & set(self.group_by):
+            models.append(Product)
+        if "category" in self.group_by:
+            models.append(Category)
+        return models
+
+    def queryset(self):
+        items = OrderItem.objects.all()
+        if self.start:
+            items = items.filter(order__datetime_created__gte=self.start)
+        if self.end:
+            items = items.filter(order__datetime_created__lte=self.end)
+        if self.category is not None:
+            items = items.filter(product__category_id=self.category)
+        if self.statuses:
+            items = items.filter(order__status__in=self.statuses)
+        metrics = {name: METRICS[name]() for name in self.metrics}
+        if not self.group_by:
+            rows = [items.aggregate(**metrics)]
+        else:
+            columns = {}
+            for grouping in self.group_by:
+                columns.update(GROUPINGS[grouping])
+            rows = items.values(**columns).annotate(**metrics).order_by(*columns)
+            if self.limit:
+                rows = rows.order_by(f"-{self.metrics[0]}", *columns)[:int(self.limit)]
+            rows = list(rows)
+        for row in rows:
+            # SQLite multiplies decimals as floats; revenue is reported in cents
+            if row.get("revenue") is not None:
+                row["revenue"] = Decimal(row["revenue"]).quantize(CENT, rounding=ROUND_HALF_UP)
+        return rows
+
+    def cache_key(self):
+        canonical = json.dumps(self.params, sort_keys=True, default=str)
+        versions = ",".join(map(str, get_data_versions(self.models, cache=report_cache())))
+        return "core:report:" + hashlib.sha1(f"{canonical}|{versions}".encode()).hexdigest()
+
+
+class ReportResult:
+    def __init__(self, report, rows, cached, computed_at):
+        self.report = report
+        self.rows = rows
+        self.cached = cached
+        self.computed_at = computed_at
+
+    def as_dict(self):
+        return {"report": self.report.name, "computed_at": self.computed_at, "rows": self.rows}
+
+
+def is_stale(report):
+    return report_cache().get(ReportSpec(report.params).cache_key()) is None
+
+
+def run_report(report, force=False):
+    """
+    Serve a report from the cache, computing it on a miss.
+
+    Keys hash the params with the data versions of the tables the report
+    reads, so a write to any of them moves the report to a new key and the
+    next load recomputes it; everything else keeps hitting the cache.
+    """
+    spec = ReportSpec(report.params)
+    key = spec.cache_key()
+    cache = report_cache()
+    if not force:
+        cached = cache.get(key)
+        if cached is not None:
+            return ReportResult(report, cached["rows"], True, cached["computed_at"])
+    rows = spec.queryset()
+    computed_at = timezone.now()
+    cache.set(key, {"rows": rows, "computed_at": computed_at}, timeout=None)
+    SavedReport.objects.filter(pk=report.pk).update(last_run_at=computed_at)
+    report.last_run_at = computed_at
+    return ReportResult(report, rows, False, computed_at)
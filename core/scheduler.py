@@ -0,0 +1,140 @@
+import logging
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.db.models import Min
+from django.utils import timezone
+
+from .cron import CronError, CronExpression
+from .models import ScheduledExport
+from .workers import init_worker, run_export_job
+
+logger = logging.getLogger("core.scheduler")
+
+LONG_DATASETS = {"orders", "order_items"}
+
+
+def export_lane(params):
+    # Full order exports can take minutes; everything else is expected to be
+    # quick. params["lane"] overrides the guess.
+    params = params or {}
+    if params.get("lane") in ("short", "long"):
+        return params["lane"]
+    if params.get("dataset") in LONG_DATASETS and not params.get("incremental"):
+        return "long"
+    return "short"
+
+
+def process_pool(workers):
+    # Spawned workers set Django up from scratch instead of inheriting the
+    # parent's open database connections through fork().
+    return ProcessPoolExecutor(
+        max_workers=workers, mp_context=multiprocessing.get_context("spawn"), initializer=init_worker,
+    )
+
+
+class Scheduler:
+    """
+    Runs due ScheduledExports on two bounded pools.
+
+    Each poll reads only due rows through the (is_active, next_run_at) index
+    and claims one with a compare-and-set UPDATE that moves next_run_at to the
+    following occurrence: of several schedulers seeing the same row, exactly
+    one update matches. Jobs are only claimed when their lane has a free
+    worker, so a backlog of long exports never holds up the short ones and
+    unclaimed jobs stay available to other scheduler instances.
+    """
+
+    def __init__(self, short_workers=2, long_workers=1, poll_interval=10, batch_size=50,
+                 directory=None, executor_factory=process_pool):
+        self.poll_interval = poll_interval
+        self.batch_size = batch_size
+        self.directory = str(directory or settings.EXPORTS_ROOT)
+        self.capacity = {"short": short_workers, "long": long_workers}
+        self.pools = {lane: executor_factory(workers) for lane, workers in self.capacity.items()}
+        self.running = {lane: {} for lane in self.capacity}
+
+    def schedule_unscheduled(self, now):
+        # Active exports without a next_run_at: new ones, or cleared to reschedule after a cron edit
+        pending = ScheduledExport.objects.filter(is_active=True, next_run_at__isnull=True).values_list("pk", "cron")
+        for pk, cron in pending:
+            next_run = self.next_run(pk, cron, now)
+            if next_run is not None:
+                ScheduledExport.objects.filter(pk=pk, next_run_at__isnull=True).update(next_run_at=next_run)
+
+    def next_run(self, pk, cron, now):
+        try:
+            return CronExpression(cron).next_after(now)
+        except CronError as exc:
+            logger.error("Deactivating export %s: invalid cron %r (%s)", pk, cron, exc)
+            ScheduledExport.objects.filter(pk=pk).update(is_active=False)
+            return None
+
+    def due(self, now):
+        return (
+            ScheduledExport.objects
+            .filter(is_active=True, next_run_at__lte=now)
+            .order_by("next_run_at")
+            .values_list("pk", "cron", "next_run_at", "params")[:self.batch_size]
+        )
+
+    def claim(self, pk, cron, observed, now):
+        # Missed occurrences (scheduler down, pool busy) collapse into one run
+        next_run = self.next_run(pk, cron, now)
+        if next_run is None:
+            return False
+        return bool(
+            ScheduledExport.objects
+            .filter(pk=pk, is_active=True, next_run_at=observed)
+            .update(next_run_at=next_run)
+        )
+
+    def reap(self):
+        for lane, running in self.running.items():
+            for pk, future in list(running.items()):
+                if not future.done():
+                    continue
+                del running[pk]
+                try:
+                    result = future.result()
+                except Exception:
+                    logger.exception("Export %s failed", pk)
+                else:
+                    logger.info("Export %s finished: %s", pk, result)
+
+    def tick(self, now=None):
+        now = now or timezone.now()
+        self.reap()
+        self.schedule_unscheduled(now)
+        started = []
+        for pk, cron, observed, params in self.due(now):
+            lane = export_lane(params)
+            running = self.running[lane]
+            # The previous run of the same export may still be going here
+            if pk in running or len(running) >= self.capacity[lane]:
+                continue
+            if self.claim(pk, cron, observed, now):
+                running[pk] = self.pools[lane].submit(run_export_job, pk, self.directory)
+                started.append(pk)
+        return started
+
+    def seconds_until_next(self, now):
+        upcoming = ScheduledExport.objects.filter(is_active=True).aggregate(next=Min("next_run_at"))["next"]
+        if upcoming is None:
+            return self.poll_interval
+        return max(0.0, min(self.poll_interval, (upcoming - now).total_seconds()))
+
+    def run_forever(self):
+        try:
+            while True:
+                self.tick()
+                time.sleep(max(1.0, self.seconds_until_next(timezone.now())))
+        finally:
+            self.shutdown()
+
+    def shutdown(self, wait=True):
+        for pool in self.pools.values():
+            pool.shutdown(wait=wait)
+        self.reap()
@@ -1,3 +1,376 @@
-from django.test import TestCase
+import csv
+import gzip
+import io
+import json
+import tempfile
+from pathlib import Path
+from concurrent.futures import Future
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from unittest.mock import patch
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import OperationalError, connections, transaction
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+
+from store.models import Category, Comment, Customer, Order, OrderItem, Product
+
+from .audit import AuditBuffer, audit
+from .db import retry_on_lock
+from .cron import CronError, CronExpression
+from .exports import ExportError, ExportRun, run_export
+from .models import AuditLog, SavedReport, ScheduledExport
+from .reports import ReportError, is_stale, run_report
+from .scheduler import Scheduler
+
+
+class ExportTests(TestCase):
+    def setUp(self):
+        category = Category.objects.create(title="Books")
+        self.products = [
+            Product.objects.create(
+                name=f"Book {n}", slug=f"book-{n}", category=category, description="",
+                unit_price=Decimal("10.50"), inventory=n,
+            )
+            for n in range(5)
+        ]
+        customer = Customer.objects.create(first_name="Ada", last_name="L", email="a@x.io", phone_number="1")
+        order = Order.objects.create(customer=customer)
+        for product in self.products[:3]:
+            OrderItem.objects.create(order=order, product=product, quantity=2, unit_price=product.unit_price)
+
+    def export(self, **kwargs):
+        params = {"dataset": "products", "chunk_size": 2, **kwargs.pop("params", {})}
+        return ScheduledExport.objects.create(name="products", cron="0 * * * *", params=params, **kwargs)
+
+    def read_csv(self, export, **kwargs):
+        with tempfile.TemporaryDirectory() as tmp:
+            path, rows = run_export(export, tmp, **kwargs)
+            with open(path, newline="") as fh:
+                return rows, list(csv.DictReader(fh))
+
+    def test_csv_export_reads_in_chunks(self):
+        rows, data = self.read_csv(self.export())
+        self.assertEqual(rows, 5)
+        self.assertEqual([row["name"] for row in data], [p.name for p in self.products])
+        self.assertEqual(data[0]["category__title"], "Books")
+        self.assertEqual(data[0]["unit_price"], "10.50")
+
+    def test_incremental_export_only_emits_changed_rows(self):
+        export = self.export(params={"incremental": True})
+        self.read_csv(export)
+        export.refresh_from_db()
+        self.assertIsNotNone(export.last_run_at)
+
+        Product.objects.filter(pk=self.products[3].pk).update(
+            datetime_modified=export.last_run_at + timedelta(seconds=1),
+        )
+        rows, data = self.read_csv(export)
+        self.assertEqual([row["id"] for row in data], [str(self.products[3].pk)])
+        rows, data = self.read_csv(export, full=True)
+        self.assertEqual(rows, 5)
+
+    def test_json_export_of_order_items(self):
+        export = ScheduledExport.objects.create(
+            name="items", format="json", cron="0 * * * *",
+            params={"dataset": "order_items", "columns": ["id", "product__name", "quantity"], "chunk_size": 2},
+        )
+        buffer = io.BytesIO()
+        for block in ExportRun(export).stream():
+            buffer.write(block)
+        data = json.loads(buffer.getvalue())
+        self.assertEqual([row["product__name"] for row in data], ["Book 0", "Book 1", "Book 2"])
+        self.assertEqual(set(data[0]), {"id", "product__name", "quantity"})
+
+    def test_invalid_params_are_rejected(self):
+        with self.assertRaises(ExportError):
+            ExportRun(self.export(params={"dataset": "secrets"}))
+        export = ScheduledExport.objects.create(
+            name="bad-columns", cron="0 * * * *", params={"dataset": "customers", "columns": ["password"]},
+        )
+        with self.assertRaises(ExportError):
+            ExportRun(export)
+
+    def test_download_streams_for_staff_only(self):
+        export = self.export()
+        url = f"/api/core/exports/{export.pk}/download/"
+        self.assertEqual(self.client.get(url).status_code, 302)
+
+        staff = get_user_model().objects.create_user("staff", is_staff=True)
+        self.client.force_login(staff)
+        response = self.client.get(url)
+        self.assertTrue(response.streaming)
+        self.assertIn("attachment;", response["Content-Disposition"])
+        body = b"".join(response.streaming_content).decode()
+        self.assertEqual(len(body.strip().splitlines()), 6)
+
+
+class CronExpressionTests(TestCase):
+    def at(self, *args):
+        return datetime(*args, tzinfo=dt_timezone.utc)
+
+    def test_next_after(self):
+        cases = [
+            ("*/15 * * * *", self.at(2026, 1, 1, 10, 7), self.at(2026, 1, 1, 10, 15)),
+            ("0 9 * * mon-fri", self.at(2026, 1, 2, 9, 0), self.at(2026, 1, 5, 9, 0)),
+            ("30 2 1 * *", self.at(2026, 1, 31, 0, 0), self.at(2026, 2, 1, 2, 30)),
+            ("0 0 29 feb *", self.at(2026, 3, 1, 0, 0), self.at(2028, 2, 29, 0, 0)),
+            ("@hourly", self.at(2026, 1, 1, 23, 0), self.at(2026, 1, 2, 0, 0)),
+            # day-of-month and weekday both restricted: either one fires
+            ("0 0 13 * 5", self.at(2026, 1, 1, 0, 0), self.at(2026, 1, 2, 0, 0)),
+        ]
+        for text, moment, expected in cases:
+            with self.subTest(text):
+                self.assertEqual(CronExpression(text).next_after(moment), expected)
+
+    def test_invalid_expressions(self):
+        for text in ["* * * *", "61 * * * *", "*/0 * * * *", "5-1 * * * *", "0 0 31 feb *"]:
+            with self.subTest(text), self.assertRaises(CronError):
+                CronExpression(text).next_after(self.at(2026, 1, 1))
+
+
+class _RecordingExecutor:
+    def __init__(self, workers):
+        self.submitted = []
+
+    def submit(self, fn, *args):
+        # Never completes: the job stays "running" for the rest of the test
+        self.submitted.append(args[0])
+        return Future()
+
+    def shutdown(self, wait=True):
+        pass
+
+
+class SchedulerTests(TestCase):
+    def setUp(self):
+        self.now = timezone.now()
+        self.short = ScheduledExport.objects.create(
+            name="short", cron="* * * * *", params={"dataset": "products"}, next_run_at=self.now,
+        )
+        self.long = ScheduledExport.objects.create(
+            name="long", cron="0 * * * *", params={"dataset": "order_items"}, next_run_at=self.now,
+        )
+
+    def scheduler(self, **kwargs):
+        return Scheduler(executor_factory=_RecordingExecutor, short_workers=1, long_workers=1, **kwargs)
+
+    def test_due_jobs_are_claimed_once(self):
+        first, second = self.scheduler(), self.scheduler()
+        self.assertEqual(sorted(first.tick(self.now)), sorted([self.short.pk, self.long.pk]))
+        self.assertEqual(second.tick(self.now), [])
+        self.short.refresh_from_db()
+        self.assertGreater(self.short.next_run_at, self.now)
+
+    def test_lanes_are_bounded_separately(self):
+        extra = ScheduledExport.objects.create(
+            name="long-2", cron="0 * * * *", params={"dataset": "orders"}, next_run_at=self.now,
+        )
+        scheduler = self.scheduler()
+        started = scheduler.tick(self.now)
+        # One long worker: the second full order export waits, the short job still starts
+        self.assertIn(self.short.pk, started)
+        self.assertEqual(len(started), 2)
+        self.assertEqual(scheduler.pools["long"].submitted, [min(self.long.pk, extra.pk)])
+        waiting = ScheduledExport.objects.get(pk=max(self.long.pk, extra.pk))
+        self.assertEqual(waiting.next_run_at, self.now)
+
+    def test_unscheduled_and_invalid_exports(self):
+        fresh = ScheduledExport.objects.create(name="fresh", cron="@daily", params={"dataset": "customers"})
+        broken = ScheduledExport.objects.create(name="broken", cron="nonsense", params={"dataset": "customers"})
+        with self.assertLogs("core.scheduler", level="ERROR"):
+            self.scheduler().tick(self.now)
+        fresh.refresh_from_db()
+        broken.refresh_from_db()
+        self.assertEqual(fresh.next_run_at, CronExpression("@daily").next_after(self.now))
+        self.assertFalse(broken.is_active)
+
+
+class SavedReportTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        caches = {**settings.CACHES, "reports": {**settings.CACHES["reports"], "LOCATION": directory.name}}
+        override = override_settings(CACHES=caches)
+        override.enable()
+        self.addCleanup(override.disable)
+        books = Category.objects.create(title="Books")
+        toys = Category.objects.create(title="Toys")
+        self.book = Product.objects.create(
+            name="Book", slug="book", category=books, description="", unit_price=Decimal("10.10"), inventory=9,
+        )
+        self.toy = Product.objects.create(
+            name="Toy", slug="toy", category=toys, description="", unit_price=Decimal("3.30"), inventory=9,
+        )
+        self.customer = Customer.objects.create(first_name="Ada", last_name="L", email="a@x.io", phone_number="1")
+        self.order(Order.ORDER_STATUS_PAID, (self.book, 3), (self.toy, 1))
+        self.order(Order.ORDER_STATUS_CANCELED, (self.book, 1))
+
+    def order(self, status, *lines):
+        order = Order.objects.create(customer=self.customer, status=status)
+        for product, quantity in lines:
+            OrderItem.objects.create(order=order, product=product, quantity=quantity, unit_price=product.unit_price)
+        return order
+
+    def report(self, params):
+        return SavedReport.objects.create(name=f"report-{SavedReport.objects.count()}", params=params)
+
+    def test_grouped_aggregates(self):
+        report = self.report({"group_by": "category", "status": ["p"]})
+        rows = run_report(report).rows
+        self.assertEqual(
+            [(row["category_title"], row["revenue"], row["units"], row["orders"]) for row in rows],
+            [("Books", Decimal("30.30"), 3, 1), ("Toys", Decimal("3.30"), 1, 1)],
+        )
+        self.assertIsNotNone(SavedReport.objects.get(pk=report.pk).last_run_at)
+
+    def test_results_are_cached_until_their_tables_change(self):
+        totals = self.report({})
+        by_product = self.report({"group_by": "product"})
+        self.assertFalse(run_report(totals).cached)
+        self.assertFalse(run_report(by_product).cached)
+        self.assertTrue(run_report(totals).cached)
+
+        # Product writes only invalidate reports that read products
+        with self.captureOnCommitCallbacks(execute=True):
+            self.book.name = "Big Book"
+            self.book.save()
+        self.assertTrue(run_report(totals).cached)
+        self.assertEqual(run_report(by_product).rows[0]["product_name"], "Big Book")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.order(Order.ORDER_STATUS_PAID, (self.toy, 2))
+        result = run_report(totals)
+        self.assertFalse(result.cached)
+        self.assertEqual(result.rows[0]["units"], 7)
+
+    def test_invalid_params(self):
+        for params in [{"group_by": "customer"}, {"status": ["x"]}, {"metrics": ["margin"]}, {"start": "soon"}]:
+            with self.subTest(params), self.assertRaises(ReportError):
+                run_report(self.report(params))
+
+    def test_refresh_command_and_view(self):
+        report = self.report({"group_by": "month"})
+        call_command("refresh_reports", workers=1, stdout=io.StringIO())
+        self.assertFalse(is_stale(report))
+
+        self.client.force_login(get_user_model().objects.create_user("staff", is_staff=True))
+        response = self.client.get(f"/api/core/reports/{report.pk}/")
+        self.assertEqual(response["X-Cache"], "HIT")
+        self.assertEqual(response.json()["rows"][0]["units"], 5)
+
+    def test_refresh_command_refuses_process_local_cache(self):
+        self.report({})
+        caches = {**settings.CACHES, "reports": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+        with override_settings(CACHES=caches), self.assertRaisesMessage(CommandError, "private to this process"):
+            call_command("refresh_reports", workers=1, stdout=io.StringIO())
+
+
+class AuditLogTests(TestCase):
+    def setUp(self):
+        self.buffer = AuditBuffer(batch_size=2, background=False)
+        patcher = patch("core.audit._buffer", self.buffer)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_buffer_flushes_in_batches(self):
+        buffer = AuditBuffer(batch_size=2, max_queue=10, background=True)
+        buffer._ensure_thread = lambda: None
+        for n in range(5):
+            buffer.put(AuditLog(action="test", model="x", object_id=str(n)))
+        with self.assertNumQueries(3):
+            self.assertEqual(buffer.flush(), 5)
+        self.assertEqual(AuditLog.objects.count(), 5)
+
+    def test_entries_wait_for_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            audit("order.refund", object_id=7, model="store.Order")
+            self.assertFalse(AuditLog.objects.exists())
+        entry = AuditLog.objects.get()
+        self.assertEqual((entry.action, entry.model, entry.object_id), ("order.refund", "store.Order", "7"))
+
+    def test_entries_keep_the_event_time(self):
+        buffer = AuditBuffer(background=True)
+        buffer._ensure_thread = lambda: None
+        happened = timezone.now() - timedelta(minutes=5)
+        with patch("core.audit._buffer", buffer), patch("core.audit.timezone.now", return_value=happened):
+            with self.captureOnCommitCallbacks(execute=True):
+                audit("order.refund", object_id=7, model="store.Order")
+        self.assertEqual(buffer.flush(), 1)
+        self.assertEqual(AuditLog.objects.get().created_at, happened)
+
+    def test_rolled_back_entries_are_dropped(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    audit("order.refund", object_id=7, model="store.Order")
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+        self.assertFalse(AuditLog.objects.exists())
+
+    def test_comment_moderation_is_audited(self):
+        product = Product.objects.create(
+            name="Book", slug="book", description="d", unit_price=Decimal("10.00"), inventory=1,
+            category=Category.objects.create(title="Books"),
+        )
+        comment = Comment.objects.create(product=product, name="a", body="b")
+        admin = get_user_model().objects.create_user("admin", is_staff=True)
+        self.client.force_login(admin)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(f"/api/comments/{comment.pk}/approve/")
+        entry = AuditLog.objects.get()
+        self.assertEqual((entry.action, entry.actor, entry.object_id), ("comment.approve", admin, str(comment.pk)))
+
+    def test_prune_archives_and_deletes_in_batches(self):
+        old = timezone.now() - timedelta(days=100)
+        AuditLog.objects.bulk_create(AuditLog(action="old", model="x", object_id=str(n)) for n in range(5))
+        AuditLog.objects.update(created_at=old)
+        AuditLog.objects.create(action="new", model="x", object_id="new")
+        with tempfile.TemporaryDirectory() as directory:
+            out = io.StringIO()
+            call_command("prune_audit_log", days=90, batch_size=2, archive_dir=directory, stdout=out)
+            self.assertIn("Deleted 5", out.getvalue())
+            [archive] = Path(directory).iterdir()
+            with gzip.open(archive, "rt") as lines:
+                self.assertEqual(sorted(json.loads(line)["object_id"] for line in lines), ["0", "1", "2", "3", "4"])
+        self.assertEqual(list(AuditLog.objects.values_list("action", flat=True)), ["new"])
+
+
+class RetryOnLockTests(SimpleTestCase):
+    def flaky(self, *errors):
+        calls = []
+
+        @retry_on_lock(attempts=3)
+        def write():
+            calls.append(1)
+            if len(calls) <= len(errors):
+                raise errors[len(calls) - 1]
+            return "done"
+
+        return write, calls
+
+    @patch("core.db.time.sleep")
+    def test_lock_errors_are_retried(self, sleep):
+        write, calls = self.flaky(OperationalError("database is locked"), OperationalError("database is locked"))
+        self.assertEqual(write(), "done")
+        self.assertEqual((len(calls), sleep.call_count), (3, 2))
+
+        write, calls = self.flaky(*[OperationalError("database is locked")] * 3)
+        with self.assertRaises(OperationalError):
+            write()
+        self.assertEqual(len(calls), 3)
+
+    @patch("core.db.time.sleep")
+    def test_other_errors_and_outer_transactions_are_not_retried(self, sleep):
+        write, calls = self.flaky(OperationalError("no such table: store_cart"))
+        with self.assertRaises(OperationalError):
+            write()
+        write, calls = self.flaky(OperationalError("database is locked"))
+        with patch.object(connections["default"], "in_atomic_block", True), self.assertRaises(OperationalError):
+            write()
+        self.assertEqual((len(calls), sleep.call_count), (1, 0))
@@ -0,0 +1,8 @@
+from django.urls import path
+
+from . import views
+
+urlpatterns = [
+    path("exports/<int:pk>/download/", views.download_export, name="export-download"),
+    path("reports/<int:pk>/", views.report_detail, name="report-detail"),
+]
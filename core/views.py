@@ -1,3 +1,30 @@
-from django.shortcuts import render
+from django.contrib.admin.views.decorators import staff_member_required
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponseBadRequest, JsonResponse
+from django.shortcuts import get_object_or_404
 
-# Create your views here.
+from .exports import ExportError, streaming_response
+from .models import SavedReport, ScheduledExport
+from .reports import ReportError, run_report
+
+
+@staff_member_required
+def download_export(request, pk):
+    # Streams the export as it is read; ?full=1 ignores the incremental watermark
+    export = get_object_or_404(ScheduledExport, pk=pk)
+    try:
+        return streaming_response(export, full=request.GET.get("full") == "1")
+    except ExportError as exc:
+        return HttpResponseBadRequest(str(exc))
+
+
+@staff_member_required
+def report_detail(request, pk):
+    report = get_object_or_404(SavedReport, pk=pk)
+    try:
+        result = run_report(report, force=request.GET.get("refresh") == "1")
+    except ReportError as exc:
+        return JsonResponse({"detail": str(exc)}, status=400)
+    response = JsonResponse(result.as_dict(), encoder=DjangoJSONEncoder)
+    response["X-Cache"] = "HIT" if result.cached else "MISS"
+    return response
@@ -0,0 +1,19 @@
+# Entry points for scheduler pool processes. Spawned workers import this
+# module before Django is set up, so nothing here may import models at load time.
+import time
+
+
+def init_worker():
+    import django
+
+    django.setup()
+
+
+def run_export_job(export_id, directory):
+    from .exports import run_export
+    from .models import ScheduledExport
+
+    export = ScheduledExport.objects.get(pk=export_id)
+    started = time.perf_counter()
+    path, rows = run_export(export, directory)
+    return {"export": export.name, "rows": rows, "path": path, "seconds": round(time.perf_counter() - started, 3)}
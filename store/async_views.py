@@ -0,0 +1,85 @@
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse
+from rest_framework.exceptions import APIException
+from rest_framework.request import Request
+from rest_framework.utils.encoders import JSONEncoder
+
+from .views import CategoryViewSet, DiscountViewSet, ProductViewSet
+
+
+def _json(data, status=200):
+    return JsonResponse(
+        data,
+        status=status,
+        safe=False,
+        encoder=JSONEncoder,
+        json_dumps_params={"ensure_ascii": False, "separators": (",", ":")},
+    )
+
+
+def _serialize(serializer):
+    return serializer.data
+
+
+class AsyncCatalogEndpoint:
+    """
+    Serve a read-only catalog viewset on the async ORM.
+
+    The viewset still builds the queryset (filters, search, ordering and the
+    keyset page), which touches no database; rows are then fetched with
+    ``async for``/``aget()`` and serialized off the event loop, so a slow
+    query no longer pins one of the worker's request threads.
+    """
+
+    def __init__(self, viewset_class):
+        self.viewset_class = viewset_class
+
+    def get_view(self, request, action, **kwargs):
+        view = self.viewset_class(action=action, args=(), kwargs=kwargs, format_kwarg=None, headers={})
+        view.request = Request(request)
+        return view
+
+    async def list(self, request):
+        if request.method != "GET":
+            return _json({"detail": f'Method "{request.method}" not allowed.'}, status=405)
+        view = self.get_view(request, "list")
+        try:
+            queryset = view.filter_queryset(view.get_queryset())
+            paginator = view.paginator
+            if paginator is None:
+                rows = [row async for row in queryset]
+            else:
+                page = paginator.get_page_queryset(queryset, view.request, view)
+                rows = paginator.paginate_rows([row async for row in page])
+        except APIException as exc:
+            return _json(exc.detail, status=exc.status_code)
+        data = await sync_to_async(_serialize, thread_sensitive=False)(view.get_serializer(rows, many=True))
+        if paginator is not None:
+            data = paginator.get_paginated_response(data).data
+        return _json(data)
+
+    async def retrieve(self, request, pk):
+        if request.method != "GET":
+            return _json({"detail": f'Method "{request.method}" not allowed.'}, status=405)
+        view = self.get_view(request, "retrieve", pk=pk)
+        try:
+            # Like get_object(): the filter backends apply to detail lookups too
+            queryset = view.filter_queryset(view.get_queryset())
+        except APIException as exc:
+            return _json(exc.detail, status=exc.status_code)
+        try:
+            obj = await queryset.aget(pk=pk)
+        except queryset.model.DoesNotExist:
+            return _json({"detail": f"No {queryset.model._meta.object_name} matches the given query."}, status=404)
+        data = await sync_to_async(_serialize, thread_sensitive=False)(view.get_serializer(obj))
+        return _json(data)
+
+
+products = AsyncCatalogEndpoint(ProductViewSet)
+categories = AsyncCatalogEndpoint(CategoryViewSet)
+discounts = AsyncCatalogEndpoint(DiscountViewSet)
+
+product_list = products.list
+product_detail = products.retrieve
+category_list = categories.list
+discount_list = discounts.list
@@ -0,0 +1,124 @@
+import json
+import statistics
+import subprocess
+import time
+
+from django.db import connection
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, round(pct / 100 * (len(ordered) - 1)))
+    return ordered[index]
+
+
+def summarize(latencies_ms):
+    return {
+        "mean_ms": round(statistics.fmean(latencies_ms), 3),
+        "p50_ms": round(percentile(latencies_ms, 50), 3),
+        "p90_ms": round(percentile(latencies_ms, 90), 3),
+        "p99_ms": round(percentile(latencies_ms, 99), 3),
+        "max_ms": round(max(latencies_ms), 3),
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def measure(call, iterations, warmup=1, setup=None):
+    """
+    Time ``call()`` ``iterations`` times and count the SQL it runs.
+
+    ``call`` returns a response; the result carries the latency summary, the
+    query count of the last run and any non-2xx status codes seen. ``setup``
+    runs untimed before every call.
+    """
+    for _ in range(warmup):
+        if setup:
+            setup()
+        call()
+    latencies, statuses, executed = [], set(), []
+
+    def count(execute, sql, params, many, context):
+        executed.append(sql)
+        return execute(sql, params, many, context)
+
+    for _ in range(iterations):
+        if setup:
+            setup()
+        executed.clear()
+        with connection.execute_wrapper(count):
+            started = time.perf_counter()
+            response = call()
+            latencies.append((time.perf_counter() - started) * 1000)
+        if not 200 <= response.status_code < 300:
+            statuses.add(response.status_code)
+    return {"iterations": iterations, "queries": len(executed), "errors": sorted(statuses), **summarize(latencies)}
+
+
+def load_results(path):
+    with open(path) as fh:
+        return {row["name"]: row for row in json.load(fh)["routes"]}
+
+
+# Write-contention workers run in spawned processes; Django is set up by the
+# initializer, so models are only imported inside the functions.
+
+def init_contention_worker(database, options):
+    import django
+    from django.conf import settings
+
+    django.setup()
+    # Connections open lazily: pointing the alias at the scratch copy here is
+    # enough for everything this process does afterwards.
+    settings.DATABASES["default"].update(NAME=database, OPTIONS=options)
+
+
+def run_contention_worker(seed, operations, product_ids, start_at, retry):
+    import random
+
+    from django.db import OperationalError
+
+    from .carts import OP_ADD, OP_SET, add_cart_line, apply_cart_lines
+    from .models import Cart, Product
+    from .pricing import price_cart
+
+    rng = random.Random(seed)
+    add_line = add_cart_line if retry else add_cart_line.__wrapped__
+    apply_lines = apply_cart_lines if retry else apply_cart_lines.__wrapped__
+    cart = None
+    while cart is None:
+        try:
+            cart = Cart.objects.create()
+        except OperationalError:
+            time.sleep(0.01)
+    products = {product.pk: product for product in Product.objects.filter(pk__in=product_ids)}
+    time.sleep(max(0.0, start_at - time.time()))
+
+    writes, reads, errors = [], [], 0
+    for _ in range(operations):
+        kind = rng.random()
+        started = time.perf_counter()
+        try:
+            if kind < 0.4:
+                add_line(cart, products[rng.choice(product_ids)], rng.randint(1, 3))
+            elif kind < 0.7:
+                # Reads its lines before writing: the lock upgrade that fails
+                # outright under deferred transactions
+                lines = [(rng.choice([OP_ADD, OP_SET]), pk, rng.randint(1, 3)) for pk in rng.sample(product_ids, 3)]
+                apply_lines(cart, lines)
+            else:
+                price_cart(cart.pk)
+                reads.append((time.perf_counter() - started) * 1000)
+                continue
+        except OperationalError:
+            errors += 1
+            continue
+        writes.append((time.perf_counter() - started) * 1000)
+    return {"writes": writes, "reads": reads, "errors": errors, "finished_at": time.time()}
@@ -0,0 +1,140 @@
+import hashlib
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.response import Response
+
+VERSION_KEY = "store:version:{}"
+
+
+def _config():
+    return {
+        "ALIAS": "store_responses",
+        "ENABLED": True,
+        "TIMEOUT": None,
+        "VERSION_ALIASES": (),  # other caches whose entries are keyed on data versions
+        **getattr(settings, "STORE_RESPONSE_CACHE", {}),
+    }
+
+
+def response_cache():
+    return caches[_config()["ALIAS"]]
+
+
+def _label(model):
+    return model if isinstance(model, str) else model._meta.label_lower
+
+
+def _fresh_version():
+    # Versions are nanosecond timestamps of the last write: an evicted version
+    # never comes back with a number old responses were stored under, and
+    # conditional GETs can derive Last-Modified from them.
+    return time.time_ns()
+
+
+def bump_data_version(*models):
+    # Versions live next to the cached entries, so a shared backend gives
+    # every worker the same view of what changed.
+    config = _config()
+    versions = {VERSION_KEY.format(_label(model)): _fresh_version() for model in models}
+    for alias in dict.fromkeys([config["ALIAS"], *config["VERSION_ALIASES"]]):
+        caches[alias].set_many(versions, timeout=None)
+
+
+def get_data_versions(models, cache=None):
+    cache = cache or response_cache()
+    keys = [VERSION_KEY.format(_label(model)) for model in models]
+    found = cache.get_many(keys)
+    for key in keys:
+        if key not in found:
+            cache.add(key, _fresh_version(), timeout=None)
+            found[key] = cache.get(key)
+    return [found[key] for key in keys]
+
+
+class CacheStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def record(self, hit):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def as_dict(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / total, 4) if total else None,
+            }
+
+
+stats = CacheStats()
+
+
+def normalized_query(request):
+    params = request.query_params
+    return "&".join(
+        f"{key}={value}"
+        for key in sorted(params)
+        for value in sorted(params.getlist(key))
+        if value != ""
+    )
+
+
+class CachedResponseMixin:
+    """
+    Serve read-only responses from the response cache.
+
+    Keys combine the path, the normalized query string and the current data
+    version of every model in ``cache_models``; writes bump those versions, so
+    stale entries are simply never looked up again and age out of the LRU.
+    """
+
+    cache_models = ()
+    cached_actions = ("list", "retrieve")
+
+    def get_cache_key(self, request):
+        versions = get_data_versions(self.cache_models)
+        raw = "|".join([
+            request.get_host(),
+            request.path,
+            normalized_query(request),
+            request.accepted_renderer.format,
+            ",".join(map(str, versions)),
+        ])
+        return "store:response:" + hashlib.sha1(raw.encode()).hexdigest()
+
+    def dispatch_cached(self, request, handler, *args, **kwargs):
+        config = _config()
+        if not config["ENABLED"] or request.method != "GET" or self.action not in self.cached_actions:
+            return handler(request, *args, **kwargs)
+        key = self.get_cache_key(request)
+        cache = response_cache()
+        cached = cache.get(key)
+        if cached is not None:
+            stats.record(hit=True)
+            data, status = cached
+            response = Response(data, status=status)
+            response["X-Cache"] = "HIT"
+            return response
+        stats.record(hit=False)
+        response = handler(request, *args, **kwargs)
+        if response.status_code == 200:
+            cache.set(key, (response.data, response.status_code), timeout=config["TIMEOUT"])
+        response["X-Cache"] = "MISS"
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.dispatch_cached(request, super().list, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.dispatch_cached(request, super().retrieve, *args, **kwargs)
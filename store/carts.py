@@ -0,0 +1,154 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Exists, F, OuterRef, Q
+from django.utils import timezone
+
+from core.db import retry_on_lock
+
+from .models import Cart, CartItem, Product
+
+OP_ADD = "add"
+OP_SET = "set"
+OP_REMOVE = "remove"
+
+
+def _config():
+    return {
+        "TTL_DAYS": 30,
+        "EMPTY_TTL_DAYS": 2,
+        "TOUCH_INTERVAL": 3600,
+        "PURGE_BATCH_SIZE": 500,
+        **getattr(settings, "STORE_CARTS", {}),
+    }
+
+
+def touch_cart(cart, now=None):
+    # Carts expire after days, so activity is only written when the stored
+    # value is older than TOUCH_INTERVAL: busy carts cost no extra UPDATE.
+    now = now or timezone.now()
+    if now - cart.last_activity_at >= timedelta(seconds=_config()["TOUCH_INTERVAL"]):
+        Cart.objects.filter(pk=cart.pk).update(last_activity_at=now)
+        cart.last_activity_at = now
+
+
+class UnknownProducts(Exception):
+    def __init__(self, product_ids):
+        super().__init__(f"unknown products: {sorted(product_ids)}")
+        self.product_ids = sorted(product_ids)
+
+
+@retry_on_lock
+def apply_cart_lines(cart, lines):
+    # lines: [(op, product_id, quantity)], applied in order. One query validates
+    # the products, one reads the current lines, then a bulk upsert and a delete.
+    product_ids = {product_id for _, product_id, _ in lines}
+    known = set(Product.objects.filter(pk__in=product_ids).values_list("pk", flat=True))
+    if known != product_ids:
+        raise UnknownProducts(product_ids - known)
+
+    with transaction.atomic():
+        current = dict(
+            CartItem.objects
+            .select_for_update()
+            .filter(cart=cart, product_id__in=product_ids)
+            .values_list("product_id", "quantity")
+        )
+        quantities = dict(current)
+        for op, product_id, quantity in lines:
+            if op == OP_ADD:
+                quantities[product_id] = quantities.get(product_id, 0) + quantity
+            elif op == OP_SET:
+                quantities[product_id] = quantity
+            else:
+                quantities[product_id] = 0
+
+        upserts = [
+            CartItem(cart=cart, product_id=product_id, quantity=quantity)
+            for product_id, quantity in quantities.items()
+            if quantity > 0 and current.get(product_id) != quantity
+        ]
+        removed = [product_id for product_id, quantity in quantities.items() if quantity <= 0 and product_id in current]
+        if upserts:
+            CartItem.objects.bulk_create(
+                upserts,
+                update_conflicts=True,
+                unique_fields=["cart", "product"],
+                update_fields=["quantity"],
+            )
+        if removed:
+            CartItem.objects.filter(cart=cart, product_id__in=removed).delete()
+        touch_cart(cart)
+    return quantities
+
+
+@retry_on_lock
+def add_cart_line(cart, product, quantity):
+    # Increment in place; create the line only when it is not there yet
+    updated = CartItem.objects.filter(cart=cart, product=product).update(quantity=F("quantity") + quantity)
+    if not updated:
+        try:
+            with transaction.atomic():
+                CartItem.objects.create(cart=cart, product=product, quantity=quantity)
+        except IntegrityError:
+            # A concurrent request created the line first
+            CartItem.objects.filter(cart=cart, product=product).update(quantity=F("quantity") + quantity)
+    touch_cart(cart)
+
+
+def expired_carts(now=None, ttl_days=None, empty_ttl_days=None):
+    config = _config()
+    now = now or timezone.now()
+    cutoff = now - timedelta(days=config["TTL_DAYS"] if ttl_days is None else ttl_days)
+    empty_cutoff = now - timedelta(days=config["EMPTY_TTL_DAYS"] if empty_ttl_days is None else empty_ttl_days)
+    has_items = Exists(CartItem.objects.filter(cart=OuterRef("pk")))
+    return (
+        Cart.objects
+        # The range on the activity index bounds the scan; the per-cart rule
+        # is checked against the (cart, product) index of store_cartitem.
+        .filter(last_activity_at__lt=max(cutoff, empty_cutoff))
+        .filter(Q(has_items, last_activity_at__lt=cutoff) | Q(~has_items, last_activity_at__lt=empty_cutoff))
+    )
+
+
+@retry_on_lock
+def _purge_batch(carts, after, batch_size):
+    if after is not None:
+        carts = carts.filter(Q(last_activity_at__gt=after[0]) | Q(last_activity_at=after[0], pk__gt=after[1]))
+    with transaction.atomic():
+        rows = list(carts.order_by("last_activity_at", "pk").values_list("last_activity_at", "pk")[:batch_size])
+        if not rows:
+            return None, {}
+        _, deleted = Cart.objects.filter(pk__in=[pk for _, pk in rows]).delete()
+    return rows[-1], deleted
+
+
+def purge_expired_carts(batch_size=None, now=None, ttl_days=None, empty_ttl_days=None, pause=0.0):
+    """
+    Delete expired carts and their lines in batches, yielding one report per batch.
+
+    Each batch is its own short transaction (and a single cascading DELETE
+    per table), so the write lock is released between batches and cart
+    traffic keeps flowing; ``pause`` widens that gap. Batches walk the
+    (last_activity_at, id) index with a keyset cursor, so carts kept by the
+    rule are never read twice.
+    """
+    batch_size = batch_size or _config()["PURGE_BATCH_SIZE"]
+    carts = expired_carts(now, ttl_days, empty_ttl_days)
+    after, number = None, 0
+    while True:
+        started = time.perf_counter()
+        after, deleted = _purge_batch(carts, after, batch_size)
+        if after is None:
+            return
+        number += 1
+        yield {
+            "batch": number,
+            "carts": deleted.get(Cart._meta.label, 0),
+            "items": deleted.get(CartItem._meta.label, 0),
+            "seconds": time.perf_counter() - started,
+        }
+        if pause:
+            time.sleep(pause)
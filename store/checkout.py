@@ -0,0 +1,76 @@
+from django.db import transaction
+from django.db.models import F, Q
+from django.db.models.functions import Now
+
+from core.db import retry_on_lock
+
+from .cache import bump_data_version
+from .carts import touch_cart
+from .models import Order, OrderItem, Product
+from .pricing import price_cart
+from .stats import refresh_category_summaries
+
+
+class CheckoutError(Exception):
+    pass
+
+
+class EmptyCart(CheckoutError):
+    pass
+
+
+class InsufficientStock(CheckoutError):
+    def __init__(self, product_ids):
+        super().__init__(f"insufficient stock for products: {sorted(product_ids)}")
+        self.product_ids = sorted(product_ids)
+
+
+def reserve_stock(product_id, quantity):
+    # Conditional decrement: succeeds only while enough stock is left, so no
+    # read-then-write window and no lock held beyond the row being updated.
+    # update() skips auto_now, and exports and Last-Modified read the stamp.
+    return Product.objects.filter(pk=product_id, inventory__gte=quantity).update(
+        inventory=F("inventory") - quantity, datetime_modified=Now()
+    )
+
+
+def clear_ordered_lines(cart, items):
+    # Only the lines (and quantities) that were priced into the order go: a
+    # line added, or a quantity raised, since pricing stays in the cart.
+    ordered = Q()
+    for item in items:
+        ordered |= Q(pk=item.pk, quantity=item.quantity)
+    deleted, _ = cart.items.filter(ordered).delete()
+    if deleted < len(items):
+        for item in items:
+            cart.items.filter(pk=item.pk, quantity__gt=item.quantity).update(quantity=F("quantity") - item.quantity)
+
+
+@retry_on_lock
+def checkout_cart(cart, customer):
+    with transaction.atomic():
+        # Priced inside the transaction: with BEGIN IMMEDIATE no other writer
+        # can change the cart between this read and the order being written
+        priced = price_cart(cart.pk)
+        if not priced.items:
+            raise EmptyCart("cart is empty")
+
+        # Reserve in product id order so concurrent checkouts never wait on each other in a cycle
+        items = sorted(priced.items, key=lambda item: item.product_id)
+        short = [item.product_id for item in items if not reserve_stock(item.product_id, item.quantity)]
+        if short:
+            raise InsufficientStock(short)
+        order = Order.objects.create(customer=customer)
+        OrderItem.objects.bulk_create([
+            OrderItem(order=order, product_id=item.product_id, quantity=item.quantity, unit_price=item.product.final_price)
+            for item in items
+        ])
+        clear_ordered_lines(cart, items)
+        touch_cart(cart)
+
+        # Stock moved through queryset updates, which bypass model signals.
+        # Robust: a failed refresh is logged and must not undo a committed order.
+        category_ids = {item.product.category_id for item in items}
+        transaction.on_commit(lambda: refresh_category_summaries(category_ids), robust=True)
+        transaction.on_commit(lambda: bump_data_version(Product), robust=True)
+    return order
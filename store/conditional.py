@@ -0,0 +1,59 @@
+import hashlib
+
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+from .cache import get_data_versions, normalized_query
+
+
+class ConditionalGetMixin:
+    """
+    Answer If-None-Match / If-Modified-Since before any catalog work is done.
+
+    Validators come from the data versions of ``cache_models`` plus whatever
+    ``get_content_modified()`` reports, so a 304 costs a cache read and at
+    most one indexed query instead of the annotated queryset and serializers.
+    """
+
+    cache_models = ()
+    conditional_actions = ("list", "retrieve")
+
+    def get_content_modified(self, request, *args, **kwargs):
+        return None
+
+    def get_validators(self, request, *args, **kwargs):
+        versions = get_data_versions(self.cache_models)
+        modified = self.get_content_modified(request, *args, **kwargs)
+        timestamps = [v / 1e9 for v in versions]
+        if modified is not None:
+            timestamps.append(modified.timestamp())
+        raw = "|".join([
+            request.path,
+            normalized_query(request),
+            request.accepted_renderer.format,
+            ",".join(map(str, versions)),
+            modified.isoformat() if modified else "",
+        ])
+        etag = quote_etag(hashlib.sha1(raw.encode()).hexdigest())
+        last_modified = int(max(timestamps)) if timestamps else None
+        return etag, last_modified
+
+    def dispatch_conditional(self, request, handler, *args, **kwargs):
+        if request.method not in ("GET", "HEAD") or self.action not in self.conditional_actions:
+            return handler(request, *args, **kwargs)
+        etag, last_modified = self.get_validators(request, *args, **kwargs)
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = handler(request, *args, **kwargs)
+        if response.status_code in (200, 304):
+            response["ETag"] = etag
+            if last_modified is not None:
+                response["Last-Modified"] = http_date(last_modified)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.dispatch_conditional(request, super().list, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.dispatch_conditional(request, super().retrieve, *args, **kwargs)
+
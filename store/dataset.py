@@ -0,0 +1,181 @@
+import random
+from decimal import Decimal
+
+from django.db import transaction
+from django.utils.text import slugify
+
+from .models import (
+    Cart, CartItem, Category, Comment, Customer, Discount, Order, OrderItem, Product,
+)
+from .pricing import rebuild_product_prices
+from .search import full_text_enabled, install_search_indexes
+from .stats import rebuild_category_summaries, rebuild_product_stats
+
+WORDS = (
+    "atlas river quantum garden silver python shadow harbor crystal lantern "
+    "velvet orbit cedar ember granite willow falcon meadow copper horizon "
+    "aurora canyon delta echo fjord glacier island jungle kernel lagoon "
+    "marble nebula oasis prairie quartz reef summit tundra umbra valley"
+).split()
+
+SCALES = {
+    "small": {"categories": 20, "products": 2_000, "discounts": 20, "customers": 500,
+              "order_items": 10_000, "comments": 4_000, "carts": 200},
+    "medium": {"categories": 100, "products": 20_000, "discounts": 50, "customers": 5_000,
+               "order_items": 100_000, "comments": 40_000, "carts": 2_000},
+    "large": {"categories": 500, "products": 100_000, "discounts": 100, "customers": 20_000,
+              "order_items": 1_000_000, "comments": 200_000, "carts": 10_000},
+}
+
+
+class DatasetGenerator:
+    """
+    Seeded, bulk-inserted catalog, orders and comments for benchmarking.
+
+    Rows go in through ``bulk_create``, so no signals fire; the stats and
+    summary tables are rebuilt once at the end instead. Popularity is skewed
+    (a few products take most of the sales and comments), which is what makes
+    best-seller ordering and per-product aggregates realistic to measure.
+    """
+
+    def __init__(self, seed=0, batch_size=5000, log=None):
+        self.rng = random.Random(seed)
+        self.batch_size = batch_size
+        self.log = log or (lambda message: None)
+
+    def words(self, low, high):
+        return " ".join(self.rng.choice(WORDS) for _ in range(self.rng.randint(low, high)))
+
+    def popular(self, ids):
+        # Squaring a uniform sample skews picks toward the front of the list
+        return ids[int(len(ids) * self.rng.random() ** 2)]
+
+    def insert(self, model, rows):
+        ids, batch = [], []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= self.batch_size:
+                ids.extend(obj.pk for obj in model.objects.bulk_create(batch))
+                batch = []
+        if batch:
+            ids.extend(obj.pk for obj in model.objects.bulk_create(batch))
+        self.log(f"{model._meta.label}: {len(ids)}")
+        return ids
+
+    def insert_rows(self, model, rows):
+        count, batch = 0, []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= self.batch_size:
+                model.objects.bulk_create(batch)
+                count += len(batch)
+                batch = []
+        if batch:
+            model.objects.bulk_create(batch)
+            count += len(batch)
+        self.log(f"{model._meta.label}: {count}")
+        return count
+
+    def categories(self, count):
+        return (
+            Category(title=f"{self.words(1, 2).title()} {n}", description=self.words(5, 15))
+            for n in range(count)
+        )
+
+    def products(self, count, category_ids):
+        for n in range(count):
+            name = f"{self.words(2, 4).title()} {n}"
+            yield Product(
+                name=name,
+                slug=slugify(name),
+                category_id=self.rng.choice(category_ids),
+                description=self.words(20, 80),
+                unit_price=Decimal(self.rng.randint(100, 999_999)) / 100,
+                inventory=0 if self.rng.random() < 0.1 else self.rng.randint(1, 500),
+            )
+
+    def discounts(self, count):
+        return (
+            Discount(discount=float(self.rng.choice([5, 10, 15, 20, 25, 30, 40, 50])), description=self.words(2, 6))
+            for _ in range(count)
+        )
+
+    def product_discounts(self, product_ids, discount_ids):
+        through = Product.discounts.through
+        for product_id in product_ids:
+            if self.rng.random() < 0.2:
+                for discount_id in self.rng.sample(discount_ids, min(len(discount_ids), self.rng.randint(1, 2))):
+                    yield through(product_id=product_id, discount_id=discount_id)
+
+    def customers(self, count):
+        for n in range(count):
+            first, last = self.rng.choice(WORDS).title(), self.rng.choice(WORDS).title()
+            yield Customer(
+                first_name=first,
+                last_name=last,
+                email=f"{first}.{last}.{n}@example.com".lower(),
+                phone_number=f"+1555{n:07d}",
+            )
+
+    def orders(self, count, customer_ids):
+        statuses = [Order.ORDER_STATUS_PAID] * 6 + [Order.ORDER_STATUS_UNPAID] * 3 + [Order.ORDER_STATUS_CANCELED]
+        return (Order(customer_id=self.rng.choice(customer_ids), status=self.rng.choice(statuses)) for _ in range(count))
+
+    def order_items(self, count, order_ids, product_ids, prices):
+        produced = 0
+        for order_id in order_ids:
+            picked = set()
+            for _ in range(min(self.rng.randint(1, 7), count - produced)):
+                product_id = self.popular(product_ids)
+                if product_id in picked:
+                    continue
+                picked.add(product_id)
+                produced += 1
+                yield OrderItem(order_id=order_id, product_id=product_id, quantity=self.rng.randint(1, 5),
+                                unit_price=prices[product_id])
+            if produced >= count:
+                return
+
+    def comments(self, count, product_ids):
+        statuses = [Comment.COMMENT_STATUS_APPROVED] * 7 + [Comment.COMMENT_STATUS_WAITING] * 2 + [
+            Comment.COMMENT_STATUS_NOT_APPROVED]
+        for _ in range(count):
+            yield Comment(
+                product_id=self.popular(product_ids),
+                name=self.rng.choice(WORDS).title(),
+                body=self.words(8, 40),
+                status=self.rng.choice(statuses),
+            )
+
+    def cart_items(self, cart_ids, product_ids):
+        for cart_id in cart_ids:
+            for product_id in {self.popular(product_ids) for _ in range(self.rng.randint(1, 6))}:
+                yield CartItem(cart_id=cart_id, product_id=product_id, quantity=self.rng.randint(1, 4))
+
+    def generate(self, categories, products, discounts, customers, order_items, comments, carts):
+        with transaction.atomic():
+            category_ids = self.insert(Category, self.categories(categories))
+            product_ids = self.insert(Product, self.products(products, category_ids))
+            discount_ids = self.insert(Discount, self.discounts(discounts))
+            if discount_ids:
+                self.insert_rows(Product.discounts.through, self.product_discounts(product_ids, discount_ids))
+            customer_ids = self.insert(Customer, self.customers(customers))
+            if customer_ids and product_ids and order_items:
+                prices = dict(
+                    Product.objects.filter(pk__range=(product_ids[0], product_ids[-1])).values_list("pk", "unit_price")
+                )
+                # ~4 lines per order; orders left without lines are dropped below
+                order_ids = self.insert(Order, self.orders(order_items // 3 + 1, customer_ids))
+                self.insert_rows(OrderItem, self.order_items(order_items, order_ids, product_ids, prices))
+                Order.objects.filter(pk__range=(order_ids[0], order_ids[-1]), items__isnull=True).delete()
+            if product_ids:
+                self.insert_rows(Comment, self.comments(comments, product_ids))
+                cart_ids = self.insert(Cart, (Cart() for _ in range(carts)))
+                self.insert_rows(CartItem, self.cart_items(cart_ids, product_ids))
+        self.log("Rebuilding product prices, stats and category summaries")
+        rebuild_product_prices()
+        rebuild_product_stats()
+        rebuild_category_summaries()
+        if full_text_enabled():
+            self.log("Rebuilding search indexes")
+            install_search_indexes(rebuild=True)
@@ -0,0 +1,98 @@
+from functools import reduce
+from operator import and_
+
+from django.conf import settings
+from django.db.models import Count, Q
+
+from .filters import in_stock_condition
+
+# The query parameters each facet ignores when counting its own values, so
+# picking one category still shows how many products the others would have.
+FACET_PARAMS = {
+    "category": ("category",),
+    "price": ("price_min", "price_max"),
+    "in_stock": ("in_stock",),
+}
+
+
+def _config():
+    return {
+        "PRICE_BUCKETS": [10, 25, 50, 100],  # upper bounds of effective_price buckets
+        **getattr(settings, "STORE_FACETS", {}),
+    }
+
+
+def price_buckets(bounds=None):
+    bounds = sorted(bounds if bounds is not None else _config()["PRICE_BUCKETS"])
+    return list(zip([None, *bounds], [*bounds, None]))
+
+
+def _bucket_condition(low, high):
+    condition = Q()
+    if low is not None:
+        condition &= Q(effective_price__gte=low)
+    if high is not None:
+        condition &= Q(effective_price__lt=high)
+    return condition
+
+
+def _combine(conditions, exclude=()):
+    # None rather than an empty Q: Count(filter=None) counts every row
+    selected = [condition for name, condition in conditions.items() if name not in exclude]
+    return reduce(and_, selected) if selected else None
+
+
+def product_facets(queryset, conditions, buckets=None):
+    """
+    Category, price bucket and stock counts for ``queryset`` in one query.
+
+    ``conditions`` are the ProductFilter conditions ({name: Q}); they are not
+    applied to the queryset but moved into conditional counts, each facet's
+    count leaving out its own parameters. The single GROUP BY category then
+    yields every facet: category counts per row, the rest summed up here.
+    """
+    buckets = price_buckets(buckets)
+    aggregates = {
+        "matched": Count("pk", filter=_combine(conditions)),
+        "category_count": Count("pk", filter=_combine(conditions, FACET_PARAMS["category"])),
+    }
+    price_conditions = _combine(conditions, FACET_PARAMS["price"])
+    for position, (low, high) in enumerate(buckets):
+        condition = _bucket_condition(low, high)
+        if price_conditions is not None:
+            condition &= price_conditions
+        aggregates[f"price_{position}"] = Count("pk", filter=condition)
+    stock_conditions = _combine(conditions, FACET_PARAMS["in_stock"])
+    for value in (True, False):
+        condition = in_stock_condition(value)
+        if stock_conditions is not None:
+            condition &= stock_conditions
+        aggregates[f"stock_{value}"] = Count("pk", filter=condition)
+
+    rows = list(
+        queryset
+        .order_by()
+        .values("category_id", "category__title")
+        .annotate(**aggregates)
+    )
+    categories = sorted(
+        (row for row in rows if row["category_count"]),
+        key=lambda row: (-row["category_count"], row["category__title"]),
+    )
+    return {
+        "count": sum(row["matched"] for row in rows),
+        "facets": {
+            "category": [
+                {"id": row["category_id"], "title": row["category__title"], "count": row["category_count"]}
+                for row in categories
+            ],
+            "price": [
+                {"min": low, "max": high, "count": sum(row[f"price_{position}"] for row in rows)}
+                for position, (low, high) in enumerate(buckets)
+            ],
+            "in_stock": [
+                {"value": value, "count": sum(row[f"stock_{value}"] for row in rows)}
+                for value in (True, False)
+            ],
+        },
+    }
@@ -0,0 +1,191 @@
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.db.models import Case, F, Func, TextField, Value, When
+from django.db.models.functions import Coalesce, Concat, Length, Substr
+from django.db.models.lookups import LessThanOrEqual
+from rest_framework.response import Response
+
+from .pricing import CENT
+from .profiling import TimedSerializerMixin
+
+TAX_RATE = Decimal("0.10")
+
+
+def decimal_string(value):
+    # What DRF's DecimalField(decimal_places=2) renders with COERCE_DECIMAL_TO_STRING
+    if value is None:
+        return None
+    if not isinstance(value, Decimal):
+        value = Decimal(str(value).strip())
+    return f"{value.quantize(CENT):f}"
+
+
+SHORT_DESCRIPTION_LENGTH = 120
+WHITESPACE = " \t\n\r\f\v"
+
+
+def short_description(text):
+    if not text:
+        return ""
+    text = str(text).strip()
+    if len(text) <= SHORT_DESCRIPTION_LENGTH:
+        return text
+    return text[:SHORT_DESCRIPTION_LENGTH - 3].rstrip() + "..."
+
+
+def short_description_expression(field="description"):
+    # short_description() in SQL, so list queries never select the full text
+    text = Func(F(field), Value(WHITESPACE), function="TRIM", output_field=TextField())
+    cut = Func(
+        Substr(text, 1, SHORT_DESCRIPTION_LENGTH - 3), Value(WHITESPACE),
+        function="RTRIM", output_field=TextField(),
+    )
+    return Coalesce(
+        Case(
+            When(LessThanOrEqual(Length(text), SHORT_DESCRIPTION_LENGTH), then=text),
+            default=Concat(cut, Value("..."), output_field=TextField()),
+            output_field=TextField(),
+        ),
+        Value(""),
+        output_field=TextField(),
+    )
+
+
+def tax_column(unit_prices):
+    return [None if price is None else (price * TAX_RATE).quantize(CENT, rounding=ROUND_HALF_UP) for price in unit_prices]
+
+
+class RowSerializer:
+    values_fields = ()
+    field_sources = {}  # output field -> the columns it is computed from
+
+    def __init__(self, rows, fields=None):
+        self.rows = rows
+        self.fields = fields
+
+    @property
+    def data(self):
+        return self.to_representation(self.rows)
+
+    def to_representation(self, rows):
+        if self.fields is None:
+            return self.serialize(rows)
+        # Columns a trimmed query did not select come through as None
+        blank = dict.fromkeys(self.values_fields)
+        data = self.serialize([{**blank, **row} for row in rows])
+        return [{name: item[name] for name in self.fields} for item in data]
+
+    def serialize(self, rows):
+        raise NotImplementedError
+
+
+class FastSerializer(TimedSerializerMixin, RowSerializer):
+    """
+    Read-only serializer over ``.values()`` rows.
+
+    Produces the same data as the matching ModelSerializer without building
+    model instances or walking DRF fields; ``values_fields`` lists the columns
+    the queryset must select. Only used for list responses.
+    """
+
+
+class FastProductSerializer(FastSerializer):
+    field_sources = {
+        "id": ("id",),
+        "name": ("name",),
+        "description": ("description",),
+        "short_description": ("short_description",),
+        "unit_price": ("unit_price",),
+        "category": ("category_id",),
+        "category_title": ("category__title",),
+        "inventory": ("inventory",),
+        "is_in_stock": ("inventory",),
+        "slug": ("slug",),
+        "tax": ("unit_price",),
+        "best_discount_percent": ("best_discount_percent",),
+        "approved_comments_count": ("approved_comments_count",),
+        "total_sold": ("total_sold",),
+        "final_price": ("effective_price",),
+    }
+    values_fields = tuple(dict.fromkeys(column for columns in field_sources.values() for column in columns))
+
+    def serialize(self, rows):
+        taxes = tax_column([row["unit_price"] for row in rows])
+        return [
+            {
+                "id": row["id"],
+                "name": row["name"],
+                "description": row["description"],
+                "short_description": row["short_description"],
+                "unit_price": decimal_string(row["unit_price"]),
+                "category": row["category_id"],
+                "category_title": row["category__title"],
+                "inventory": row["inventory"],
+                "is_in_stock": (row["inventory"] or 0) > 0,
+                "slug": row["slug"],
+                "tax": tax,
+                "best_discount_percent": decimal_string(row["best_discount_percent"]),
+                "approved_comments_count": row["approved_comments_count"],
+                "total_sold": row["total_sold"],
+                "final_price": decimal_string(row["effective_price"]),
+            }
+            for row, tax in zip(rows, taxes)
+        ]
+
+
+class FastCategorySerializer(FastSerializer):
+    values_fields = (
+        "id", "title", "description", "product_count", "in_stock_count", "min_price", "max_price", "avg_price",
+        "cheapest_product_id", "priciest_product_id",
+    )
+
+    def serialize(self, rows):
+        data = []
+        for row in rows:
+            min_price, max_price = row["min_price"], row["max_price"]
+            data.append({
+                "id": row["id"],
+                "title": row["title"],
+                "description": row["description"],
+                "product_count": row["product_count"],
+                "in_stock_count": row["in_stock_count"],
+                "min_price": decimal_string(min_price),
+                "max_price": decimal_string(max_price),
+                "avg_price": decimal_string(row["avg_price"]),
+                "cheapest_product_id": row["cheapest_product_id"],
+                "priciest_product_id": row["priciest_product_id"],
+                "has_stock": (row["in_stock_count"] or 0) > 0,
+                "price_range": None if min_price is None or max_price is None else f"{min_price} – {max_price}",
+            })
+        return data
+
+
+class FastListMixin:
+    """
+    Serve ``list`` from ``.values()`` rows through ``fast_serializer_class``.
+
+    Filtering, ordering and keyset pagination run exactly as for the regular
+    path; only row materialization and serialization are swapped out.
+    """
+
+    fast_serializer_class = None
+
+    def list(self, request, *args, **kwargs):
+        if self.fast_serializer_class is None:
+            return super().list(request, *args, **kwargs)
+        queryset = self.filter_queryset(self.get_queryset()).prefetch_related(None)
+        fields = self.get_values_fields()
+        paginator = self.paginator
+        if paginator is None:
+            return Response(self.get_fast_serializer(list(queryset.values(*fields))).data)
+        page = paginator.get_page_queryset(queryset, request, view=self)
+        # The cursor needs the sort columns of the last row too
+        sort_columns = [name for name, _ in paginator.ordering if name != paginator.tie_breaker]
+        rows = paginator.paginate_rows(list(page.values(*dict.fromkeys([*fields, *sort_columns]))))
+        return paginator.get_paginated_response(self.get_fast_serializer(rows).data)
+
+    def get_values_fields(self):
+        return self.fast_serializer_class.values_fields
+
+    def get_fast_serializer(self, rows):
+        return self.fast_serializer_class(rows)
@@ -0,0 +1,87 @@
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import OrderingFilter
+
+
+def requested_fields(request, available, param="fields"):
+    # ?fields=a,b -> the requested names in ``available`` order; None if absent
+    raw = request.query_params.get(param, "")
+    names = {name.strip() for name in raw.split(",") if name.strip()}
+    if not names:
+        return None
+    unknown = sorted(names.difference(available))
+    if unknown:
+        raise ValidationError({param: [f"Unknown field: {name}" for name in unknown]})
+    return [name for name in available if name in names]
+
+
+def sources_for(field_sources, fields):
+    return tuple(dict.fromkeys(source for name in fields for source in field_sources[name]))
+
+
+class SparseFieldsSerializerMixin:
+    # Serializer(..., fields=[...]) keeps only those fields
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields).difference(fields):
+                self.fields.pop(name)
+
+
+class SparseFieldsetMixin:
+    """
+    Let ``?fields=a,b`` trim list and detail responses and the query behind them.
+
+    ``field_sources`` says which columns, relations and annotations each
+    serializer field reads; ``get_required_sources()`` collects those
+    for the requested fields plus the active ordering, so ``get_queryset()``
+    can leave out whatever nobody reads. Without the parameter every field is
+    returned, except the ``deferred_fields`` of the current action.
+    """
+
+    field_sources = {}
+    deferred_fields = {}  # action -> fields left out unless ?fields= names them
+    fields_query_param = "fields"
+    sparse_actions = ("list", "retrieve")
+
+    def get_sparse_fields(self):
+        if not hasattr(self, "_sparse_fields"):
+            self._sparse_fields = None
+            if self.request is not None and self.action in self.sparse_actions:
+                available = list(self.field_sources)
+                fields = requested_fields(self.request, available, self.fields_query_param)
+                if fields is None and self.action in self.deferred_fields:
+                    deferred = self.deferred_fields[self.action]
+                    fields = [name for name in available if name not in deferred]
+                self._sparse_fields = fields
+        return self._sparse_fields
+
+    def get_required_sources(self, queryset):
+        # None when every field is wanted
+        fields = self.get_sparse_fields()
+        if fields is None:
+            return None
+        sources = {queryset.model._meta.pk.attname}
+        sources.update(sources_for(self.field_sources, fields))
+        for backend in self.filter_backends:
+            # Only a list is ordered; a detail lookup must not join for it
+            if self.action == "list" and issubclass(backend, OrderingFilter):
+                ordering = backend().get_ordering(self.request, queryset, self) or ()
+                sources.update(term.lstrip("-") for term in ordering)
+        return sources
+
+    def get_serializer(self, *args, **kwargs):
+        fields = self.get_sparse_fields()
+        if fields is not None:
+            kwargs.setdefault("fields", fields)
+        return super().get_serializer(*args, **kwargs)
+
+    def get_values_fields(self):
+        fields = self.get_sparse_fields()
+        if fields is None:
+            return super().get_values_fields()
+        # The primary key stays selected for the keyset cursor
+        return tuple(dict.fromkeys(["id", *sources_for(self.field_sources, fields)]))
+
+    def get_fast_serializer(self, rows):
+        return self.fast_serializer_class(rows, fields=self.get_sparse_fields())
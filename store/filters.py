@@ -1,20 +1,42 @@
 import django_filters as filters
+from django.db.models import Q
+from django_filters.constants import EMPTY_VALUES
+
 from .models import Product
 
 
+def in_stock_condition(value):
+    return Q(inventory__gt=0) if value else Q(inventory__lte=0)
+
+
 class ProductFilter(filters.FilterSet):
-    price_min = filters.NumberFilter(field_name="unit_price", lookup_expr="gte")
-    price_max = filters.NumberFilter(field_name="unit_price", lookup_expr="lte")
+    # What the customer pays, after discounts
+    price_min = filters.NumberFilter(field_name="effective_price", lookup_expr="gte")
+    price_max = filters.NumberFilter(field_name="effective_price", lookup_expr="lte")
+    list_price_min = filters.NumberFilter(field_name="unit_price", lookup_expr="gte")
+    list_price_max = filters.NumberFilter(field_name="unit_price", lookup_expr="lte")
     in_stock = filters.BooleanFilter(method="filter_in_stock")
     category = filters.NumberFilter(field_name="category_id")
 
     def filter_in_stock(self, queryset, name, value):
-        if value is True:
-            return queryset.filter(inventory__gt=0)
-        if value is False:
-            return queryset.filter(inventory__lte=0)
-        return queryset
+        if value is None:
+            return queryset
+        return queryset.filter(in_stock_condition(value))
+
+    def conditions(self):
+        # {filter name: Q} for every filter set in the (validated) query
+        # string, so callers can combine them without applying all of them
+        conditions = {}
+        for name, value in self.form.cleaned_data.items():
+            if value in EMPTY_VALUES:
+                continue
+            if name == "in_stock":
+                conditions[name] = in_stock_condition(value)
+            else:
+                field = self.filters[name]
+                conditions[name] = Q(**{f"{field.field_name}__{field.lookup_expr}": value})
+        return conditions
 
     class Meta:
         model = Product
-        fields = ["price_min", "price_max", "in_stock", "category"]
\ No newline at end of file
+        fields = ["price_min", "price_max", "list_price_min", "list_price_max", "in_stock", "category"]
@@ -0,0 +1,292 @@
+import re
+from collections import defaultdict
+
+from django.apps import apps
+from django.db import connection, models, transaction
+from django.db.backends.utils import names_digest
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from .urls import router
+
+# Query strings that stand in for the traffic each list route sees
+REPRESENTATIVE_QUERIES = {
+    "category": ["", "ordering=min_price", "ordering=-avg_price"],
+    "product": [
+        "", "ordering=unit_price", "ordering=-unit_price", "ordering=approved_comments_count",
+        "ordering=-best_discount_percent", "in_stock=true", "in_stock=true&ordering=unit_price",
+        "ordering=effective_price", "category=1", "category=1&ordering=-total_sold",
+        "price_min=5&price_max=50", "category=1&price_max=50&ordering=effective_price", "search=book",
+    ],
+    "discount": ["", "ordering=-discount", "search=sale"],
+    "comment": ["", "ordering=datetime_created", "search=good"],
+    "cart": [""],
+}
+
+SCAN = re.compile(r"^SCAN (\w+)$")
+TEMP_BTREE = re.compile(r"^USE TEMP B-TREE FOR (?:RIGHT PART OF )?(ORDER BY)?")
+NESTED = re.compile(r"SUBQUERY|CO-ROUTINE|MATERIALIZE|COMPOUND")
+ALIAS = re.compile(r'"(\w+)" (?:AS )?"?([A-Z]\d+)"?\b')
+COLUMN = re.compile(r'^"?(\w+)"?\."(\w+)"')
+PREDICATE = re.compile(
+    r'"?(\w+)"?\."(\w+)"\s*(=|IN\b|IS\b|<=|>=|<|>|BETWEEN\b|LIKE\b)\s*(\'[^\']*\'|-?[\d.]+|\w+)?',
+    re.IGNORECASE,
+)
+
+
+def explain(sql):
+    with connection.cursor() as cursor:
+        cursor.execute("EXPLAIN QUERY PLAN " + sql)
+        return [(node, parent, detail) for node, parent, _, detail in cursor.fetchall()]
+
+
+def capture_route_queries(basename, query):
+    # Run the real list request so filtering, pagination and serializer
+    # queries are all included; the response cache would hide them.
+    prefix = {name: prefix for prefix, _, name in router.registry}[basename]
+    with override_settings(ALLOWED_HOSTS=["*"], STORE_RESPONSE_CACHE={"ENABLED": False}):
+        with CaptureQueriesContext(connection) as captured:
+            response = Client().get(f"/api/{prefix}/" + (f"?{query}" if query else ""))
+    selects = [q["sql"] for q in captured.captured_queries if q["sql"].lstrip().upper().startswith("SELECT")]
+    return response.status_code, list(dict.fromkeys(selects))
+
+
+def _split_top_level(text, separator=","):
+    # Split on separators outside parentheses and quotes
+    parts, depth, quote, start = [], 0, None, 0
+    for position, char in enumerate(text):
+        if quote:
+            quote = None if char == quote else quote
+        elif char in "'\"":
+            quote = char
+        elif char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+        elif depth == 0 and text.startswith(separator, position):
+            parts.append(text[start:position].strip())
+            start = position + len(separator)
+    parts.append(text[start:].strip())
+    return parts
+
+
+def _top_level_clause(sql, keyword, end_keywords):
+    # The text after the outer query's ``keyword``, up to the next clause
+    parts = _split_top_level(sql, f" {keyword} ")
+    if len(parts) < 2:
+        return ""
+    clause = parts[-1]
+    for end in end_keywords:
+        clause = _split_top_level(clause, f" {end} ")[0]
+    return clause
+
+
+def order_columns(sql):
+    # [(table or alias, column, descending)] of the outer ORDER BY; Django
+    # refers to selected expressions by position in values() querysets.
+    select = sql.split("SELECT ", 1)[1].removeprefix("DISTINCT ")
+    selected = _split_top_level(_split_top_level(select, " FROM ")[0])
+    columns = []
+    for term in _split_top_level(_top_level_clause(sql, "ORDER BY", ["LIMIT", "OFFSET"])):
+        if not term:
+            continue
+        expression = term.split(" ", 1)[0]
+        if expression.isdigit() and int(expression) <= len(selected):
+            expression = selected[int(expression) - 1]
+        match = COLUMN.match(expression)
+        if match:
+            columns.append((match.group(1), match.group(2), " DESC" in term.upper()))
+    return columns
+
+
+class PlanIssue:
+    def __init__(self, kind, table, detail):
+        self.kind = kind
+        self.table = table
+        self.detail = detail
+
+    def __str__(self):
+        return self.detail
+
+
+def plan_issues(sql, plan):
+    aliases = {alias: table for table, alias in ALIAS.findall(sql)}
+    details = {node: (parent, detail) for node, parent, detail in plan}
+
+    def nested(parent):
+        while parent:
+            parent, detail = details.get(parent, (0, ""))
+            if NESTED.search(detail):
+                return True
+        return False
+
+    issues = []
+    for node, parent, detail in plan:
+        scan, sort = SCAN.match(detail), TEMP_BTREE.match(detail)
+        if scan:
+            table = aliases.get(scan.group(1), scan.group(1))
+            if _model_for_table(table) is not None:
+                issues.append(PlanIssue("scan", table, detail))
+        elif sort and nested(parent):
+            # Sorting inside a subquery; the outer ORDER BY says nothing about it
+            issues.append(PlanIssue("temp-btree", None, f"{detail} (subquery)"))
+        elif sort and sort.group(1):
+            columns = order_columns(sql)
+            table = aliases.get(columns[0][0], columns[0][0]) if columns else None
+            issues.append(PlanIssue("temp-btree", table, detail))
+        elif sort:
+            # GROUP BY / DISTINCT sorts are reported without a proposal
+            issues.append(PlanIssue("temp-btree", None, detail))
+    return issues
+
+
+def _model_for_table(table):
+    # Unmanaged models (the FTS5 search tables) cannot take indexes
+    for model in apps.get_models():
+        if model._meta.db_table == table and model._meta.managed:
+            return model
+    return None
+
+
+def _field_for_column(model, column):
+    for field in model._meta.concrete_fields:
+        if field.column == column:
+            return field
+    return None
+
+
+def _literal(token):
+    if token is None:
+        return None
+    if token.startswith("'") and token.endswith("'"):
+        return token[1:-1]
+    try:
+        return int(token)
+    except ValueError:
+        return None
+
+
+def _existing_prefixes(model):
+    prefixes = [list(index.fields) for index in model._meta.indexes if index.condition is None]
+    for field in model._meta.concrete_fields:
+        if field.primary_key or field.unique or field.db_index:
+            prefixes.append([field.name])
+    for unique in model._meta.unique_together:
+        prefixes.append(list(unique))
+    return prefixes
+
+
+def propose_index(sql, issue):
+    """
+    Derive one index for ``issue`` from the query's own predicates.
+
+    Equality columns go first, then one range column, then the ORDER BY
+    columns of the same table, so SQLite can both seek and return rows in
+    order. An equality against a constant on a ``choices`` column (a status)
+    becomes the condition of a partial index instead of its leading column.
+    Returns None if nothing useful can be built or an existing index already
+    starts with the same columns.
+    """
+    model = _model_for_table(issue.table) if issue.table else None
+    if model is None:
+        return None
+    names = {issue.table} | {alias for table, alias in ALIAS.findall(sql) if table == issue.table}
+    equality, ranges, condition = [], [], {}
+    for table, column, operator, value in PREDICATE.findall(sql):
+        field = _field_for_column(model, column)
+        operator = operator.upper()
+        if table not in names or field is None or field.primary_key:
+            continue
+        if operator == "IS" and value.upper() == "NOT":
+            continue
+        if operator == "=" and field.choices and _literal(value) is not None:
+            condition[field.name] = _literal(value)
+        elif operator in ("=", "IN", "IS"):
+            equality.append(field.name)
+        else:
+            ranges.append(field.name)
+
+    fields = list(dict.fromkeys(equality + ranges[:1]))
+    for table, column, descending in order_columns(sql):
+        field = _field_for_column(model, column)
+        if table in names and field is not None and field.name not in fields:
+            fields.append(("-" if descending else "") + field.name)
+    plain = [name.lstrip("-") for name in fields]
+    if not plain or plain == [model._meta.pk.name]:
+        return None
+    if not condition and any(prefix[:len(plain)] == plain for prefix in _existing_prefixes(model)):
+        return None
+    # Named like Index.set_name_with_model(), but with the condition hashed in
+    # so a partial index never collides with a plain one on the same columns
+    digest = names_digest(model._meta.db_table, *fields, repr(condition), length=6)
+    name = f"{model._meta.db_table[:11]}_{plain[0][:7]}_{digest}_idx"
+    return model, models.Index(fields=fields, condition=models.Q(**condition) if condition else None, name=name)
+
+
+def try_index(model, index, sql):
+    # Create the index inside a transaction that is always rolled back and
+    # re-plan the query: only indexes SQLite would actually use are kept.
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(str(index.create_sql(model, connection.schema_editor())))
+        plan = explain(sql)
+        transaction.set_rollback(True)
+    return any(index.name in detail for _, _, detail in plan)
+
+
+class Advisor:
+    """
+    Runs the representative list requests and collects plan problems.
+
+    Scans of tables smaller than ``min_rows`` are reported but get no
+    proposal: SQLite reads those faster than it would an index.
+    """
+
+    def __init__(self, queries=None, min_rows=1000):
+        self.queries = queries or REPRESENTATIVE_QUERIES
+        self.min_rows = min_rows
+        self.findings = []
+        self.proposals = {}
+        self._row_counts = {}
+
+    def rows(self, table):
+        if table not in self._row_counts:
+            with connection.cursor() as cursor:
+                cursor.execute(f'SELECT COUNT(*) FROM "{table}"')
+                self._row_counts[table] = cursor.fetchone()[0]
+        return self._row_counts[table]
+
+    def run(self):
+        for basename, queries in self.queries.items():
+            for query in queries:
+                status, statements = capture_route_queries(basename, query)
+                for sql in statements:
+                    issues = plan_issues(sql, explain(sql))
+                    if issues:
+                        self.findings.append((basename, query, status, sql, issues))
+                        self.consider(sql, issues)
+        return self
+
+    def consider(self, sql, issues):
+        for issue in issues:
+            if issue.table is None or self.rows(issue.table) < self.min_rows:
+                continue
+            proposal = propose_index(sql, issue)
+            if proposal is None:
+                continue
+            model, index = proposal
+            key = (model._meta.label, index.name)
+            if key in self.proposals:
+                self.proposals[key]["queries"] += 1
+                continue
+            used = try_index(model, index, sql)
+            self.proposals[key] = {"model": model, "index": index, "used": used, "queries": 1}
+
+    def accepted(self):
+        return [proposal for proposal in self.proposals.values() if proposal["used"]]
+
+    def by_app(self):
+        grouped = defaultdict(list)
+        for proposal in self.accepted():
+            grouped[proposal["model"]._meta.app_label].append(proposal)
+        return grouped
@@ -0,0 +1,85 @@
+from pathlib import Path
+
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, migrations
+from django.db.migrations.loader import MigrationLoader
+from django.db.migrations.writer import MigrationWriter
+
+from store.indexing import REPRESENTATIVE_QUERIES, Advisor
+
+
+class Command(BaseCommand):
+    help = (
+        "EXPLAIN QUERY PLAN every list route for a set of representative query strings, "
+        "report full scans and temp B-trees and propose indexes (optionally as a migration)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--query", action="append", default=[], metavar="ROUTE[?QUERY]",
+            help="Analyse these requests instead of the built-in set, e.g. product?ordering=-unit_price.",
+        )
+        parser.add_argument("--min-rows", type=int, default=1000, help="Ignore scans of smaller tables.")
+        parser.add_argument("--write", action="store_true", help="Write the proposed indexes as migrations.")
+        parser.add_argument("--name", default="advised_indexes", help="Migration name suffix.")
+
+    def handle(self, *args, **options):
+        if connection.vendor != "sqlite":
+            raise CommandError("advise_indexes reads SQLite's EXPLAIN QUERY PLAN output")
+        queries = REPRESENTATIVE_QUERIES
+        if options["query"]:
+            queries = {}
+            for spec in options["query"]:
+                route, _, query = spec.partition("?")
+                if route not in REPRESENTATIVE_QUERIES:
+                    raise CommandError(f"Unknown route {route!r}; expected one of {', '.join(REPRESENTATIVE_QUERIES)}")
+                queries.setdefault(route, []).append(query)
+
+        advisor = Advisor(queries, min_rows=options["min_rows"]).run()
+
+        for route, query, status, sql, issues in advisor.findings:
+            self.stdout.write(f"{route}?{query} [{status}]: " + "; ".join(map(str, issues)))
+            if options["verbosity"] > 1:
+                self.stdout.write(f"    {sql}")
+        if not advisor.findings:
+            self.stdout.write(self.style.SUCCESS("No full scans or temp B-trees."))
+
+        for proposal in advisor.proposals.values():
+            model, index = proposal["model"], proposal["index"]
+            verdict = self.style.SUCCESS("used") if proposal["used"] else self.style.WARNING("not used by SQLite")
+            self.stdout.write(f"{model._meta.label}: {self.describe(index)} ({proposal['queries']} queries, {verdict})")
+
+        grouped = advisor.by_app()
+        if not grouped:
+            return
+        self.stdout.write("\nAdd to the models' Meta.indexes:")
+        for proposals in grouped.values():
+            for proposal in proposals:
+                self.stdout.write(f"    {proposal['model'].__name__}: {self.describe(proposal['index'])},")
+        if options["write"]:
+            for app_label, proposals in grouped.items():
+                path = self.write_migration(app_label, proposals, options["name"])
+                self.stdout.write(self.style.SUCCESS(f"Wrote {path}"))
+
+    @staticmethod
+    def describe(index):
+        text = f"models.Index(fields={list(index.fields)!r}, name={index.name!r}"
+        if index.condition is not None:
+            lookups = ", ".join(f"{key}={value!r}" for key, value in index.condition.children)
+            text += f", condition=models.Q({lookups})"
+        return text + ")"
+
+    def write_migration(self, app_label, proposals, name):
+        leaves = MigrationLoader(connection, ignore_no_migrations=True).graph.leaf_nodes(app_label)
+        number = max((int(leaf[1].split("_", 1)[0]) for leaf in leaves), default=0) + 1
+        migration = type("Migration", (migrations.Migration,), {
+            "dependencies": leaves,
+            "operations": [
+                migrations.AddIndex(model_name=p["model"]._meta.model_name, index=p["index"]) for p in proposals
+            ],
+        })(f"{number:04d}_{name}", app_label)
+        writer = MigrationWriter(migration)
+        path = Path(apps.get_app_config(app_label).path) / "migrations" / f"{migration.name}.py"
+        path.write_text(writer.as_string())
+        return path
@@ -0,0 +1,78 @@
+import asyncio
+import json
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.test import AsyncClient, override_settings
+
+from store.benchmarks import percentile
+
+ROUTES = [
+    ("products", "/api/products/", "/api/async/products/"),
+    ("categories", "/api/categories/", "/api/async/categories/"),
+    ("discounts", "/api/discounts/", "/api/async/discounts/"),
+]
+
+
+class Command(BaseCommand):
+    help = "Compare sync DRF catalog routes with their async ORM variants under concurrent load (in-process ASGI)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=200, help="Requests per route and mode.")
+        parser.add_argument("--concurrency", type=int, default=32)
+        parser.add_argument("--query", default="", help="Query string appended to every route, e.g. 'page_size=50'.")
+        parser.add_argument("--output", help="Write the results as JSON to this file.")
+
+    def handle(self, *args, **options):
+        # The response cache would turn the sync side into a cache benchmark
+        with override_settings(ALLOWED_HOSTS=["*"], STORE_RESPONSE_CACHE={"ENABLED": False}):
+            results = asyncio.run(self.run_all(options))
+        for row in results:
+            self.stdout.write(
+                f"{row['route']:<11} {row['mode']:<5} {row['throughput_rps']:>8.1f} req/s  "
+                f"p50 {row['p50_ms']:>7.1f} ms  p95 {row['p95_ms']:>7.1f} ms  errors {row['errors']}"
+            )
+        if options["output"]:
+            with open(options["output"], "w") as fh:
+                json.dump(results, fh, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Wrote {options['output']}"))
+
+    async def run_all(self, options):
+        results = []
+        suffix = f"?{options['query']}" if options["query"] else ""
+        for name, sync_url, async_url in ROUTES:
+            for mode, url in (("sync", sync_url), ("async", async_url)):
+                results.append(await self.run(name, mode, url + suffix, options["requests"], options["concurrency"]))
+        return results
+
+    async def run(self, route, mode, url, total, concurrency):
+        client = AsyncClient()
+        semaphore = asyncio.Semaphore(concurrency)
+        latencies, errors = [], 0
+
+        async def one():
+            nonlocal errors
+            async with semaphore:
+                started = time.perf_counter()
+                response = await client.get(url)
+                latencies.append((time.perf_counter() - started) * 1000)
+                if response.status_code != 200:
+                    errors += 1
+
+        await client.get(url)  # warm-up
+        started = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(total)))
+        elapsed = time.perf_counter() - started
+        return {
+            "route": route,
+            "mode": mode,
+            "url": url,
+            "requests": total,
+            "concurrency": concurrency,
+            "throughput_rps": total / elapsed,
+            "p50_ms": statistics.median(latencies),
+            "p95_ms": percentile(latencies, 95),
+            "p99_ms": percentile(latencies, 99),
+            "errors": errors,
+        }
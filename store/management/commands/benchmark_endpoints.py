@@ -0,0 +1,191 @@
+import json
+import platform
+from datetime import datetime, timezone
+
+import django
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client, override_settings
+
+from core.audit import get_buffer
+from store.benchmarks import git_revision, load_results, measure
+from store.models import (
+    Cart, CartItem, Category, Comment, Customer, Discount, Order, OrderItem, Product,
+)
+from store.moderation import moderate_comments
+
+BENCHMARK_USERNAME = "benchmark-admin"
+
+# Bulk moderation route -> the status its comments are reset to before each call
+BULK_MODERATION_RESET = {
+    "comments-bulk-approve": Comment.COMMENT_STATUS_WAITING,
+    "comments-bulk-reject": Comment.COMMENT_STATUS_APPROVED,
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure latency percentiles and SQL query counts for every store route "
+        "and write the results as JSON so runs can be compared across commits."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=50)
+        parser.add_argument("--warmup", type=int, default=2)
+        parser.add_argument("--output", default="benchmark-results.json")
+        parser.add_argument("--compare", help="Print the change against a previous results file.")
+        parser.add_argument("--only", nargs="*", default=(), help="Route names (or prefixes) to run.")
+        parser.add_argument("--with-cache", action="store_true", help="Leave the response cache on.")
+        parser.add_argument(
+            "--writes", action="store_true",
+            help="Also run routes that create or change rows (carts, comments, checkout orders, moderation).",
+        )
+
+    def handle(self, *args, **options):
+        product = Product.objects.filter(stats__isnull=False).order_by("-stats__total_sold", "pk").first()
+        customer = Customer.objects.order_by("pk").first()
+        if product is None or customer is None:
+            raise CommandError("No products or customers to benchmark against; run generate_dataset first.")
+        cache_settings = {} if options["with_cache"] else {"STORE_RESPONSE_CACHE": {"ENABLED": False}}
+        with override_settings(DEBUG=False, ALLOWED_HOSTS=["*"], **cache_settings):
+            cart = Cart.objects.create()
+            CartItem.objects.create(cart=cart, product=product, quantity=1)
+            admin = get_user_model().objects.create_user(BENCHMARK_USERNAME, is_staff=True)
+            try:
+                routes = self.build_routes(product, customer, cart, admin, options["writes"])
+                results = self.run_routes(routes, options)
+            finally:
+                cart.delete()
+                # Write the staff routes' audit entries while their actor exists
+                get_buffer().flush()
+                admin.delete()
+
+        report = {
+            "revision": git_revision(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "django": django.get_version(),
+            "iterations": options["iterations"],
+            "response_cache": options["with_cache"],
+            "dataset": {
+                model._meta.label: model.objects.count()
+                for model in (Category, Product, Discount, Customer, Order, OrderItem, Comment, Cart)
+            },
+            "routes": results,
+        }
+        with open(options["output"], "w") as fh:
+            json.dump(report, fh, indent=2)
+        self.report(results, load_results(options["compare"]) if options["compare"] else {})
+        self.stdout.write(self.style.SUCCESS(f"Wrote {options['output']}"))
+
+    def build_routes(self, product, customer, cart, admin, writes):
+        anonymous, staff = Client(), Client()
+        staff.force_login(admin)
+
+        def get(name, path, client=anonymous):
+            return (name, "get", path, None, client)
+
+        def post(name, path, payload, client=anonymous):
+            return (name, "post", path, payload, client)
+
+        category_id = product.category_id
+        discount = Discount.objects.order_by("pk").first()
+        comment = Comment.objects.order_by("pk").first()
+        word = product.name.split()[0]
+        cart_path = f"/api/carts/{cart.pk}/"
+        routes = [
+            get("categories-list", "/api/categories/"),
+            get("categories-detail", f"/api/categories/{category_id}/"),
+            get("products-list", "/api/products/"),
+            get("products-list-page-100", "/api/products/?page_size=100"),
+            get("products-list-filtered", f"/api/products/?category={category_id}&in_stock=true&ordering=unit_price"),
+            get("products-list-price-range", "/api/products/?price_min=10&price_max=50&ordering=-unit_price"),
+            get("products-list-final-price", f"/api/products/?category={category_id}&ordering=effective_price"),
+            get("products-list-fields", "/api/products/?fields=id,name,unit_price&page_size=100"),
+            get("products-search", f"/api/products/?search={word}"),
+            get("products-facets", "/api/products/facets/"),
+            get("products-facets-filtered", f"/api/products/facets/?category={category_id}&price_max=50&search={word}"),
+            get("products-detail", f"/api/products/{product.pk}/"),
+            get("discounts-list", "/api/discounts/"),
+            get("comments-list", "/api/comments/"),
+            get("comments-search", f"/api/comments/?search={word}"),
+            get("carts-list", "/api/carts/"),
+            get("carts-detail", cart_path),
+            post("carts-add-item", f"{cart_path}add_item/", {"product_id": product.pk, "quantity": 1}),
+            post("carts-bulk-items", f"{cart_path}bulk_items/",
+                 {"items": [{"op": "set", "product_id": product.pk, "quantity": 1}]}),
+            get("cache-stats", "/api/cache/stats/", client=staff),
+            get("async-products-list", "/api/async/products/"),
+            get("async-products-detail", f"/api/async/products/{product.pk}/"),
+            get("async-categories-list", "/api/async/categories/"),
+            get("async-discounts-list", "/api/async/discounts/"),
+        ]
+        if discount is not None:
+            routes.append(get("discounts-detail", f"/api/discounts/{discount.pk}/"))
+        if comment is not None:
+            routes.append(get("comments-detail", f"/api/comments/{comment.pk}/"))
+        if writes:
+            routes += [
+                post("carts-create", "/api/carts/", {}),
+                post("comments-create", "/api/comments/",
+                     {"product": product.pk, "name": "Benchmark", "body": "Benchmark comment"}),
+                post("carts-checkout", f"{cart_path}checkout/", {"customer_id": customer.pk}),
+            ]
+            if comment is not None:
+                moderated = {"product": comment.product_id}
+                routes += [
+                    post("comments-approve", f"/api/comments/{comment.pk}/approve/", {}, client=staff),
+                    post("comments-reject", f"/api/comments/{comment.pk}/reject/", {}, client=staff),
+                    post("comments-bulk-approve", "/api/comments/bulk-approve/", moderated, client=staff),
+                    post("comments-bulk-reject", "/api/comments/bulk-reject/", moderated, client=staff),
+                ]
+        return routes
+
+    def run_routes(self, routes, options):
+        results = []
+        for name, method, path, payload, client in routes:
+            if options["only"] and not any(name.startswith(prefix) for prefix in options["only"]):
+                continue
+            if method == "get":
+                call = lambda client=client, path=path: client.get(path)
+            else:
+                call = lambda client=client, path=path, payload=payload: client.post(
+                    path, payload, content_type="application/json",
+                )
+            setup = None
+            if name == "carts-checkout":
+                # Each checkout empties the cart; put a line back before the next one
+                cart_id = path.split("/")[3]
+                product_id = CartItem.objects.filter(cart_id=cart_id).values_list("product_id", flat=True).first()
+
+                def setup(cart_id=cart_id, product_id=product_id):
+                    CartItem.objects.get_or_create(cart_id=cart_id, product_id=product_id, defaults={"quantity": 1})
+
+            elif name in BULK_MODERATION_RESET:
+                # Comments already in the target status are skipped; move them
+                # back first so every timed call really moderates them
+                def setup(product_id=payload["product"], status=BULK_MODERATION_RESET[name]):
+                    moderate_comments(Comment.objects.filter(product_id=product_id), status)
+
+            self.stdout.write(f"  {name} ...", ending="")
+            self.stdout.flush()
+            result = measure(call, options["iterations"], warmup=options["warmup"], setup=setup)
+            results.append({"name": name, "method": method.upper(), "path": path, **result})
+            self.stdout.write(f" p50 {result['p50_ms']:.1f} ms")
+        return results
+
+    def report(self, results, baseline):
+        self.stdout.write("")
+        self.stdout.write(f"{'route':<28} {'p50':>9} {'p90':>9} {'p99':>9} {'queries':>8}")
+        for row in results:
+            line = (
+                f"{row['name']:<28} {row['p50_ms']:>7.1f}ms {row['p90_ms']:>7.1f}ms "
+                f"{row['p99_ms']:>7.1f}ms {row['queries']:>8}"
+            )
+            previous = baseline.get(row["name"])
+            if previous:
+                change = (row["p50_ms"] - previous["p50_ms"]) / previous["p50_ms"] * 100 if previous["p50_ms"] else 0
+                line += f"   p50 {change:+.1f}%  queries {row['queries'] - previous['queries']:+d}"
+            if row["errors"]:
+                line += f"   status {row['errors']}"
+            self.stdout.write(line)
@@ -0,0 +1,74 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from store.benchmarks import git_revision, summarize
+from store.views import CategoryViewSet, ProductViewSet
+
+
+class Command(BaseCommand):
+    help = "Compare ModelSerializer and fast .values() serialization throughput on large product and category lists."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, nargs="+", default=[1000, 5000, 10000])
+        parser.add_argument("--iterations", type=int, default=5)
+        parser.add_argument("--output", help="Write the results as JSON to this file.")
+
+    def handle(self, *args, **options):
+        # Views read query_params (?fields=), so they need a DRF request
+        request = Request(APIRequestFactory().get("/"))
+        results = []
+        for viewset_class in (ProductViewSet, CategoryViewSet):
+            view = viewset_class(action="list", request=request, format_kwarg=None)
+            queryset = view.get_queryset().order_by("pk")
+            available = queryset.count()
+            if not available:
+                raise CommandError(f"No rows for {viewset_class.__name__}; run generate_dataset first.")
+            for rows in sorted({min(n, available) for n in options["rows"]}):
+                results.append(self.compare(view, queryset, rows, options["iterations"]))
+
+        for row in results:
+            self.stdout.write(
+                f"{row['viewset']:<16} {row['rows']:>6} rows  "
+                f"model {row['model']['p50_ms']:>9.1f} ms  fast {row['fast']['p50_ms']:>8.1f} ms  "
+                f"{row['speedup']:>5.1f}x  ({row['fast_rows_per_second']:,.0f} rows/s)"
+            )
+        if options["output"]:
+            with open(options["output"], "w") as fh:
+                json.dump({"revision": git_revision(), "results": results}, fh, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Wrote {options['output']}"))
+
+    def compare(self, view, queryset, rows, iterations):
+        renderer = JSONRenderer()
+        viewset = type(view).__name__
+
+        # Both paths fetch, serialize and render the same rows, with the
+        # fields the list route returns
+        def model_path():
+            return renderer.render(view.get_serializer(list(queryset[:rows]), many=True).data)
+
+        def fast_path():
+            values = queryset.prefetch_related(None).values(*view.get_values_fields())
+            return renderer.render(view.get_fast_serializer(list(values[:rows])).data)
+
+        if model_path() != fast_path():
+            raise CommandError(f"{viewset}: fast and model output differ")
+        timings = {}
+        for name, call in (("model", model_path), ("fast", fast_path)):
+            samples = []
+            for _ in range(iterations):
+                started = time.perf_counter()
+                call()
+                samples.append((time.perf_counter() - started) * 1000)
+            timings[name] = summarize(samples)
+        return {
+            "viewset": viewset,
+            "rows": rows,
+            **timings,
+            "speedup": round(timings["model"]["p50_ms"] / timings["fast"]["p50_ms"], 2),
+            "fast_rows_per_second": round(rows / timings["fast"]["p50_ms"] * 1000),
+        }
@@ -0,0 +1,97 @@
+import multiprocessing
+import sqlite3
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from store.benchmarks import init_contention_worker, run_contention_worker, summarize
+from store.models import Product
+
+MODES = {
+    # Rollback journal, deferred transactions, no retries: the stock setup
+    "default": {"options": {}, "journal_mode": "DELETE", "retry": False},
+    "production": {"options": settings.SQLITE_PRODUCTION_OPTIONS, "journal_mode": "WAL", "retry": True},
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Run cart writes and reads from several processes against a scratch copy of the "
+        "database, once per SQLite mode, and compare throughput, latency and lock errors."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--processes", type=int, default=8)
+        parser.add_argument("--operations", type=int, default=200, help="Operations per process.")
+        parser.add_argument("--products", type=int, default=50, help="Distinct products the carts draw from.")
+        parser.add_argument("--modes", nargs="*", default=list(MODES), choices=list(MODES))
+
+    def handle(self, *args, **options):
+        if connection.vendor != "sqlite":
+            raise CommandError("This benchmark compares SQLite modes")
+        product_ids = list(Product.objects.order_by("pk").values_list("pk", flat=True)[:options["products"]])
+        if len(product_ids) < 3:
+            raise CommandError("Need at least 3 products; run generate_dataset first.")
+
+        with tempfile.TemporaryDirectory() as directory:
+            for mode in options["modes"]:
+                path = self.copy_database(Path(directory) / f"{mode}.sqlite3", MODES[mode]["journal_mode"])
+                result = self.run_mode(mode, path, product_ids, options)
+                self.report(mode, result)
+
+    def copy_database(self, path, journal_mode):
+        # The online backup API gives a consistent copy even while the source is in use
+        connection.ensure_connection()
+        target = sqlite3.connect(path)
+        try:
+            connection.connection.backup(target)
+            target.execute(f"PRAGMA journal_mode={journal_mode}")
+        finally:
+            target.close()
+        return str(path)
+
+    def run_mode(self, mode, path, product_ids, options):
+        processes = options["processes"]
+        config = MODES[mode]
+        pool = ProcessPoolExecutor(
+            max_workers=processes,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=init_contention_worker,
+            initargs=(path, config["options"]),
+        )
+        with pool:
+            # Start together once every process has imported Django
+            start_at = time.time() + 2.0 + 0.25 * processes
+            futures = [
+                pool.submit(run_contention_worker, seed, options["operations"], product_ids, start_at, config["retry"])
+                for seed in range(processes)
+            ]
+            results = [future.result() for future in futures]
+        elapsed = max(result["finished_at"] for result in results) - start_at
+        writes = [latency for result in results for latency in result["writes"]]
+        reads = [latency for result in results for latency in result["reads"]]
+        return {
+            "elapsed": elapsed,
+            "writes": writes,
+            "reads": reads,
+            "errors": sum(result["errors"] for result in results),
+            "attempted": processes * options["operations"],
+        }
+
+    def report(self, mode, result):
+        done = len(result["writes"]) + len(result["reads"])
+        line = (
+            f"{mode:<11} {done / result['elapsed']:8.1f} ops/s  "
+            f"{result['errors']:4d}/{result['attempted']} failed (locked)"
+        )
+        if result["writes"]:
+            writes = summarize(result["writes"])
+            line += f"  writes p50 {writes['p50_ms']:.1f}ms p99 {writes['p99_ms']:.1f}ms"
+        if result["reads"]:
+            line += f"  reads p99 {summarize(result['reads'])['p99_ms']:.1f}ms"
+        self.stdout.write(line)
@@ -0,0 +1,34 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from store.dataset import SCALES, DatasetGenerator
+from store.models import Product
+
+
+class Command(BaseCommand):
+    help = "Fill the database with a seeded, realistic catalog, orders, comments and carts for benchmarking."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--scale", choices=sorted(SCALES), default="small")
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument("--append", action="store_true", help="Allow adding to a database that already has products.")
+        for name in SCALES["small"]:
+            parser.add_argument(f"--{name.replace('_', '-')}", type=int, dest=name, help=f"Override the scale's {name} count.")
+
+    def handle(self, *args, **options):
+        if Product.objects.exists() and not options["append"]:
+            raise CommandError("The database already has products; pass --append to add to it.")
+        counts = {
+            name: default if options[name] is None else options[name]
+            for name, default in SCALES[options["scale"]].items()
+        }
+        if counts["categories"] < 1:
+            raise CommandError("At least one category is required.")
+        self.stdout.write("Generating " + ", ".join(f"{count} {name}" for name, count in counts.items()))
+        started = time.perf_counter()
+        generator = DatasetGenerator(seed=options["seed"], batch_size=options["batch_size"], log=self.stdout.write)
+        generator.generate(**counts)
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(f"Generated dataset in {elapsed:.2f}s"))
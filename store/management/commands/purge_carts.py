@@ -0,0 +1,53 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count
+
+from store.carts import expired_carts, purge_expired_carts
+
+
+class Command(BaseCommand):
+    help = "Delete abandoned carts (and their lines) in small batches, by last activity."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=None, help="Expire carts with items idle this long (default: STORE_CARTS TTL_DAYS).")
+        parser.add_argument("--empty-days", type=int, default=None, help="Expire empty carts idle this long (default: EMPTY_TTL_DAYS).")
+        parser.add_argument("--batch-size", type=int, default=None)
+        parser.add_argument("--sleep", type=float, default=0.0, help="Seconds to pause between batches.")
+        parser.add_argument("--interval", type=float, default=None, help="Keep running, purging every this many seconds.")
+        parser.add_argument("--dry-run", action="store_true")
+
+    def handle(self, *args, **options):
+        if options["batch_size"] is not None and options["batch_size"] < 1:
+            raise CommandError("--batch-size must be >= 1")
+        if options["dry_run"]:
+            expired = expired_carts(ttl_days=options["days"], empty_ttl_days=options["empty_days"])
+            totals = expired.aggregate(carts=Count("pk", distinct=True), items=Count("items"))
+            self.stdout.write(f"{totals['carts']} expired carts with {totals['items']} lines")
+            return
+        while True:
+            self.purge(options)
+            if options["interval"] is None:
+                return
+            time.sleep(options["interval"])
+
+    def purge(self, options):
+        started = time.perf_counter()
+        carts = items = 0
+        batches = purge_expired_carts(
+            batch_size=options["batch_size"],
+            ttl_days=options["days"],
+            empty_ttl_days=options["empty_days"],
+            pause=options["sleep"],
+        )
+        for batch in batches:
+            carts += batch["carts"]
+            items += batch["items"]
+            if options["verbosity"] > 1 or batch["batch"] % 10 == 1:
+                # Every 10th batch unless -v 2
+                self.stdout.write(
+                    f"batch {batch['batch']}: {batch['carts']} carts, {batch['items']} lines "
+                    f"in {batch['seconds'] * 1000:.1f}ms"
+                )
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(f"Purged {carts} carts and {items} lines in {elapsed:.2f}s"))
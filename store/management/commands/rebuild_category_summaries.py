@@ -0,0 +1,18 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from store.stats import rebuild_category_summaries
+
+
+class Command(BaseCommand):
+    help = "Rebuild the CategorySummary table and Category.top_product from the product catalog."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=200)
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        count = rebuild_category_summaries(batch_size=options["batch_size"])
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt summaries for {count} categories in {elapsed:.2f}s"))
@@ -0,0 +1,18 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from store.stats import rebuild_product_stats
+
+
+class Command(BaseCommand):
+    help = "Rebuild the denormalized ProductStats table from orders and comments."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        count = rebuild_product_stats(batch_size=options["batch_size"])
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt stats for {count} products in {elapsed:.2f}s"))
@@ -0,0 +1,17 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from store.search import full_text_enabled, install_search_indexes
+
+
+class Command(BaseCommand):
+    help = "Recreate the FTS5 search tables and triggers and reindex products and comments."
+
+    def handle(self, *args, **options):
+        if not full_text_enabled():
+            raise CommandError("Full-text indexes are only available on SQLite.")
+        started = time.perf_counter()
+        install_search_indexes(rebuild=True)
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt search indexes in {elapsed:.2f}s"))
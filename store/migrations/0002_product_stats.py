@@ -0,0 +1,47 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:24
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def backfill_product_stats(apps, schema_editor):
+    Product = apps.get_model('store', 'Product')
+    OrderItem = apps.get_model('store', 'OrderItem')
+    Comment = apps.get_model('store', 'Comment')
+    ProductStats = apps.get_model('store', 'ProductStats')
+    sold = dict(
+        OrderItem.objects.filter(order__status='p')
+        .values('product_id').annotate(total=Sum('quantity')).values_list('product_id', 'total')
+    )
+    approved = dict(
+        Comment.objects.filter(status='a')
+        .values('product_id').annotate(total=Count('id')).values_list('product_id', 'total')
+    )
+    ProductStats.objects.bulk_create(
+        [ProductStats(product_id=pk, total_sold=sold.get(pk) or 0, approved_comments_count=approved.get(pk) or 0)
+         for pk in Product.objects.values_list('pk', flat=True).iterator()],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductStats',
+            fields=[
+                ('product', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='store.product')),
+                ('total_sold', models.PositiveIntegerField(default=0)),
+                ('approved_comments_count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['total_sold', 'product'], name='store_stats_sold_idx'), models.Index(fields=['approved_comments_count', 'product'], name='store_stats_comments_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_product_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,84 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:25
+
+import django.db.models.deletion
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.db import migrations, models
+from django.db.models import Avg, Count, Max, Min, OuterRef, Q, Subquery
+
+
+def backfill_category_summaries(apps, schema_editor):
+    Category = apps.get_model('store', 'Category')
+    CategorySummary = apps.get_model('store', 'CategorySummary')
+    Product = apps.get_model('store', 'Product')
+
+    def first_product_id(*ordering):
+        return Subquery(Product.objects.filter(category=OuterRef('pk')).order_by(*ordering).values('id')[:1])
+
+    def cents(value):
+        if value is None:
+            return None
+        return Decimal(str(value)).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+
+    categories = Category.objects.annotate(
+        product_count=Count('products'),
+        in_stock_count=Count('products', filter=Q(products__inventory__gt=0)),
+        min_price=Min('products__unit_price'),
+        max_price=Max('products__unit_price'),
+        avg_price=Avg('products__unit_price'),
+        cheapest_product_id=first_product_id('unit_price', 'pk'),
+        priciest_product_id=first_product_id('-unit_price', 'pk'),
+    )
+    CategorySummary.objects.bulk_create(
+        [
+            CategorySummary(
+                category_id=c.pk,
+                product_count=c.product_count,
+                in_stock_count=c.in_stock_count,
+                min_price=cents(c.min_price),
+                max_price=cents(c.max_price),
+                avg_price=cents(c.avg_price),
+                cheapest_product_id=c.cheapest_product_id,
+                priciest_product_id=c.priciest_product_id,
+            )
+            for c in categories.iterator()
+        ],
+        batch_size=500,
+    )
+    Category.objects.update(top_product=first_product_id('-stats__total_sold', 'pk'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0002_product_stats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CategorySummary',
+            fields=[
+                ('category', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='summary', serialize=False, to='store.category')),
+                ('product_count', models.PositiveIntegerField(default=0)),
+                ('in_stock_count', models.PositiveIntegerField(default=0)),
+                ('min_price', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('max_price', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('avg_price', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['category', 'unit_price'], name='store_product_cat_price_idx'),
+        ),
+        migrations.AddField(
+            model_name='categorysummary',
+            name='cheapest_product',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='store.product'),
+        ),
+        migrations.AddField(
+            model_name='categorysummary',
+            name='priciest_product',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='store.product'),
+        ),
+        migrations.RunPython(backfill_category_summaries, migrations.RunPython.noop),
+    ]
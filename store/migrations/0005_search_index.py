@@ -0,0 +1,48 @@
+import django.db.models.deletion
+import store.models
+from django.db import migrations, models
+
+
+def create_search_indexes(apps, schema_editor):
+    from store.search import install_search_indexes
+    install_search_indexes(schema_editor.connection, rebuild=True)
+
+
+def drop_search_indexes(apps, schema_editor):
+    from store.search import uninstall_search_indexes
+    uninstall_search_indexes(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0004_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CommentSearchDocument',
+            fields=[
+                ('comment', models.OneToOneField(db_column='rowid', on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='search_document', serialize=False, to='store.comment')),
+                ('document', store.models.FullTextField(db_column='store_comment_fts')),
+                ('rank', models.FloatField()),
+            ],
+            options={
+                'db_table': 'store_comment_fts',
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='ProductSearchDocument',
+            fields=[
+                ('product', models.OneToOneField(db_column='rowid', on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='search_document', serialize=False, to='store.product')),
+                ('document', store.models.FullTextField(db_column='store_product_fts')),
+                ('rank', models.FloatField()),
+            ],
+            options={
+                'db_table': 'store_product_fts',
+                'managed': False,
+            },
+        ),
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
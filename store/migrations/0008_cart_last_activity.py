@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:00
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0007_comment_status_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cart',
+            name='last_activity_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        # Existing carts count as last active when they were created
+        migrations.RunSQL('UPDATE "store_cart" SET "last_activity_at" = "created_at"', migrations.RunSQL.noop),
+        migrations.AddIndex(
+            model_name='cart',
+            index=models.Index(fields=['last_activity_at', 'id'], name='store_cart_activity_idx'),
+        ),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:07
+
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.db import migrations, models
+from django.db.models import Max
+
+
+def backfill_effective_prices(apps, schema_editor):
+    Product = apps.get_model('store', 'Product')
+    best = dict(
+        Product.discounts.through.objects
+        .values('product_id').annotate(best=Max('discount__discount')).values_list('product_id', 'best')
+    )
+    batch = []
+    for product in Product.objects.only('pk', 'unit_price').iterator(chunk_size=1000):
+        pct = best.get(product.pk) or 0
+        product.best_discount_percent = pct
+        product.effective_price = (product.unit_price * (1 - Decimal(str(pct)) / 100)).quantize(
+            Decimal('0.01'), rounding=ROUND_HALF_UP,
+        )
+        batch.append(product)
+        if len(batch) == 1000:
+            Product.objects.bulk_update(batch, ['best_discount_percent', 'effective_price'])
+            batch = []
+    Product.objects.bulk_update(batch, ['best_discount_percent', 'effective_price'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0008_cart_last_activity'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='best_discount_percent',
+            field=models.FloatField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='effective_price',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=6),
+        ),
+        migrations.RunPython(backfill_effective_prices, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['effective_price', 'id'], name='store_product_eff_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['category', 'effective_price'], name='store_product_cat_eff_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['best_discount_percent', 'id'], name='store_product_discount_idx'),
+        ),
+    ]
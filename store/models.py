@@ -1,8 +1,24 @@
 from django.db import models
 from django.core.validators import MinValueValidator
+from django.utils import timezone
 from uuid import uuid4
 
 
+class FullTextField(models.TextField):
+    # The hidden FTS5 column named after its virtual table; queried with `match`.
+    pass
+
+
+@FullTextField.register_lookup
+class Match(models.Lookup):
+    lookup_name = 'match'
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f'{lhs} MATCH {rhs}', [*lhs_params, *rhs_params]
+
+
 class Category(models.Model):
     title = models.CharField(max_length=255)
     description = models.CharField(max_length=500, blank=True)
@@ -16,6 +32,11 @@ class Discount(models.Model):
     discount = models.FloatField()
     description = models.CharField(max_length=255)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['discount', 'id'], name='store_discount_value_idx'),
+        ]
+
     def __str__(self):
         return f'{str(self.discount)} | {self.description}'
 
@@ -30,6 +51,20 @@ class Product(models.Model):
     datetime_created = models.DateTimeField(auto_now_add=True)
     datetime_modified = models.DateTimeField(auto_now=True)
     discounts = models.ManyToManyField(Discount, related_name='products', blank=True)
+    # What the customer pays: unit_price less the best of the discounts.
+    # Maintained by store.signals / store.pricing.refresh_product_prices.
+    best_discount_percent = models.FloatField(default=0, editable=False)
+    effective_price = models.DecimalField(max_digits=6, decimal_places=2, default=0, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['category', 'unit_price'], name='store_product_cat_price_idx'),
+            models.Index(fields=['unit_price', 'id'], name='store_product_price_idx'),
+            models.Index(fields=['datetime_modified'], name='store_product_modified_idx'),
+            models.Index(fields=['effective_price', 'id'], name='store_product_eff_price_idx'),
+            models.Index(fields=['category', 'effective_price'], name='store_product_cat_eff_idx'),
+            models.Index(fields=['best_discount_percent', 'id'], name='store_product_discount_idx'),
+        ]
 
     def __str__(self):
         return self.name
@@ -118,10 +153,24 @@ class Comment(models.Model):
     objects = CommentManager()
     approved = ApprovedCommentManager()
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['datetime_created', 'id'], name='store_comment_created_idx'),
+            models.Index(fields=['status', 'product'], name='store_comment_status_idx'),
+        ]
+
 
 class Cart(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid4)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Kept current (to within STORE_CARTS TOUCH_INTERVAL) by cart reads and
+    # writes; purge_carts expires carts by it.
+    last_activity_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['last_activity_at', 'id'], name='store_cart_activity_idx'),
+        ]
 
 
 class CartItem(models.Model):
@@ -130,4 +179,54 @@ class CartItem(models.Model):
     quantity = models.PositiveSmallIntegerField()
 
     class Meta:
-        unique_together = [['cart', 'product']]
\ No newline at end of file
+        unique_together = [['cart', 'product']]
+
+
+class ProductStats(models.Model):
+    product = models.OneToOneField(Product, on_delete=models.CASCADE, primary_key=True, related_name='stats')
+    total_sold = models.PositiveIntegerField(default=0)
+    approved_comments_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['total_sold', 'product'], name='store_stats_sold_idx'),
+            models.Index(fields=['approved_comments_count', 'product'], name='store_stats_comments_idx'),
+        ]
+
+    def __str__(self):
+        return f'Stats product_id={self.product_id}'
+
+
+class CategorySummary(models.Model):
+    category = models.OneToOneField(Category, on_delete=models.CASCADE, primary_key=True, related_name='summary')
+    product_count = models.PositiveIntegerField(default=0)
+    in_stock_count = models.PositiveIntegerField(default=0)
+    min_price = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    max_price = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    avg_price = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    cheapest_product = models.ForeignKey(Product, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    priciest_product = models.ForeignKey(Product, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+
+    def __str__(self):
+        return f'Summary category_id={self.category_id}'
+
+
+class ProductSearchDocument(models.Model):
+    # Row of the store_product_fts virtual table (SQLite only, see store/search.py).
+    product = models.OneToOneField(Product, on_delete=models.DO_NOTHING, primary_key=True, db_column='rowid', related_name='search_document')
+    document = FullTextField(db_column='store_product_fts')
+    rank = models.FloatField()
+
+    class Meta:
+        managed = False
+        db_table = 'store_product_fts'
+
+
+class CommentSearchDocument(models.Model):
+    comment = models.OneToOneField(Comment, on_delete=models.DO_NOTHING, primary_key=True, db_column='rowid', related_name='search_document')
+    document = FullTextField(db_column='store_comment_fts')
+    rank = models.FloatField()
+
+    class Meta:
+        managed = False
+        db_table = 'store_comment_fts'
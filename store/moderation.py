@@ -0,0 +1,26 @@
+from django.db import transaction
+
+from core.db import retry_on_lock
+
+from .cache import bump_data_version
+from .models import Comment
+from .stats import refresh_product_stats
+
+
+@retry_on_lock
+def moderate_comments(comments, status):
+    # One UPDATE for the whole selection instead of a save() per comment, then
+    # one grouped recount of approved comments for the products involved.
+    # Returns the ids of the comments whose status changed.
+    with transaction.atomic():
+        changed = comments.exclude(status=status)
+        rows = list(changed.values_list("pk", "product_id"))
+        if not rows:
+            return []
+        ids = [pk for pk, _ in rows]
+        Comment.objects.filter(pk__in=ids).update(status=status)
+        refresh_product_stats({product_id for _, product_id in rows}, fields=("approved_comments_count",))
+        # update() sends no post_save, so cached listings are invalidated here,
+        # after commit like the signal-driven bumps
+        transaction.on_commit(lambda: bump_data_version(Comment), robust=True)
+    return ids
@@ -0,0 +1,221 @@
+from datetime import date, datetime, time
+from decimal import Decimal
+from uuid import UUID
+
+from django.core import signing
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import BooleanField, Expression, F, OrderBy, Q, Value
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+def _to_json(value):
+    if isinstance(value, (Decimal, UUID)):
+        return str(value)
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    return value
+
+
+class RowComparison(Expression):
+    # (a, b, ...) < (%s, %s, ...): a single row-value predicate the database
+    # can answer with one seek on a composite index, even inside long runs of ties.
+    output_field = BooleanField()
+    conditional = True
+
+    def __init__(self, columns, values, descending):
+        super().__init__()
+        self.columns = [F(c) if isinstance(c, str) else c for c in columns]
+        self.values = [Value(v) for v in values]
+        self.descending = descending
+
+    def get_source_expressions(self):
+        return [*self.columns, *self.values]
+
+    def set_source_expressions(self, exprs):
+        self.columns, self.values = exprs[:len(self.columns)], exprs[len(self.columns):]
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = zip(*(compiler.compile(c) for c in self.columns))
+        rhs, rhs_params = zip(*(compiler.compile(v) for v in self.values))
+        operator = "<" if self.descending else ">"
+        params = [p for group in (*lhs_params, *rhs_params) for p in group]
+        return f"({', '.join(lhs)}) {operator} ({', '.join(rhs)})", params
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination over any ordering produced by OrderingFilter.
+
+    The primary key is appended as a tie-breaker and the cursor carries the
+    last row's sort values, so every page is a seek on the ordering index
+    instead of an OFFSET scan.
+    """
+
+    page_size = 20
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    cursor_query_param = "cursor"
+    cursor_salt = "store.pagination.keyset"
+    invalid_cursor_message = "Invalid cursor"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        page_queryset = self.get_page_queryset(queryset, request, view)
+        return self.paginate_rows(list(page_queryset))
+
+    def get_page_queryset(self, queryset, request, view=None):
+        # Builds the page query without evaluating it; see paginate_rows().
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.ordering = self.get_ordering(queryset, view)
+        self.output_fields = {name: self._output_field(queryset, name) for name, _ in self.ordering}
+        self.cursor = self.decode_cursor(request)
+        self.reverse = bool(self.cursor and self.cursor["r"])
+
+        ordering = [(name, desc != self.reverse) for name, desc in self.ordering]
+        if self.cursor:
+            queryset = queryset.filter(self._seek(ordering, self.cursor["v"]))
+        order_by = [
+            F(name).desc(nulls_last=True) if desc else F(name).asc(nulls_first=True)
+            for name, desc in ordering
+        ]
+        return queryset.order_by(*order_by)[:self.page_size + 1]
+
+    def paginate_rows(self, rows):
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if self.reverse:
+            rows.reverse()
+            self.has_next, self.has_previous = bool(self.cursor), has_more
+        else:
+            self.has_next, self.has_previous = has_more, bool(self.cursor)
+        self.first_values = self._row_values(rows[0]) if rows else None
+        self.last_values = self._row_values(rows[-1]) if rows else None
+        return rows
+
+    def get_paginated_response(self, data):
+        return Response({
+            "next": self.get_next_link(),
+            "previous": self.get_previous_link(),
+            "results": data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if size <= 0:
+            return self.page_size
+        return min(size, self.max_page_size)
+
+    def get_ordering(self, queryset, view=None):
+        ordering = []
+        for item in queryset.query.order_by or queryset.model._meta.ordering:
+            if isinstance(item, str):
+                ordering.append((item.lstrip("-"), item.startswith("-")))
+            elif isinstance(item, OrderBy) and isinstance(item.expression, F):
+                ordering.append((item.expression.name, item.descending))
+        pk_name = self.pk_name = queryset.model._meta.pk.name
+        names = {name for name, _ in ordering}
+        if names & {pk_name, "pk"}:
+            self.tie_breaker = None
+            return ordering
+        # Views may break ties on a column of the joined table that holds the
+        # sort key (e.g. stats__product for ProductStats), so one index serves both.
+        tie_breakers = getattr(view, "keyset_tie_breakers", {})
+        self.tie_breaker = tie_breakers.get(ordering[0][0], pk_name) if ordering else pk_name
+        ordering.append((self.tie_breaker, ordering[-1][1] if ordering else False))
+        return ordering
+
+    def get_next_link(self):
+        if not self.has_next or self.last_values is None:
+            return None
+        return self._link(self.last_values, reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or self.first_values is None:
+            return None
+        return self._link(self.first_values, reverse=True)
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            payload = signing.loads(encoded, salt=self.cursor_salt)
+            ordering = [(name, bool(desc)) for name, desc in payload["o"]]
+            values = payload["v"]
+        except (signing.BadSignature, KeyError, TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if ordering != self.ordering or len(values) != len(ordering):
+            raise NotFound(self.invalid_cursor_message)
+        try:
+            values = [
+                None if value is None else self.output_fields[name].to_python(value)
+                for (name, _), value in zip(ordering, values)
+            ]
+        except Exception:
+            raise NotFound(self.invalid_cursor_message)
+        return {"v": values, "r": bool(payload.get("r"))}
+
+    def encode_cursor(self, values, reverse):
+        payload = {"o": self.ordering, "v": [_to_json(v) for v in values], "r": int(reverse)}
+        return signing.dumps(payload, salt=self.cursor_salt, compress=True)
+
+    def _link(self, values, reverse):
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(values, reverse))
+
+    def _row_values(self, row):
+        if isinstance(row, dict):
+            # .values() rows, keyed by the selected column names
+            return [row[self.pk_name if name == self.tie_breaker else name] for name, _ in self.ordering]
+        return [row.pk if name == self.tie_breaker else getattr(row, name) for name, _ in self.ordering]
+
+    def _output_field(self, queryset, name):
+        if name == self.tie_breaker:
+            return queryset.model._meta.pk
+        annotation = queryset.query.annotations.get(name)
+        if annotation is not None:
+            return annotation.output_field
+        try:
+            return queryset.model._meta.get_field(name)
+        except FieldDoesNotExist:
+            raise NotFound(self.invalid_cursor_message)
+
+    def _seek(self, ordering, values):
+        # (a, b, id) after (va, vb, vid) in the page direction, with NULLs
+        # sorting first on ascending and last on descending columns.
+        nullable = [getattr(self.output_fields[name], "null", True) for name, _ in ordering]
+        directions = {desc for _, desc in ordering}
+        if len(directions) == 1 and None not in values and not any(nullable):
+            return RowComparison([name for name, _ in ordering], values, directions.pop())
+
+        condition = Q(pk__in=[])
+        equal = Q()
+        for (name, desc), value, null in zip(ordering, values, nullable):
+            if value is None:
+                after = Q(pk__in=[]) if desc else Q(**{f"{name}__isnull": False})
+                same = Q(**{f"{name}__isnull": True})
+            else:
+                after = Q(**{f"{name}__lt" if desc else f"{name}__gt": value})
+                if desc and null:
+                    after |= Q(**{f"{name}__isnull": True})
+                same = Q(**{name: value})
+            condition |= equal & after
+            equal &= same
+        return condition
@@ -0,0 +1,108 @@
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.db.models import OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import CartItem, Discount, Product
+
+CENT = Decimal("0.01")
+
+
+def best_discount_percent():
+    # Only used to refresh the stored Product columns; reads use those instead
+    return Coalesce(
+        Subquery(
+            Discount.objects
+            .filter(products__pk=OuterRef("pk"))
+            .order_by("-discount")
+            .values("discount")[:1]
+        ),
+        0.0,
+    )
+
+
+def final_unit_price(unit_price, discount_percent):
+    price = unit_price if isinstance(unit_price, Decimal) else Decimal(str(unit_price or 0))
+    pct = Decimal(str(discount_percent or 0))
+    return (price * (Decimal("1") - pct / Decimal("100"))).quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+def refresh_product_prices(product_ids, batch_size=500):
+    """
+    Recompute the stored best_discount_percent/effective_price of the given products.
+
+    Called when a product's discounts or a discount's rate change; saves of
+    the product itself are priced in a pre_save signal. Queryset ``update()``
+    calls on unit_price bypass both and must call this themselves, and so must
+    ``Product.objects.bulk_create()``, which otherwise leaves effective_price
+    at 0 (the dataset generator runs ``rebuild_product_prices()``; the
+    ``rebuild_product_prices`` command does the same).
+    """
+    product_ids = sorted({pk for pk in product_ids if pk is not None})
+    updated = 0
+    now = timezone.now()
+    for start in range(0, len(product_ids), batch_size):
+        products = list(
+            Product.objects
+            .filter(pk__in=product_ids[start:start + batch_size])
+            .annotate(best_discount=best_discount_percent())
+            .only("pk", "unit_price")
+        )
+        for product in products:
+            product.best_discount_percent = product.best_discount or 0
+            product.effective_price = final_unit_price(product.unit_price, product.best_discount_percent)
+            # bulk_update() skips auto_now; exports and Last-Modified read it
+            product.datetime_modified = now
+        updated += Product.objects.bulk_update(
+            products, ["best_discount_percent", "effective_price", "datetime_modified"]
+        )
+    return updated
+
+
+def rebuild_product_prices(batch_size=500):
+    total = 0
+    last_pk = 0
+    while True:
+        chunk = list(
+            Product.objects
+            .filter(pk__gt=last_pk)
+            .order_by("pk")
+            .values_list("pk", flat=True)[:batch_size]
+        )
+        if not chunk:
+            break
+        total += refresh_product_prices(chunk, batch_size)
+        last_pk = chunk[-1]
+    return total
+
+
+class PricedCart:
+    def __init__(self, cart_id, items):
+        self.cart_id = cart_id
+        self.items = items
+        self.total_price = sum((item.total_price for item in items), Decimal(0)).quantize(CENT, rounding=ROUND_HALF_UP)
+        self.total_items = sum(item.quantity for item in items)
+
+
+def price_carts(cart_ids):
+    # One query for every line of every requested cart, with the stored
+    # effective prices; line and cart totals are then folded from those rows.
+    cart_ids = list(cart_ids)
+    lines = {cart_id: [] for cart_id in cart_ids}
+    items = (
+        CartItem.objects
+        .filter(cart_id__in=cart_ids)
+        .select_related("product")
+        .order_by("pk")
+    )
+    for item in items:
+        product = item.product
+        product.final_price = product.effective_price
+        item.total_price = (product.final_price * item.quantity).quantize(CENT, rounding=ROUND_HALF_UP)
+        lines[item.cart_id].append(item)
+    return {cart_id: PricedCart(cart_id, items) for cart_id, items in lines.items()}
+
+
+def price_cart(cart_id):
+    return price_carts([cart_id])[cart_id]
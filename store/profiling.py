@@ -0,0 +1,175 @@
+import json
+import logging
+import random
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+logger = logging.getLogger("store.profiling")
+
+_current = ContextVar("store_request_profile", default=None)
+
+
+def _config():
+    return {
+        "SAMPLE_RATE": 0.0,
+        "DUPLICATE_THRESHOLD": 3,
+        "SERVER_TIMING": True,
+        "LOG": True,
+        **getattr(settings, "STORE_PROFILING", {}),
+    }
+
+
+class RequestProfile:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = Counter()
+        self.query_count = 0
+        self.db_time = 0.0
+        self.serializer_time = 0.0
+        self.serializer_depth = 0
+        self.total_time = None
+
+    def record_query(self, sql, elapsed):
+        self.query_count += 1
+        self.db_time += elapsed
+        # SQL arrives with placeholders, so repeats of the same statement shape
+        # with different parameters (the N+1 signature) share one key.
+        self.queries[sql] += 1
+
+    def duplicates(self, threshold):
+        return [(sql, count) for sql, count in self.queries.most_common() if count >= threshold]
+
+    def finish(self):
+        self.total_time = time.perf_counter() - self.started
+
+    def server_timing(self, threshold):
+        metrics = [
+            f'db;dur={self.db_time * 1000:.2f};desc="{self.query_count} queries"',
+            f'serialize;dur={self.serializer_time * 1000:.2f}',
+            f'total;dur={self.total_time * 1000:.2f}',
+        ]
+        repeated = self.duplicates(threshold)
+        if repeated:
+            metrics.append(f'dupes;desc="{len(repeated)} repeated statements"')
+        return ", ".join(metrics)
+
+    def as_dict(self, request, response, threshold):
+        return {
+            "method": request.method,
+            "path": request.path,
+            "status": response.status_code,
+            "total_ms": round(self.total_time * 1000, 2),
+            "db_ms": round(self.db_time * 1000, 2),
+            "serializer_ms": round(self.serializer_time * 1000, 2),
+            "queries": self.query_count,
+            "duplicates": [{"sql": sql[:300], "count": count} for sql, count in self.duplicates(threshold)],
+        }
+
+
+def _time_query(execute, sql, params, many, context):
+    profile = _current.get()
+    if profile is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        profile.record_query(sql, time.perf_counter() - started)
+
+
+@receiver(connection_created)
+def install_query_timer(sender, connection, **kwargs):
+    # On every connection rather than around the request: under ASGI the
+    # queries run on sync_to_async worker threads, each with its own
+    # connection, and the profile reaches them through the context variable.
+    if _time_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, _time_query)
+
+
+class TimedSerializerMixin:
+    """
+    Add the time spent rendering to the sampled request's profile.
+
+    Only the outermost serializer is timed, so nested and per-item children do
+    not count twice; the figure includes any queries serialization triggers.
+    """
+
+    def to_representation(self, instance):
+        profile = _current.get()
+        if profile is None:
+            return super().to_representation(instance)
+        profile.serializer_depth += 1
+        started = time.perf_counter()
+        try:
+            return super().to_representation(instance)
+        finally:
+            profile.serializer_depth -= 1
+            if not profile.serializer_depth:
+                profile.serializer_time += time.perf_counter() - started
+
+
+class ProfilingMiddleware:
+    """
+    Record SQL count, DB time, serializer time and total time for a sample of
+    requests; unsampled requests pay for a single ``random()`` call.
+
+    Both sync and async capable, so the async catalog routes are not pushed
+    through a thread under ASGI.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        config = _config()
+        if not self.sampled(config):
+            return self.get_response(request)
+        profile = RequestProfile()
+        with self.profiling(profile):
+            response = self.get_response(request)
+        return self.report(config, profile, request, response)
+
+    async def __acall__(self, request):
+        config = _config()
+        if not self.sampled(config):
+            return await self.get_response(request)
+        profile = RequestProfile()
+        with self.profiling(profile):
+            response = await self.get_response(request)
+        return self.report(config, profile, request, response)
+
+    def sampled(self, config):
+        return bool(config["SAMPLE_RATE"]) and random.random() < config["SAMPLE_RATE"]
+
+    @contextmanager
+    def profiling(self, profile):
+        token = _current.set(profile)
+        try:
+            yield
+        finally:
+            _current.reset(token)
+
+    def report(self, config, profile, request, response):
+        profile.finish()
+        threshold = config["DUPLICATE_THRESHOLD"]
+        if config["SERVER_TIMING"]:
+            response["Server-Timing"] = profile.server_timing(threshold)
+        if config["LOG"]:
+            data = profile.as_dict(request, response, threshold)
+            level = logging.WARNING if data["duplicates"] else logging.INFO
+            logger.log(level, json.dumps(data), extra={"profile": data})
+        return response
@@ -0,0 +1,146 @@
+import re
+
+from django.db import connection
+from django.db.models import F
+from rest_framework.filters import OrderingFilter, SearchFilter
+
+from .models import Comment, CommentSearchDocument, Product, ProductSearchDocument
+
+
+class FullTextIndex:
+    def __init__(self, model, document_model, columns, weights):
+        self.model = model
+        self.document_model = document_model
+        self.columns = columns
+        self.weights = weights
+
+    @property
+    def source(self):
+        return self.model._meta.db_table
+
+    @property
+    def table(self):
+        return self.document_model._meta.db_table
+
+    @property
+    def relation(self):
+        return self.document_model._meta.pk.remote_field.related_name
+
+    def create_statements(self):
+        table, source = self.table, self.source
+        cols = ", ".join(self.columns)
+        new = ", ".join(f"new.{c}" for c in self.columns)
+        old = ", ".join(f"old.{c}" for c in self.columns)
+        return [
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {table} USING fts5("
+            f"{cols}, content='{source}', content_rowid='id', tokenize='unicode61 remove_diacritics 2')",
+            f"CREATE TRIGGER IF NOT EXISTS {table}_ai AFTER INSERT ON {source} BEGIN "
+            f"INSERT INTO {table}(rowid, {cols}) VALUES (new.id, {new}); END",
+            f"CREATE TRIGGER IF NOT EXISTS {table}_ad AFTER DELETE ON {source} BEGIN "
+            f"INSERT INTO {table}({table}, rowid, {cols}) VALUES ('delete', old.id, {old}); END",
+            f"CREATE TRIGGER IF NOT EXISTS {table}_au AFTER UPDATE OF {cols} ON {source} BEGIN "
+            f"INSERT INTO {table}({table}, rowid, {cols}) VALUES ('delete', old.id, {old}); "
+            f"INSERT INTO {table}(rowid, {cols}) VALUES (new.id, {new}); END",
+            # bm25() column weights behind the hidden `rank` column
+            f"INSERT INTO {table}({table}, rank) VALUES ('rank', 'bm25({', '.join(map(str, self.weights))})')",
+        ]
+
+    def drop_statements(self):
+        return [
+            f"DROP TRIGGER IF EXISTS {self.table}_ai",
+            f"DROP TRIGGER IF EXISTS {self.table}_ad",
+            f"DROP TRIGGER IF EXISTS {self.table}_au",
+            f"DROP TABLE IF EXISTS {self.table}",
+        ]
+
+    def rebuild_statement(self):
+        return f"INSERT INTO {self.table}({self.table}) VALUES ('rebuild')"
+
+    def filter(self, queryset, match, rank_field):
+        # Joins the virtual table on rowid: FTS5 resolves MATCH from its own
+        # index and each hit is a primary-key lookup into the source table.
+        return (
+            queryset
+            .filter(**{f"{self.relation}__document__match": match})
+            .annotate(**{rank_field: F(f"{self.relation}__rank")})
+        )
+
+
+FULL_TEXT_INDEXES = {
+    Product: FullTextIndex(Product, ProductSearchDocument, ["name", "description"], weights=[10.0, 1.0]),
+    Comment: FullTextIndex(Comment, CommentSearchDocument, ["name", "body"], weights=[2.0, 1.0]),
+}
+
+
+def full_text_enabled(conn=None):
+    return (conn or connection).vendor == "sqlite"
+
+
+def install_search_indexes(conn=None, rebuild=False):
+    conn = conn or connection
+    if not full_text_enabled(conn):
+        return
+    existing = set(conn.introspection.table_names())
+    with conn.cursor() as cursor:
+        for index in FULL_TEXT_INDEXES.values():
+            if index.source not in existing:
+                continue
+            for statement in index.create_statements():
+                cursor.execute(statement)
+            if rebuild:
+                cursor.execute(index.rebuild_statement())
+
+
+def uninstall_search_indexes(conn=None):
+    conn = conn or connection
+    if not full_text_enabled(conn):
+        return
+    with conn.cursor() as cursor:
+        for index in FULL_TEXT_INDEXES.values():
+            for statement in index.drop_statements():
+                cursor.execute(statement)
+
+
+def build_match_query(terms):
+    # Every token must match; the last one is a prefix so results follow typing.
+    tokens = [token for term in terms for token in re.findall(r"\w+", term)]
+    if not tokens:
+        return ""
+    quoted = [f'"{token}"' for token in tokens]
+    quoted[-1] += "*"
+    return " ".join(quoted)
+
+
+class FullTextSearchFilter(SearchFilter):
+    rank_field = "search_rank"
+
+    def get_index(self, queryset):
+        if not full_text_enabled():
+            return None
+        return FULL_TEXT_INDEXES.get(queryset.model)
+
+    def filter_queryset(self, request, queryset, view):
+        index = self.get_index(queryset)
+        if index is None:
+            return super().filter_queryset(request, queryset, view)
+        match = build_match_query(self.get_search_terms(request))
+        if not match:
+            return queryset
+        return index.filter(queryset, match, self.rank_field)
+
+
+class RankedOrderingFilter(OrderingFilter):
+    # Without an explicit ?ordering=, full-text results come back best match first.
+
+    def get_default_ordering(self, view):
+        request = getattr(view, "request", None)
+        search = FullTextSearchFilter()
+        if request is not None and full_text_enabled() and build_match_query(search.get_search_terms(request)):
+            return [search.rank_field]
+        return super().get_default_ordering(view)
+
+    def filter_queryset(self, request, queryset, view):
+        # A detail lookup is not ordered, so it need not join for the ordering
+        if getattr(view, "action", None) != "list":
+            return queryset
+        return super().filter_queryset(request, queryset, view)
@@ -10,11 +10,16 @@ from .models import (
     Cart,
     Discount,
     Address,
+    Order,
     OrderItem,
 )
+from .fast_serializers import short_description
+from .fieldsets import SparseFieldsSerializerMixin
+from .pricing import CENT, price_carts
+from .profiling import TimedSerializerMixin
 
 
-class CategorySerializer(serializers.ModelSerializer):
+class CategorySerializer(TimedSerializerMixin, serializers.ModelSerializer):
     product_count = serializers.IntegerField(read_only=True)
     in_stock_count = serializers.IntegerField(read_only=True)
     max_price = serializers.DecimalField(
@@ -57,7 +62,7 @@ class CategorySerializer(serializers.ModelSerializer):
         return f"{obj.min_price} – {obj.max_price}"
 
 
-class ProductSerializer(serializers.ModelSerializer):
+class ProductSerializer(SparseFieldsSerializerMixin, TimedSerializerMixin, serializers.ModelSerializer):
     tax = serializers.SerializerMethodField()
     slug = serializers.SlugField(read_only=True)
     best_discount_percent = serializers.DecimalField(
@@ -73,7 +78,9 @@ class ProductSerializer(serializers.ModelSerializer):
     short_description = serializers.SerializerMethodField()
     category_title = serializers.CharField(source="category.title", read_only=True)
     is_in_stock = serializers.SerializerMethodField()
-    final_price = serializers.SerializerMethodField() # New field
+    final_price = serializers.DecimalField(
+        source="effective_price", max_digits=6, decimal_places=2, read_only=True
+    )
 
     class Meta:
         model = Product
@@ -102,20 +109,11 @@ class ProductSerializer(serializers.ModelSerializer):
             Decimal(obj.unit_price) * Decimal("0.10")
         ).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
 
-    def get_final_price(self, obj):
-        price = obj.unit_price or Decimal(0)
-        # Use getattr() to safely access the annotated field
-        discount_pct = getattr(obj, "best_discount_percent", Decimal(0))
-        final = price * (Decimal("1") - (discount_pct / Decimal("100")))
-        return final.quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
-
     def get_short_description(self, obj):
-        if not obj.description:
-            return ""
-        text = str(obj.description).strip()
-        if len(text) <= 120:
-            return text
-        return text[:117].rstrip() + "..."
+        # Catalog querysets compute it in the database (short_description_expression)
+        if hasattr(obj, "short_description"):
+            return obj.short_description
+        return short_description(obj.description)
 
     def get_is_in_stock(self, obj):
         try:
@@ -144,7 +142,7 @@ class ProductSerializer(serializers.ModelSerializer):
         return instance
 
 
-class DiscountSerializer(serializers.ModelSerializer):
+class DiscountSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     label = serializers.SerializerMethodField()
     application_count = serializers.IntegerField(read_only=True)
     discounted_price_preview = serializers.SerializerMethodField()
@@ -197,7 +195,7 @@ class DiscountSerializer(serializers.ModelSerializer):
         return str(final)
 
 
-class CustomerSerializer(serializers.ModelSerializer):
+class CustomerSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     full_name = serializers.SerializerMethodField()
 
     class Meta:
@@ -218,7 +216,7 @@ class CustomerSerializer(serializers.ModelSerializer):
         return f"{fn} {ln}".strip()
 
 
-class AddressSerializer(serializers.ModelSerializer):
+class AddressSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     customer = serializers.PrimaryKeyRelatedField(queryset=Customer.objects.all())
 
     class Meta:
@@ -238,20 +236,28 @@ class AddressSerializer(serializers.ModelSerializer):
         return attrs
 
 
-class OrderItemSerializer(serializers.ModelSerializer):
+class OrderItemSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = OrderItem
         fields = ["id", "order", "product", "quantity", "unit_price"]
 
 
-class CommentSerializer(serializers.ModelSerializer):
+class OrderSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    items = OrderItemSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = Order
+        fields = ["id", "customer", "datetime_created", "status", "items"]
+
+
+class CommentSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Comment
         fields = ["id", "product", "name", "body", "datetime_created", "status"]
 
 
 # Simple Product Serializer for embedding in CartItem
-class SimpleProductSerializer(serializers.ModelSerializer):
+class SimpleProductSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     final_price = serializers.SerializerMethodField()
 
     class Meta:
@@ -259,15 +265,12 @@ class SimpleProductSerializer(serializers.ModelSerializer):
         fields = ["id", "name", "slug", "unit_price", "final_price"]
     
     def get_final_price(self, obj):
-        # NOTE: This assumes the Product instance passed has 'best_discount_percent' annotated, 
-        # which is usually done in the CartItem's queryset if needed for accurate price calculation
-        price = obj.unit_price or Decimal(0)
-        discount_pct = getattr(obj, "best_discount_percent", Decimal(0))
-        final = price * (Decimal("1") - (discount_pct / Decimal("100")))
-        return final.quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+        # Set by store.pricing.price_carts(); the stored price otherwise
+        final = getattr(obj, "final_price", None)
+        return obj.effective_price if final is None else final
 
 
-class CartItemSerializer(serializers.ModelSerializer):
+class CartItemSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     product = SimpleProductSerializer(read_only=True)
     total_price = serializers.SerializerMethodField()
 
@@ -277,16 +280,26 @@ class CartItemSerializer(serializers.ModelSerializer):
         read_only_fields = ["cart"]
 
     def get_total_price(self, obj):
-        # Assuming the product instance here has the final_price logic applied (via annotation in CartViewSet)
-        unit_price = getattr(obj.product, "final_price", obj.product.unit_price)
-        if unit_price is None:
-            return Decimal("0.00")
-        return (unit_price * obj.quantity).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+        total = getattr(obj, "total_price", None)
+        if total is None:
+            total = (obj.product.effective_price * obj.quantity).quantize(CENT, rounding=ROUND_HALF_UP)
+        return total
 
 
-class CartSerializer(serializers.ModelSerializer):
+class CartListSerializer(serializers.ListSerializer):
+    def to_representation(self, data):
+        # Price every cart of the page in one query before the children render
+        carts = list(data.all() if hasattr(data, "all") else data)
+        pricing = self.context.setdefault("cart_pricing", {})
+        missing = [cart.pk for cart in carts if cart.pk not in pricing]
+        if missing:
+            pricing.update(price_carts(missing))
+        return super().to_representation(carts)
+
+
+class CartSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     id = serializers.UUIDField(read_only=True) 
-    items = CartItemSerializer(many=True, read_only=True)
+    items = serializers.SerializerMethodField()
     total_price = serializers.SerializerMethodField()
     total_items = serializers.SerializerMethodField()
 
@@ -294,12 +307,62 @@ class CartSerializer(serializers.ModelSerializer):
         model = Cart
         fields = ["id", "created_at", "items", "total_price", "total_items"]
         read_only_fields = ["created_at"]
-    
+        list_serializer_class = CartListSerializer
+
+    def get_pricing(self, obj):
+        pricing = self.context.setdefault("cart_pricing", {})
+        if obj.pk not in pricing:
+            pricing.update(price_carts([obj.pk]))
+        return pricing[obj.pk]
+
+    def get_items(self, obj):
+        return CartItemSerializer(self.get_pricing(obj).items, many=True, context=self.context).data
+
     def get_total_price(self, obj):
-        # Calculate total price by summing up the calculated total_price of all items
-        total = sum([item.get_total_price(item) for item in obj.items.all()], Decimal(0))
-        return total.quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+        return self.get_pricing(obj).total_price
 
     def get_total_items(self, obj):
-        # Calculate total quantity of items
-        return sum([item.quantity for item in obj.items.all()])
\ No newline at end of file
+        return self.get_pricing(obj).total_items
+
+
+
+class CartLineUpdateSerializer(serializers.Serializer):
+    OPS = ["add", "set", "remove"]
+
+    product_id = serializers.IntegerField(min_value=1)
+    quantity = serializers.IntegerField(min_value=0, max_value=32767, default=1)
+    op = serializers.ChoiceField(choices=OPS, default="add")
+
+    def validate(self, attrs):
+        if attrs["op"] == "add" and attrs["quantity"] <= 0:
+            raise serializers.ValidationError({"quantity": "must be > 0 when adding"})
+        return attrs
+
+
+class CartBulkUpdateSerializer(serializers.Serializer):
+    items = CartLineUpdateSerializer(many=True, allow_empty=False, max_length=200)
+
+
+class CommentModerationSerializer(serializers.Serializer):
+    # Either explicit ids or a filter; an empty payload would moderate everything
+    ids = serializers.ListField(child=serializers.IntegerField(min_value=1), required=False, max_length=1000)
+    product = serializers.IntegerField(min_value=1, required=False)
+    status = serializers.ChoiceField(choices=Comment.COMMENT_STATUS, required=False)
+    created_before = serializers.DateTimeField(required=False)
+
+    def validate(self, attrs):
+        if not attrs.get("ids") and not {"product", "status", "created_before"} & set(attrs):
+            raise serializers.ValidationError("give ids or at least one of product, status, created_before")
+        return attrs
+
+    def filter(self, comments):
+        data = self.validated_data
+        if data.get("ids"):
+            comments = comments.filter(pk__in=data["ids"])
+        if "product" in data:
+            comments = comments.filter(product_id=data["product"])
+        if "status" in data:
+            comments = comments.filter(status=data["status"])
+        if "created_before" in data:
+            comments = comments.filter(datetime_created__lt=data["created_before"])
+        return comments
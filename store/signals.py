@@ -0,0 +1,166 @@
+from django.db import connections, transaction
+from django.db.models.signals import m2m_changed, post_delete, post_migrate, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from .cache import bump_data_version
+from .models import Category, CategorySummary, Comment, Discount, Order, OrderItem, Product
+from .pricing import final_unit_price, refresh_product_prices
+from .search import install_search_indexes
+from .stats import ensure_product_stats, refresh_category_summaries, refresh_product_stats, refresh_top_products
+
+
+def _touches(update_fields, *names):
+    return update_fields is None or any(name in update_fields for name in names)
+
+
+def _refresh_sales(product_ids):
+    product_ids = set(product_ids)
+    refresh_product_stats(product_ids, fields=("total_sold",))
+    refresh_top_products(
+        Product.objects.filter(pk__in=product_ids).values_list("category_id", flat=True).distinct()
+    )
+
+
+@receiver(post_save, sender=Category)
+def create_category_summary(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        CategorySummary.objects.get_or_create(category=instance)
+
+
+@receiver(pre_save, sender=Product)
+def remember_product_category(sender, instance, raw=False, **kwargs):
+    instance._previous_category_id = None
+    if instance.pk and not raw:
+        instance._previous_category_id = (
+            Product.objects.filter(pk=instance.pk).values_list("category_id", flat=True).first()
+        )
+
+
+@receiver(pre_save, sender=Product)
+def price_product(sender, instance, raw=False, **kwargs):
+    # The best discount only changes through the discounts; see below
+    if not raw:
+        instance.effective_price = final_unit_price(instance.unit_price, instance.best_discount_percent)
+
+
+@receiver(post_save, sender=Product)
+def product_saved(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    if created:
+        # Fixtures too: catalog listings only show products with a stats row
+        ensure_product_stats([instance.pk])
+    if raw:
+        return
+    if update_fields is not None and "unit_price" in update_fields and "effective_price" not in update_fields:
+        refresh_product_prices([instance.pk])
+    refresh_category_summaries({instance.category_id, getattr(instance, "_previous_category_id", None)})
+
+
+@receiver(post_delete, sender=Product)
+def product_deleted(sender, instance, **kwargs):
+    refresh_category_summaries([instance.category_id])
+
+
+@receiver(pre_save, sender=OrderItem)
+@receiver(pre_save, sender=Comment)
+def remember_previous_product(sender, instance, raw=False, **kwargs):
+    # A line or comment moved to another product must be uncounted on the old one
+    instance._previous_product_id = None
+    if instance.pk and not raw:
+        instance._previous_product_id = (
+            sender.objects.filter(pk=instance.pk).values_list("product_id", flat=True).first()
+        )
+
+
+def _affected_products(instance):
+    return {instance.product_id, getattr(instance, "_previous_product_id", None)} - {None}
+
+
+@receiver(post_save, sender=OrderItem)
+@receiver(post_delete, sender=OrderItem)
+def order_item_changed(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    _refresh_sales(_affected_products(instance))
+
+
+@receiver(post_save, sender=Order)
+def order_status_changed(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    if created or raw or not _touches(update_fields, "status"):
+        return
+    _refresh_sales(instance.items.values_list("product_id", flat=True))
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def comment_changed(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw or not _touches(update_fields, "status", "product"):
+        return
+    refresh_product_stats(_affected_products(instance), fields=("approved_comments_count",))
+
+
+@receiver(m2m_changed, sender=Product.discounts.through)
+def product_discounts_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == "pre_clear" and reverse:
+        instance._cleared_product_ids = list(instance.products.values_list("pk", flat=True))
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    if not reverse:
+        refresh_product_prices([instance.pk])
+    elif action == "post_clear":
+        refresh_product_prices(getattr(instance, "_cleared_product_ids", ()))
+    else:
+        refresh_product_prices(pk_set)
+
+
+@receiver(post_save, sender=Discount)
+def discount_saved(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    if created or raw or not _touches(update_fields, "discount"):
+        return
+    refresh_product_prices(instance.products.values_list("pk", flat=True))
+
+
+@receiver(pre_delete, sender=Discount)
+def remember_discounted_products(sender, instance, **kwargs):
+    # The through rows are cascaded without m2m_changed
+    instance._product_ids = list(instance.products.values_list("pk", flat=True))
+
+
+@receiver(post_delete, sender=Discount)
+def discount_deleted(sender, instance, **kwargs):
+    refresh_product_prices(getattr(instance, "_product_ids", ()))
+
+
+@receiver(post_migrate)
+def restore_search_indexes(sender, using="default", **kwargs):
+    # SQLite migrations that rebuild store_product/store_comment drop their triggers.
+    if sender.name == "store":
+        install_search_indexes(connections[using])
+
+
+# Writes that change what the cached catalog responses contain; order items
+# count as order data since they feed total_sold.
+CACHE_VERSIONED_MODELS = {
+    Product: Product,
+    Category: Category,
+    Discount: Discount,
+    Comment: Comment,
+    Order: Order,
+    OrderItem: Order,
+    Product.discounts.through: Product,
+}
+
+
+def bump_cached_version(sender, raw=False, action="post", **kwargs):
+    # After commit: bumped any earlier, a concurrent reader could cache rows
+    # from before the write under the new version
+    if not raw and action.startswith("post"):
+        model = CACHE_VERSIONED_MODELS[sender]
+        transaction.on_commit(lambda: bump_data_version(model), robust=True)
+
+
+for _model in CACHE_VERSIONED_MODELS:
+    if _model is Product.discounts.through:
+        m2m_changed.connect(bump_cached_version, sender=_model, dispatch_uid="store-cache-m2m")
+        continue
+    post_save.connect(bump_cached_version, sender=_model, dispatch_uid=f"store-cache-save-{_model.__name__}")
+    post_delete.connect(bump_cached_version, sender=_model, dispatch_uid=f"store-cache-delete-{_model.__name__}")
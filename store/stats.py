@@ -0,0 +1,162 @@
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.db.models import Avg, Count, Max, Min, OuterRef, Q, Subquery, Sum
+
+from .models import Category, CategorySummary, Comment, Order, OrderItem, Product, ProductStats
+
+STATS_FIELDS = ("total_sold", "approved_comments_count")
+
+
+def _sold_by_product(product_ids):
+    return dict(
+        OrderItem.objects
+        .filter(product_id__in=product_ids, order__status=Order.ORDER_STATUS_PAID)
+        .values("product_id")
+        .annotate(total=Sum("quantity"))
+        .values_list("product_id", "total")
+    )
+
+
+def _approved_comments_by_product(product_ids):
+    return dict(
+        Comment.approved
+        .filter(product_id__in=product_ids)
+        .values("product_id")
+        .annotate(total=Count("id"))
+        .values_list("product_id", "total")
+    )
+
+
+def refresh_product_stats(product_ids, fields=STATS_FIELDS):
+    # Recompute only the touched products; each aggregate is driven by the FK index.
+    product_ids = {pk for pk in product_ids if pk is not None}
+    if not product_ids:
+        return 0
+    fields = [f for f in STATS_FIELDS if f in fields]
+    existing = list(Product.objects.filter(pk__in=product_ids).values_list("pk", flat=True))
+    if not existing:
+        return 0
+
+    values = {}
+    if "total_sold" in fields:
+        values["total_sold"] = _sold_by_product(existing)
+    if "approved_comments_count" in fields:
+        values["approved_comments_count"] = _approved_comments_by_product(existing)
+
+    rows = [
+        ProductStats(product_id=pk, **{f: values[f].get(pk) or 0 for f in fields})
+        for pk in existing
+    ]
+    ProductStats.objects.bulk_create(
+        rows,
+        update_conflicts=True,
+        unique_fields=["product"],
+        update_fields=fields,
+    )
+    return len(rows)
+
+
+def ensure_product_stats(product_ids):
+    ProductStats.objects.bulk_create(
+        [ProductStats(product_id=pk) for pk in product_ids],
+        ignore_conflicts=True,
+    )
+
+
+def rebuild_product_stats(batch_size=1000):
+    total = 0
+    last_pk = 0
+    while True:
+        chunk = list(
+            Product.objects
+            .filter(pk__gt=last_pk)
+            .order_by("pk")
+            .values_list("pk", flat=True)[:batch_size]
+        )
+        if not chunk:
+            break
+        total += refresh_product_stats(chunk)
+        last_pk = chunk[-1]
+    return total
+
+
+def _cents(value):
+    if value is None:
+        return None
+    return Decimal(str(value)).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+
+
+def _first_product_id(*ordering):
+    return Subquery(
+        Product.objects.filter(category=OuterRef("pk")).order_by(*ordering).values("id")[:1]
+    )
+
+
+def refresh_top_products(category_ids):
+    category_ids = {pk for pk in category_ids if pk is not None}
+    if not category_ids:
+        return 0
+    return Category.objects.filter(pk__in=category_ids).update(
+        top_product=_first_product_id("-stats__total_sold", "pk")
+    )
+
+
+def refresh_category_summaries(category_ids):
+    # Scoped to the given categories, so a product save never scans store_product.
+    category_ids = {pk for pk in category_ids if pk is not None}
+    if not category_ids:
+        return 0
+    categories = (
+        Category.objects
+        .filter(pk__in=category_ids)
+        .annotate(
+            product_count=Count("products"),
+            in_stock_count=Count("products", filter=Q(products__inventory__gt=0)),
+            min_price=Min("products__unit_price"),
+            max_price=Max("products__unit_price"),
+            avg_price=Avg("products__unit_price"),
+            cheapest_product_id=_first_product_id("unit_price", "pk"),
+            priciest_product_id=_first_product_id("-unit_price", "pk"),
+        )
+    )
+    rows = [
+        CategorySummary(
+            category_id=category.pk,
+            product_count=category.product_count,
+            in_stock_count=category.in_stock_count,
+            min_price=_cents(category.min_price),
+            max_price=_cents(category.max_price),
+            avg_price=_cents(category.avg_price),
+            cheapest_product_id=category.cheapest_product_id,
+            priciest_product_id=category.priciest_product_id,
+        )
+        for category in categories
+    ]
+    CategorySummary.objects.bulk_create(
+        rows,
+        update_conflicts=True,
+        unique_fields=["category"],
+        update_fields=[
+            "product_count", "in_stock_count", "min_price", "max_price", "avg_price",
+            "cheapest_product", "priciest_product",
+        ],
+    )
+    refresh_top_products(category_ids)
+    return len(rows)
+
+
+def rebuild_category_summaries(batch_size=200):
+    total = 0
+    last_pk = 0
+    while True:
+        chunk = list(
+            Category.objects
+            .filter(pk__gt=last_pk)
+            .order_by("pk")
+            .values_list("pk", flat=True)[:batch_size]
+        )
+        if not chunk:
+            break
+        total += refresh_category_summaries(chunk)
+        last_pk = chunk[-1]
+    return total
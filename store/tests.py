@@ -1,3 +1,1009 @@
-from django.test import TestCase
+import io
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from unittest.mock import patch
+from datetime import timedelta
+from decimal import Decimal
+from urllib.parse import parse_qs, urlparse
 
-# Create your tests here.
+from asgiref.sync import async_to_sync, iscoroutinefunction
+from django.contrib.auth import get_user_model
+from django.core.handlers.asgi import ASGIHandler
+from django.core.management import call_command
+from django.db import OperationalError, connection
+from django.db.models import Sum
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from .models import (
+    Cart, CartItem, Category, CategorySummary, Comment, Customer, Discount, Order, OrderItem, Product, ProductStats,
+)
+from .cache import response_cache
+from .carts import apply_cart_lines, expired_carts, purge_expired_carts
+from .checkout import InsufficientStock, checkout_cart
+from .dataset import DatasetGenerator
+from .indexing import explain, plan_issues, propose_index, try_index
+from .pricing import price_cart
+from .profiling import ProfilingMiddleware
+from .stats import rebuild_product_stats
+
+
+def make_product(category=None, name="Deep Learning Book", unit_price="10.00", inventory=5, **kwargs):
+    category = category or Category.objects.create(title="Books")
+    return Product.objects.create(
+        name=name,
+        category=category,
+        slug=name.lower().replace(" ", "-"),
+        description=kwargs.pop("description", "A book about AI."),
+        unit_price=Decimal(unit_price),
+        inventory=inventory,
+        **kwargs,
+    )
+
+
+class CatalogTestCase(TestCase):
+    # Data versions are bumped on commit, which never happens inside a
+    # TestCase: start every test from an empty response cache so responses
+    # cached by an earlier test are not served again.
+
+    def setUp(self):
+        response_cache().clear()
+
+
+class ProductStatsTests(CatalogTestCase):
+    def setUp(self):
+        super().setUp()
+        self.product = make_product()
+        self.customer = Customer.objects.create(first_name="Ada", last_name="L", email="a@x.io", phone_number="1")
+
+    def stats(self):
+        return ProductStats.objects.get(product=self.product)
+
+    def test_stats_row_created_with_product(self):
+        self.assertEqual(self.stats().total_sold, 0)
+
+    def test_total_sold_follows_order_status(self):
+        order = Order.objects.create(customer=self.customer)
+        OrderItem.objects.create(order=order, product=self.product, quantity=3, unit_price=Decimal("10.00"))
+        self.assertEqual(self.stats().total_sold, 0)
+        order.status = Order.ORDER_STATUS_PAID
+        order.save(update_fields=["status"])
+        self.assertEqual(self.stats().total_sold, 3)
+        order.status = Order.ORDER_STATUS_CANCELED
+        order.save()
+        self.assertEqual(self.stats().total_sold, 0)
+
+    def test_approved_comments_follow_status(self):
+        comment = Comment.objects.create(product=self.product, name="x", body="y")
+        self.assertEqual(self.stats().approved_comments_count, 0)
+        comment.status = Comment.COMMENT_STATUS_APPROVED
+        comment.save(update_fields=["status"])
+        self.assertEqual(self.stats().approved_comments_count, 1)
+        comment.delete()
+        self.assertEqual(self.stats().approved_comments_count, 0)
+
+    def test_moving_to_another_product_recounts_both(self):
+        other = make_product(self.product.category, name="Other Book")
+        comment = Comment.objects.create(
+            product=self.product, name="x", body="y", status=Comment.COMMENT_STATUS_APPROVED
+        )
+        order = Order.objects.create(customer=self.customer, status=Order.ORDER_STATUS_PAID)
+        item = OrderItem.objects.create(order=order, product=self.product, quantity=2, unit_price=Decimal("10.00"))
+        comment.product = other
+        comment.save()
+        item.product = other
+        item.save()
+        self.assertEqual((self.stats().approved_comments_count, self.stats().total_sold), (0, 0))
+        moved = ProductStats.objects.get(product=other)
+        self.assertEqual((moved.approved_comments_count, moved.total_sold), (1, 2))
+
+    def test_rebuild(self):
+        Comment.objects.create(product=self.product, name="x", body="y", status=Comment.COMMENT_STATUS_APPROVED)
+        ProductStats.objects.all().delete()
+        self.assertEqual(rebuild_product_stats(batch_size=1), 1)
+        self.assertEqual(self.stats().approved_comments_count, 1)
+
+    def test_product_without_stats_row_is_found(self):
+        # bulk_create skips the post_save signal, so no stats row until rebuild_stats
+        product, = Product.objects.bulk_create([
+            Product(name="Bulk", slug="bulk", category=self.product.category, unit_price=Decimal("3.00"), inventory=1)
+        ])
+        self.assertFalse(ProductStats.objects.filter(product=product).exists())
+        for url in [f"/api/products/{product.pk}/", f"/api/products/{product.pk}/?fields=id,name"]:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200, url)
+            self.assertEqual(response.json()["id"], product.pk)
+        self.assertEqual(self.client.get(f"/api/products/{product.pk}/").json()["total_sold"], 0)
+        response = async_to_sync(self.async_client.get)(f"/api/async/products/{product.pk}/")
+        self.assertEqual(response.status_code, 200)
+        rebuild_product_stats()
+        listed = [row["id"] for row in self.client.get("/api/products/").json()["results"]]
+        self.assertIn(product.pk, listed)
+
+    def test_fixture_product_gets_stats_row(self):
+        fixture = [{
+            "model": "store.product",
+            "pk": self.product.pk + 100,
+            "fields": {
+                "name": "Loaded", "slug": "loaded", "category": self.product.category.pk, "unit_price": "4.00",
+                "inventory": 2, "description": "", "datetime_created": "2026-01-01T00:00:00Z",
+                "datetime_modified": "2026-01-01T00:00:00Z",
+            },
+        }]
+        with tempfile.NamedTemporaryFile("w", suffix=".json") as handle:
+            json.dump(fixture, handle)
+            handle.flush()
+            call_command("loaddata", handle.name, verbosity=0)
+        self.assertTrue(ProductStats.objects.filter(product_id=self.product.pk + 100).exists())
+
+    def test_product_list_reads_stats(self):
+        Comment.objects.create(product=self.product, name="x", body="y", status=Comment.COMMENT_STATUS_APPROVED)
+        response = self.client.get("/api/products/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["results"][0]["approved_comments_count"], 1)
+
+
+class CategorySummaryTests(CatalogTestCase):
+    def setUp(self):
+        super().setUp()
+        self.books = Category.objects.create(title="Books")
+        self.courses = Category.objects.create(title="Courses")
+
+    def summary(self, category):
+        return CategorySummary.objects.get(category=category)
+
+    def test_summary_follows_product_writes(self):
+        cheap = make_product(self.books, name="Cheap Book", unit_price="5.00", inventory=0)
+        pricey = make_product(self.books, name="Pricey Book", unit_price="15.00")
+        summary = self.summary(self.books)
+        self.assertEqual(summary.product_count, 2)
+        self.assertEqual(summary.in_stock_count, 1)
+        self.assertEqual(summary.avg_price, Decimal("10.00"))
+        self.assertEqual(summary.cheapest_product_id, cheap.pk)
+        self.assertEqual(summary.priciest_product_id, pricey.pk)
+
+        pricey.category = self.courses
+        pricey.save()
+        self.assertEqual(self.summary(self.books).product_count, 1)
+        self.assertEqual(self.summary(self.courses).priciest_product_id, pricey.pk)
+
+        cheap.delete()
+        self.assertEqual(self.summary(self.books).product_count, 0)
+        self.assertIsNone(self.summary(self.books).min_price)
+
+    def test_top_product_is_best_seller(self):
+        first = make_product(self.books, name="First Book")
+        second = make_product(self.books, name="Second Book")
+        customer = Customer.objects.create(first_name="Ada", last_name="L", email="a@x.io", phone_number="1")
+        order = Order.objects.create(customer=customer, status=Order.ORDER_STATUS_PAID)
+        OrderItem.objects.create(order=order, product=second, quantity=2, unit_price=Decimal("10.00"))
+        self.books.refresh_from_db()
+        self.assertEqual(self.books.top_product_id, second.pk)
+        self.assertNotEqual(self.books.top_product_id, first.pk)
+
+    def test_category_list(self):
+        make_product(self.books, name="Cheap Book", unit_price="5.00")
+        response = self.client.get("/api/categories/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()[0]["product_count"], 1)
+        self.assertEqual(response.json()[0]["price_range"], "5.00 – 5.00")
+
+
+class KeysetPaginationTests(CatalogTestCase):
+    def setUp(self):
+        super().setUp()
+        category = Category.objects.create(title="Books")
+        prices = ["5.00", "5.00", "7.50", "9.99", "9.99", "9.99", "12.00"]
+        self.products = [
+            make_product(category, name=f"Product {i}", unit_price=price) for i, price in enumerate(prices)
+        ]
+
+    def walk(self, url):
+        seen, pages = [], 0
+        while url:
+            data = self.client.get(url).json()
+            seen.extend(row["id"] for row in data["results"])
+            url, pages = data["next"], pages + 1
+        return seen, pages
+
+    def test_walks_every_ordering_without_gaps(self):
+        for ordering in ["unit_price", "-unit_price", "-total_sold", "approved_comments_count", "-best_discount_percent"]:
+            seen, pages = self.walk(f"/api/products/?ordering={ordering}&page_size=2")
+            self.assertEqual(sorted(seen), sorted(p.pk for p in self.products), ordering)
+            self.assertEqual(len(seen), len(set(seen)), ordering)
+            self.assertEqual(pages, 4)
+
+    def test_previous_link_returns_prior_page(self):
+        first = self.client.get("/api/products/?ordering=unit_price&page_size=3").json()
+        second = self.client.get(first["next"]).json()
+        back = self.client.get(second["previous"]).json()
+        self.assertEqual([r["id"] for r in back["results"]], [r["id"] for r in first["results"]])
+
+    def test_tampered_cursor_is_rejected(self):
+        first = self.client.get("/api/products/?page_size=2").json()
+        cursor = parse_qs(urlparse(first["next"]).query)["cursor"][0]
+        self.assertEqual(self.client.get("/api/products/", {"cursor": cursor + "x"}).status_code, 404)
+        other_ordering = {"cursor": cursor, "ordering": "unit_price"}
+        self.assertEqual(self.client.get("/api/products/", other_ordering).status_code, 404)
+
+
+class FullTextSearchTests(CatalogTestCase):
+    def setUp(self):
+        super().setUp()
+        self.category = Category.objects.create(title="Books")
+        self.in_name = make_product(self.category, name="Transformers Explained", description="Attention models.")
+        self.in_body = make_product(self.category, name="Applied Deep Learning", description="Covers transformers.")
+        self.other = make_product(self.category, name="Classic Statistics", description="Regression.", inventory=0)
+
+    def search(self, **params):
+        return [row["id"] for row in self.client.get("/api/products/", params).json()["results"]]
+
+    def test_ranks_name_matches_first(self):
+        self.assertEqual(self.search(search="transformers"), [self.in_name.pk, self.in_body.pk])
+
+    def test_prefix_matches_last_term(self):
+        self.assertEqual(self.search(search="applied dee"), [self.in_body.pk])
+
+    def test_combines_with_filters_and_ordering(self):
+        self.assertEqual(self.search(search="regression", in_stock="true"), [])
+        self.assertEqual(
+            self.search(search="transformers", ordering="-total_sold"),
+            [self.in_body.pk, self.in_name.pk],
+        )
+
+    def test_index_follows_writes(self):
+        self.other.name = "Statistics for Transformers"
+        self.other.save()
+        self.assertIn(self.other.pk, self.search(search="transformers"))
+        self.in_name.delete()
+        self.assertNotIn(self.in_name.pk, self.search(search="transformers"))
+
+    def test_comment_search(self):
+        comment = Comment.objects.create(product=self.other, name="Reader", body="Loved the regression chapter")
+        Comment.objects.create(product=self.other, name="Reader", body="Too long")
+        response = self.client.get("/api/comments/", {"search": "regress"})
+        self.assertEqual([row["id"] for row in response.json()["results"]], [comment.pk])
+
+
+class CartPricingTests(CatalogTestCase):
+    def setUp(self):
+        super().setUp()
+        category = Category.objects.create(title="Books")
+        self.discounted = make_product(category, name="Discounted Book", unit_price="20.00")
+        self.plain = make_product(category, name="Full Price Book", unit_price="9.99")
+        self.discounted.discounts.add(
+            Discount.objects.create(discount=10, description="Autumn"),
+            Discount.objects.create(discount=25, description="Launch"),
+        )
+        self.cart = Cart.objects.create()
+
+    def add(self, product, quantity):
+        url = f"/api/carts/{self.cart.pk}/add_item/"
+        return self.client.post(url, {"product_id": product.pk, "quantity": quantity}, content_type="application/json")
+
+    def test_discounts_are_applied_per_line(self):
+        self.add(self.discounted, 2)
+        data = self.add(self.plain, 1).json()
+        lines = {line["product"]["id"]: line for line in data["items"]}
+        self.assertEqual(Decimal(str(lines[self.discounted.pk]["product"]["final_price"])), Decimal("15.00"))
+        self.assertEqual(Decimal(str(lines[self.discounted.pk]["total_price"])), Decimal("30.00"))
+        self.assertEqual(Decimal(str(lines[self.plain.pk]["total_price"])), Decimal("9.99"))
+        self.assertEqual(Decimal(str(data["total_price"])), Decimal("39.99"))
+        self.assertEqual(data["total_items"], 3)
+
+    def test_add_item_increments_existing_line(self):
+        self.add(self.plain, 1)
+        self.assertEqual(self.add(self.plain, 2).json()["total_items"], 3)
+        self.assertEqual(self.add(make_product(name="Missing Book"), 0).status_code, 400)
+
+    def test_query_count_does_not_grow_with_cart_size(self):
+        category = Category.objects.get(title="Books")
+        products = [make_product(category, name=f"Bulk Book {i}") for i in range(10)]
+        for product in products[:2]:
+            self.add(product, 1)
+        with self.assertNumQueries(2):
+            self.client.get(f"/api/carts/{self.cart.pk}/")
+        for product in products[2:]:
+            self.add(product, 1)
+        with self.assertNumQueries(2):
+            self.client.get(f"/api/carts/{self.cart.pk}/")
+        with self.assertNumQueries(4):
+            self.add(products[0], 1)
+
+
+class ResponseCacheTests(CatalogTestCase):
+    def setUp(self):
+        super().setUp()
+        self.product = make_product()
+
+    def test_hit_until_related_write(self):
+        first = self.client.get("/api/products/", {"ordering": "unit_price"})
+        second = self.client.get("/api/products/", {"ordering": "unit_price"})
+        self.assertEqual(first["X-Cache"], "MISS")
+        self.assertEqual(second["X-Cache"], "HIT")
+        self.assertEqual(first.json(), second.json())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Comment.objects.create(product=self.product, name="x", body="y", status=Comment.COMMENT_STATUS_APPROVED)
+        third = self.client.get("/api/products/", {"ordering": "unit_price"})
+        self.assertEqual(third["X-Cache"], "MISS")
+        self.assertEqual(third.json()["results"][0]["approved_comments_count"], 1)
+
+    def test_discount_m2m_invalidates(self):
+        self.client.get(f"/api/products/{self.product.pk}/")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product.discounts.add(Discount.objects.create(discount=50, description="Half"))
+        response = self.client.get(f"/api/products/{self.product.pk}/")
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(response.json()["best_discount_percent"], "50.00")
+
+    def test_query_params_are_normalized(self):
+        self.client.get("/api/products/?in_stock=true&ordering=unit_price")
+        response = self.client.get("/api/products/?ordering=unit_price&in_stock=true&search=")
+        self.assertEqual(response["X-Cache"], "HIT")
+
+
+class ConditionalGetTests(CatalogTestCase):
+    def setUp(self):
+        super().setUp()
+        self.product = make_product()
+
+    def test_list_not_modified_without_building_queryset(self):
+        response = self.client.get("/api/products/")
+        etag = response["ETag"]
+        self.assertIn("Last-Modified", response)
+        with self.assertNumQueries(1):
+            cached = self.client.get("/api/products/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(cached.status_code, 304)
+        self.assertEqual(cached.content, b"")
+
+        self.product.unit_price = Decimal("11.00")
+        self.product.save()
+        self.assertEqual(self.client.get("/api/products/", HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_detail_and_categories_honor_validators(self):
+        detail = self.client.get(f"/api/products/{self.product.pk}/")
+        self.assertEqual(
+            self.client.get(f"/api/products/{self.product.pk}/", HTTP_IF_MODIFIED_SINCE=detail["Last-Modified"]).status_code,
+            304,
+        )
+        categories = self.client.get("/api/categories/")
+        self.assertEqual(self.client.get("/api/categories/", HTTP_IF_NONE_MATCH=categories["ETag"]).status_code, 304)
+        self.assertEqual(self.client.get("/api/categories/?ordering=min_price", HTTP_IF_NONE_MATCH=categories["ETag"]).status_code, 200)
+
+    def test_comment_approval_changes_etag(self):
+        etag = self.client.get("/api/products/")["ETag"]
+        with self.captureOnCommitCallbacks(execute=True):
+            Comment.objects.create(product=self.product, name="x", body="y", status=Comment.COMMENT_STATUS_APPROVED)
+        self.assertNotEqual(self.client.get("/api/products/")["ETag"], etag)
+
+
+class CartBulkItemsTests(CatalogTestCase):
+    def setUp(self):
+        super().setUp()
+        category = Category.objects.create(title="Books")
+        self.products = [make_product(category, name=f"Bundle Book {i}") for i in range(12)]
+        self.cart = Cart.objects.create()
+        self.url = f"/api/carts/{self.cart.pk}/bulk_items/"
+
+    def post(self, items):
+        return self.client.post(self.url, {"items": items}, content_type="application/json")
+
+    def test_add_set_remove_in_one_request(self):
+        first, second, third = self.products[:3]
+        self.post([{"product_id": first.pk, "quantity": 2}, {"product_id": second.pk}])
+        data = self.post([
+            {"product_id": first.pk, "quantity": 3},
+            {"product_id": second.pk, "op": "remove"},
+            {"product_id": third.pk, "quantity": 5, "op": "set"},
+        ]).json()
+        quantities = {line["product"]["id"]: line["quantity"] for line in data["items"]}
+        self.assertEqual(quantities, {first.pk: 5, third.pk: 5})
+        self.assertEqual(data["total_items"], 10)
+
+    def test_unknown_product_rejects_whole_batch(self):
+        response = self.post([{"product_id": self.products[0].pk}, {"product_id": 999999}])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["product_ids"], [999999])
+        self.assertFalse(CartItem.objects.filter(cart=self.cart).exists())
+
+    def test_query_count_is_independent_of_batch_size(self):
+        with self.assertNumQueries(7):
+            self.post([{"product_id": p.pk} for p in self.products[:2]])
+        with self.assertNumQueries(7):
+            self.post([{"product_id": p.pk, "quantity": 2, "op": "set"} for p in self.products])
+
+
+class CheckoutTests(CatalogTestCase):
+    def setUp(self):
+        super().setUp()
+        self.customer = Customer.objects.create(first_name="Ada", last_name="L", email="a@x.io", phone_number="1")
+        category = Category.objects.create(title="Books")
+        self.book = make_product(category, name="Checkout Book", unit_price="20.00", inventory=3)
+        self.book.discounts.add(Discount.objects.create(discount=25, description="Launch"))
+        self.other = make_product(category, name="Other Book", unit_price="5.00", inventory=1)
+        self.cart = Cart.objects.create()
+
+    def checkout(self):
+        return self.client.post(
+            f"/api/carts/{self.cart.pk}/checkout/", {"customer_id": self.customer.pk}, content_type="application/json"
+        )
+
+    def test_creates_order_with_snapshot_prices(self):
+        apply_cart_lines(self.cart, [("add", self.book.pk, 2), ("add", self.other.pk, 1)])
+        response = self.checkout()
+        self.assertEqual(response.status_code, 201)
+        items = {item["product"]: item for item in response.json()["items"]}
+        self.assertEqual(items[self.book.pk]["unit_price"], "15.00")
+        self.assertEqual(items[self.book.pk]["quantity"], 2)
+        self.book.refresh_from_db()
+        self.assertEqual(self.book.inventory, 1)
+        self.assertFalse(self.cart.items.exists())
+
+    def test_reserving_stock_touches_the_product(self):
+        stale = timezone.now() - timedelta(days=1)
+        Product.objects.filter(pk=self.book.pk).update(datetime_modified=stale)
+        apply_cart_lines(self.cart, [("add", self.book.pk, 1)])
+        self.assertEqual(self.checkout().status_code, 201)
+        self.book.refresh_from_db()
+        self.assertGreater(self.book.datetime_modified, stale)
+
+    def test_shortfall_rolls_back_every_line(self):
+        apply_cart_lines(self.cart, [("add", self.book.pk, 1), ("add", self.other.pk, 2)])
+        response = self.checkout()
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()["product_ids"], [self.other.pk])
+        self.book.refresh_from_db()
+        self.assertEqual(self.book.inventory, 3)
+        self.assertFalse(Order.objects.exists())
+        self.assertEqual(self.cart.items.count(), 2)
+
+    def test_empty_cart(self):
+        self.assertEqual(self.checkout().status_code, 400)
+
+    def test_lines_changed_after_pricing_stay_in_cart(self):
+        from . import checkout
+
+        apply_cart_lines(self.cart, [("add", self.book.pk, 1), ("add", self.other.pk, 1)])
+
+        def price_then_edit(cart_id):
+            priced = price_cart(cart_id)
+            # Writes that land between pricing and the cart being cleared
+            self.cart.items.filter(product=self.book).update(quantity=2)
+            CartItem.objects.create(cart=self.cart, product=make_product(name="Late Book"), quantity=1)
+            return priced
+
+        with patch.object(checkout, "price_cart", price_then_edit):
+            self.assertEqual(self.checkout().status_code, 201)
+        self.assertEqual(OrderItem.objects.count(), 2)
+        remaining = dict(self.cart.items.values_list("product__name", "quantity"))
+        self.assertEqual(remaining, {"Checkout Book": 1, "Late Book": 1})
+
+
+class CheckoutConcurrencyTests(TransactionTestCase):
+    threads = 8
+    checkouts_per_thread = 5
+    stock = 25
+
+    def test_hot_product_is_never_oversold(self):
+        customer = Customer.objects.create(first_name="Ada", last_name="L", email="a@x.io", phone_number="1")
+        hot = make_product(name="Hot Book", inventory=self.stock)
+        carts = []
+        for _ in range(self.threads * self.checkouts_per_thread):
+            cart = Cart.objects.create()
+            CartItem.objects.create(cart=cart, product=hot, quantity=1)
+            carts.append(cart)
+
+        outcomes = []
+        lock = threading.Lock()
+
+        def worker(chunk):
+            try:
+                for cart in chunk:
+                    for _ in range(50):
+                        try:
+                            checkout_cart(cart, customer)
+                            result = "ok"
+                        except InsufficientStock:
+                            result = "short"
+                        except OperationalError:
+                            # SQLite allows one writer at a time; retry like a client would
+                            time.sleep(0.005)
+                            continue
+                        break
+                    else:
+                        result = "gave-up"
+                    with lock:
+                        outcomes.append(result)
+            finally:
+                connection.close()
+
+        workers = [
+            threading.Thread(target=worker, args=(carts[i::self.threads],)) for i in range(self.threads)
+        ]
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+
+        hot.refresh_from_db()
+        self.assertNotIn("gave-up", outcomes)
+        self.assertEqual(outcomes.count("ok"), self.stock)
+        self.assertEqual(hot.inventory, 0)
+        self.assertEqual(OrderItem.objects.filter(product=hot).count(), self.stock)
+
+
+class AsyncCatalogTests(CatalogTestCase):
+    def setUp(self):
+        super().setUp()
+        category = Category.objects.create(title="Books")
+        self.products = [make_product(category, name=f"Async Book {i}", unit_price=f"{i + 1}.00") for i in range(3)]
+        Discount.objects.create(discount=15, description="Autumn").products.add(self.products[0])
+
+    async def test_matches_sync_routes(self):
+        for sync_url, async_url in [
+            ("/api/products/?ordering=unit_price&page_size=2", "/api/async/products/?ordering=unit_price&page_size=2"),
+            (f"/api/products/{self.products[0].pk}/", f"/api/async/products/{self.products[0].pk}/"),
+            ("/api/categories/", "/api/async/categories/"),
+            ("/api/discounts/", "/api/async/discounts/"),
+        ]:
+            expected = (await self.async_client.get(sync_url)).json()
+            response = await self.async_client.get(async_url)
+            self.assertEqual(response.status_code, 200)
+            data = response.json()
+            if "results" in expected:
+                self.assertEqual(data["results"], expected["results"], async_url)
+                self.assertEqual(bool(data["next"]), bool(expected["next"]))
+            else:
+                self.assertEqual(data, expected, async_url)
+
+    async def test_errors(self):
+        self.assertEqual((await self.async_client.get("/api/async/products/999999/")).status_code, 404)
+        self.assertEqual((await self.async_client.get("/api/async/products/?cursor=bogus")).status_code, 404)
+        self.assertEqual((await self.async_client.post("/api/async/products/")).status_code, 405)
+
+    async def test_detail_applies_filters(self):
+        other = await Category.objects.acreate(title="Toys")
+        product = self.products[0]
+        for query in [f"category={other.pk}", f"category={product.category_id}", "fields=bogus", "search=Async"]:
+            expected = await self.async_client.get(f"/api/products/{product.pk}/?{query}")
+            response = await self.async_client.get(f"/api/async/products/{product.pk}/?{query}")
+            self.assertEqual(response.status_code, expected.status_code, query)
+            self.assertEqual(response.json(), expected.json(), query)
+        self.assertEqual(response.status_code, 200)
+
+
+class DatasetBenchmarkTests(CatalogTestCase):
+    counts = {"categories": 3, "products": 40, "discounts": 4, "customers": 10,
+              "order_items": 120, "comments": 60, "carts": 5}
+
+    def test_generated_dataset_is_seeded_and_denormalized(self):
+        DatasetGenerator(seed=7).generate(**self.counts)
+        self.assertEqual(Product.objects.count(), 40)
+        self.assertEqual(OrderItem.objects.count(), 120)
+        self.assertEqual(ProductStats.objects.count(), 40)
+        self.assertEqual(CategorySummary.objects.aggregate(n=Sum("product_count"))["n"], 40)
+        self.assertFalse(Order.objects.filter(items__isnull=True).exists())
+
+        fields = ("name", "description", "unit_price", "inventory")
+        first = list(Product.objects.order_by("pk").values_list(*fields))
+        last_pk = Product.objects.latest("pk").pk
+        DatasetGenerator(seed=7).generate(**self.counts)
+        self.assertEqual(list(Product.objects.filter(pk__gt=last_pk).order_by("pk").values_list(*fields)), first)
+
+    def test_benchmark_writes_route_results(self):
+        DatasetGenerator(seed=1).generate(**self.counts)
+        with tempfile.TemporaryDirectory() as tmp:
+            output = os.path.join(tmp, "results.json")
+            call_command("benchmark_endpoints", iterations=2, warmup=0, output=output, stdout=open(os.devnull, "w"))
+            with open(output) as fh:
+                report = json.load(fh)
+        routes = {row["name"]: row for row in report["routes"]}
+        self.assertEqual(report["dataset"]["store.Product"], 40)
+        self.assertIn("carts-bulk-items", routes)
+        self.assertIn("products-facets", routes)
+        self.assertIn("products-list-fields", routes)
+        self.assertTrue(all(not row["errors"] for row in routes.values()))
+        self.assertEqual(routes["products-list"]["queries"], 2)
+
+    def test_benchmark_write_routes(self):
+        DatasetGenerator(seed=1).generate(**self.counts)
+        with tempfile.TemporaryDirectory() as tmp:
+            output = os.path.join(tmp, "results.json")
+            call_command(
+                "benchmark_endpoints", iterations=2, warmup=0, output=output, writes=True,
+                only=["comments-", "carts-list"], stdout=open(os.devnull, "w"),
+            )
+            with open(output) as fh:
+                routes = {row["name"]: row for row in json.load(fh)["routes"]}
+        for name in ("carts-list", "comments-approve", "comments-reject", "comments-bulk-approve",
+                     "comments-bulk-reject"):
+            self.assertIn(name, routes)
+        self.assertTrue(all(not row["errors"] for row in routes.values()))
+        # Reset between calls, so the last timed bulk call still updated rows
+        self.assertGreater(routes["comments-bulk-approve"]["queries"], 2)
+
+    def test_serializer_benchmark_runs(self):
+        DatasetGenerator(seed=1).generate(**self.counts)
+        out = io.StringIO()
+        call_command("benchmark_serializers", rows=[10], iterations=1, stdout=out)
+        self.assertIn("ProductViewSet", out.getvalue())
+        self.assertIn("CategoryViewSet", out.getvalue())
+
+
+@override_settings(STORE_PROFILING={"SAMPLE_RATE": 1.0, "DUPLICATE_THRESHOLD": 3})
+class ProfilingMiddlewareTests(CatalogTestCase):
+    def setUp(self):
+        super().setUp()
+        self.category = Category.objects.create(title="Books")
+        self.products = [make_product(self.category, name=f"Book {n}") for n in range(4)]
+
+    def test_sampled_request_reports_server_timing_and_log(self):
+        with self.assertLogs("store.profiling", level="INFO") as logs:
+            response = self.client.get("/api/products/")
+        metrics = dict(part.strip().split(";", 1) for part in response["Server-Timing"].split(","))
+        self.assertIn("db", metrics)
+        self.assertIn("serialize", metrics)
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(record["path"], "/api/products/")
+        self.assertEqual(record["queries"], 2)
+        self.assertGreater(record["serializer_ms"], 0)
+        self.assertEqual(record["duplicates"], [])
+
+    def test_repeated_statements_are_flagged(self):
+        def n_plus_one(request):
+            for product in self.products:
+                Product.objects.get(pk=product.pk)
+            return HttpResponse()
+
+        with self.assertLogs("store.profiling", level="WARNING") as logs:
+            response = ProfilingMiddleware(n_plus_one)(RequestFactory().get("/anything/"))
+        self.assertIn("dupes", response["Server-Timing"])
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(record["duplicates"][0]["count"], 4)
+
+    @override_settings(STORE_PROFILING={"SAMPLE_RATE": 0})
+    def test_unsampled_requests_are_untouched(self):
+        response = self.client.get("/api/products/")
+        self.assertNotIn("Server-Timing", response)
+
+    @override_settings(DEBUG=True)
+    def test_not_adapted_under_asgi(self):
+        with self.assertLogs("django.request", level="DEBUG") as logs:
+            logging.getLogger("django.request").debug("loading middleware")
+            ASGIHandler().load_middleware(is_async=True)
+        self.assertFalse([line for line in logs.output if "ProfilingMiddleware" in line])
+
+    def test_async_requests_are_profiled(self):
+        async def view(request):
+            return HttpResponse()
+
+        middleware = ProfilingMiddleware(view)
+        self.assertTrue(iscoroutinefunction(middleware))
+        with self.assertLogs("store.profiling", level="INFO"):
+            response = async_to_sync(middleware)(RequestFactory().get("/anything/"))
+        self.assertIn("total", response["Server-Timing"])
+        with override_settings(STORE_PROFILING={"SAMPLE_RATE": 0}):
+            response = async_to_sync(middleware)(RequestFactory().get("/anything/"))
+        self.assertNotIn("Server-Timing", response)
+
+    async def test_async_client_counts_queries(self):
+        # The async routes query from a worker thread, not the event loop's
+        with self.assertLogs("store.profiling", level="INFO") as logs:
+            response = await self.async_client.get("/api/async/products/")
+        self.assertEqual(response.status_code, 200)
+        self.assertGreater(json.loads(logs.records[0].getMessage())["queries"], 0)
+        self.assertNotIn('desc="0 queries"', response["Server-Timing"])
+
+
+@override_settings(STORE_RESPONSE_CACHE={"ENABLED": False})
+class FastSerializerParityTests(CatalogTestCase):
+    def setUp(self):
+        super().setUp()
+        books = Category.objects.create(title="Books", description="Paper")
+        Category.objects.create(title="Empty")
+        long_text = "  " + "word " * 40
+        products = [
+            make_product(books, name="Cheap Book", unit_price="0.05", inventory=0, description=""),
+            make_product(books, name="Odd Cents Book", unit_price="19.99", description=long_text),
+            make_product(books, name="Pricey Book", unit_price="9999.95", inventory=3),
+        ]
+        half = Discount.objects.create(discount=12.5, description="Odd")
+        third = Discount.objects.create(discount=33.3, description="Third")
+        products[1].discounts.add(half, third)
+        products[2].discounts.add(half)
+        rebuild_product_stats()
+
+    def assert_parity(self, viewset, path):
+        fast = self.client.get(path)
+        with patch.object(viewset, "fast_serializer_class", None):
+            regular = self.client.get(path)
+        self.assertEqual(fast.status_code, 200)
+        self.assertEqual(fast.content, regular.content)
+
+    def test_product_list_matches_model_serializer(self):
+        from .views import ProductViewSet
+
+        self.assert_parity(ProductViewSet, "/api/products/")
+        self.assert_parity(ProductViewSet, "/api/products/?ordering=-unit_price&page_size=2")
+        self.assert_parity(ProductViewSet, "/api/products/?fields=short_description,final_price,tax,category")
+
+    def test_category_list_matches_model_serializer(self):
+        from .views import CategoryViewSet
+
+        self.assert_parity(CategoryViewSet, "/api/categories/")
+
+
+class CommentModerationTests(CatalogTestCase):
+    def setUp(self):
+        super().setUp()
+        self.book = make_product()
+        self.toy = make_product(self.book.category, name="Toy")
+        self.comments = [
+            Comment.objects.create(product=product, name="x", body="y")
+            for product in (self.book, self.book, self.book, self.toy)
+        ]
+        self.client.force_login(get_user_model().objects.create_user("mod", is_staff=True))
+
+    def approved(self, product):
+        return ProductStats.objects.get(product=product).approved_comments_count
+
+    def test_bulk_approve_by_ids_updates_counters(self):
+        ids = [c.pk for c in self.comments[:2]] + [self.comments[3].pk]
+        response = self.client.post("/api/comments/bulk-approve/", {"ids": ids}, content_type="application/json")
+        self.assertEqual(response.json()["updated"], 3)
+        self.assertEqual((self.approved(self.book), self.approved(self.toy)), (2, 1))
+
+        # Already approved comments are not touched again
+        response = self.client.post("/api/comments/bulk-approve/", {"ids": ids}, content_type="application/json")
+        self.assertEqual(response.json()["updated"], 0)
+
+    def test_bulk_reject_by_filter(self):
+        Comment.objects.filter(product=self.book).update(status=Comment.COMMENT_STATUS_APPROVED)
+        rebuild_product_stats()
+        response = self.client.post(
+            "/api/comments/bulk-reject/", {"product": self.book.pk}, content_type="application/json",
+        )
+        self.assertEqual(response.json()["updated"], 3)
+        self.assertEqual(self.approved(self.book), 0)
+        self.assertEqual(Comment.objects.get(pk=self.comments[3].pk).status, Comment.COMMENT_STATUS_WAITING)
+
+    def test_bulk_moderation_needs_criteria_and_staff(self):
+        response = self.client.post("/api/comments/bulk-approve/", {}, content_type="application/json")
+        self.assertEqual(response.status_code, 400)
+        self.client.logout()
+        response = self.client.post("/api/comments/bulk-approve/", {"status": "w"}, content_type="application/json")
+        self.assertIn(response.status_code, (401, 403))
+        self.assertFalse(Comment.approved.exists())
+
+    def test_bulk_moderation_invalidates_cached_listings(self):
+        listing = self.client.get("/api/products/?ordering=unit_price").json()
+        self.assertEqual(listing["results"][0]["approved_comments_count"], 0)
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            self.client.post("/api/comments/bulk-approve/", {"status": "w"}, content_type="application/json")
+        self.assertTrue(callbacks)
+        first = self.client.get("/api/products/?ordering=unit_price").json()["results"][0]
+        self.assertEqual(first["approved_comments_count"], 3)
+
+
+class IndexAdvisorTests(CatalogTestCase):
+    def test_partial_index_for_status_filter(self):
+        with CaptureQueriesContext(connection) as captured:
+            list(Order.objects.filter(status=Order.ORDER_STATUS_PAID).order_by("-datetime_created")[:20])
+        sql = captured.captured_queries[-1]["sql"]
+        issues = plan_issues(sql, explain(sql))
+        self.assertEqual([(i.kind, i.table) for i in issues], [("scan", "store_order"), ("temp-btree", "store_order")])
+
+        model, index = propose_index(sql, issues[0])
+        self.assertIs(model, Order)
+        self.assertEqual(index.fields, ["-datetime_created"])
+        self.assertEqual(dict(index.condition.children), {"status": Order.ORDER_STATUS_PAID})
+        self.assertTrue(try_index(model, index, sql))
+        # The trial index is rolled back
+        self.assertFalse(any(index.name in detail for _, _, detail in explain(sql)))
+
+    def test_command_reports_routes(self):
+        out = io.StringIO()
+        call_command("advise_indexes", query=["comment?search=good", "cart"], min_rows=0, stdout=out)
+        self.assertIn("cart? [200]: SCAN store_cart", out.getvalue())
+
+
+class CartPurgeTests(CatalogTestCase):
+    def setUp(self):
+        super().setUp()
+        self.product = make_product()
+        now = timezone.now()
+        self.fresh = Cart.objects.create()
+        self.idle_full = Cart.objects.create(last_activity_at=now - timedelta(days=10))
+        self.old_full = Cart.objects.create(last_activity_at=now - timedelta(days=40))
+        self.idle_empty = Cart.objects.create(last_activity_at=now - timedelta(days=3))
+        for cart in (self.fresh, self.idle_full, self.old_full):
+            CartItem.objects.create(cart=cart, product=self.product, quantity=1)
+
+    def test_purge_by_last_activity(self):
+        batches = list(purge_expired_carts(batch_size=1, ttl_days=30, empty_ttl_days=2))
+        self.assertEqual([(b["carts"], b["items"]) for b in batches], [(1, 1), (1, 0)])
+        self.assertEqual(set(Cart.objects.all()), {self.fresh, self.idle_full})
+        self.assertEqual(CartItem.objects.count(), 2)
+
+    def test_writes_refresh_activity(self):
+        self.client.post(f"/api/carts/{self.old_full.pk}/add_item/", {"product_id": self.product.pk})
+        self.client.post(
+            f"/api/carts/{self.idle_empty.pk}/bulk_items/", {"items": [{"product_id": self.product.pk}]},
+            content_type="application/json",
+        )
+        self.assertEqual(list(expired_carts(ttl_days=30, empty_ttl_days=2)), [])
+
+    def test_command(self):
+        out = io.StringIO()
+        call_command("purge_carts", days=30, empty_days=2, stdout=out)
+        self.assertIn("Purged 2 carts and 1 lines", out.getvalue())
+
+
+class EffectivePriceTests(CatalogTestCase):
+    def setUp(self):
+        super().setUp()
+        self.book = make_product(name="Priced Book", unit_price="40.00")
+        self.autumn = Discount.objects.create(discount=10, description="Autumn")
+
+    def prices(self, product):
+        product.refresh_from_db()
+        return product.best_discount_percent, product.effective_price
+
+    def test_follows_price_and_discounts(self):
+        self.assertEqual(self.prices(self.book), (0, Decimal("40.00")))
+        self.book.discounts.add(self.autumn)
+        self.assertEqual(self.prices(self.book), (10, Decimal("36.00")))
+
+        self.autumn.discount = 25
+        self.autumn.save()
+        self.assertEqual(self.prices(self.book), (25, Decimal("30.00")))
+
+        self.book.unit_price = Decimal("20.00")
+        self.book.save(update_fields=["unit_price"])
+        self.assertEqual(self.prices(self.book), (25, Decimal("15.00")))
+
+        self.autumn.products.clear()
+        self.assertEqual(self.prices(self.book), (0, Decimal("20.00")))
+        self.autumn.products.add(self.book)
+        self.autumn.delete()
+        self.assertEqual(self.prices(self.book), (0, Decimal("20.00")))
+
+    def test_filter_and_order_by_effective_price(self):
+        cheap = make_product(self.book.category, name="Cheap Book", unit_price="30.00")
+        self.book.discounts.add(Discount.objects.create(discount=50, description="Half"))
+        results = self.client.get("/api/products/?price_max=25").json()["results"]
+        self.assertEqual([row["id"] for row in results], [self.book.pk])
+        self.assertEqual(results[0]["final_price"], "20.00")
+        results = self.client.get("/api/products/?ordering=-effective_price").json()["results"]
+        self.assertEqual([row["id"] for row in results], [cheap.pk, self.book.pk])
+        results = self.client.get("/api/products/?list_price_min=35").json()["results"]
+        self.assertEqual([row["id"] for row in results], [self.book.pk])
+
+    def test_bulk_created_products_are_priced_by_rebuild(self):
+        product, = Product.objects.bulk_create([
+            Product(name="Bulk", slug="bulk", category=self.book.category, unit_price=Decimal("8.00"), inventory=1)
+        ])
+        self.assertEqual(self.prices(product), (0, Decimal("0")))
+        stale = timezone.now() - timedelta(days=1)
+        Product.objects.filter(pk=product.pk).update(datetime_modified=stale)
+        call_command("rebuild_product_prices", stdout=io.StringIO())
+        self.assertEqual(self.prices(product), (0, Decimal("8.00")))
+        self.assertGreater(product.datetime_modified, stale)
+
+
+class ProductFacetsTests(CatalogTestCase):
+    def setUp(self):
+        super().setUp()
+        self.books = Category.objects.create(title="Books")
+        self.games = Category.objects.create(title="Games")
+        make_product(self.books, name="Cheap Book", unit_price="8.00")
+        make_product(self.books, name="Mid Book", unit_price="30.00", inventory=0)
+        make_product(self.books, name="Big Book", unit_price="120.00")
+        make_product(self.games, name="Board Game", unit_price="40.00")
+
+    def facets(self, **params):
+        return self.client.get("/api/products/facets/", params).json()
+
+    def test_counts_without_filters(self):
+        data = self.facets()
+        self.assertEqual(data["count"], 4)
+        self.assertEqual(
+            [(row["title"], row["count"]) for row in data["facets"]["category"]],
+            [("Books", 3), ("Games", 1)],
+        )
+        self.assertEqual([row["count"] for row in data["facets"]["price"]], [1, 0, 2, 0, 1])
+        self.assertEqual(data["facets"]["in_stock"], [{"value": True, "count": 3}, {"value": False, "count": 1}])
+
+    def test_each_facet_ignores_its_own_filter(self):
+        with CaptureQueriesContext(connection) as queries:
+            data = self.facets(category=self.books.pk, price_max=50, in_stock="true")
+        self.assertEqual(sum("GROUP BY" in query["sql"] for query in queries.captured_queries), 1)
+        self.assertEqual(data["count"], 1)
+        # In stock and at most 50, in any category
+        self.assertEqual(
+            [(row["title"], row["count"]) for row in data["facets"]["category"]],
+            [("Books", 1), ("Games", 1)],
+        )
+        # In stock Books, at any price
+        self.assertEqual([row["count"] for row in data["facets"]["price"]], [1, 0, 0, 0, 1])
+        # Books at most 50, in stock or not
+        self.assertEqual([row["count"] for row in data["facets"]["in_stock"]], [1, 1])
+
+    def test_search_and_cache(self):
+        data = self.facets(search="board")
+        self.assertEqual(data["count"], 1)
+        self.assertEqual([row["title"] for row in data["facets"]["category"]], ["Games"])
+        self.assertEqual(self.client.get("/api/products/facets/", {"search": "board"})["X-Cache"], "HIT")
+        with self.captureOnCommitCallbacks(execute=True):
+            make_product(self.games, name="Board Game Deluxe", unit_price="60.00")
+        self.assertEqual(self.facets(search="board")["count"], 2)
+
+    def test_rejects_invalid_filters(self):
+        self.assertEqual(self.client.get("/api/products/facets/", {"price_min": "cheap"}).status_code, 400)
+
+
+class SparseFieldsetTests(CatalogTestCase):
+    def setUp(self):
+        super().setUp()
+        self.product = make_product(name="Sparse Book", unit_price="12.00", description="Long text " * 50)
+
+    def test_trims_output_and_query(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get("/api/products/", {"fields": "unit_price,name", "ordering": "unit_price"})
+        self.assertEqual(response.json()["results"], [{"name": "Sparse Book", "unit_price": "12.00"}])
+        sql = queries.captured_queries[-1]["sql"]
+        for skipped in ("store_productstats", "store_category", "description"):
+            self.assertNotIn(skipped, sql)
+
+    def test_keeps_what_the_ordering_needs(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get("/api/products/", {"fields": "id"})
+        self.assertEqual(response.json()["results"], [{"id": self.product.pk}])
+        self.assertIn("store_productstats", queries.captured_queries[-1]["sql"])
+
+    def test_detail_and_unknown_fields(self):
+        url = f"/api/products/{self.product.pk}/"
+        data = self.client.get(url, {"fields": "category_title,total_sold,is_in_stock"}).json()
+        self.assertEqual(data, {"category_title": "Books", "is_in_stock": True, "total_sold": 0})
+        response = self.client.get(url, {"fields": "name,secret"})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {"fields": ["Unknown field: secret"]})
+
+
+class ShortDescriptionTests(CatalogTestCase):
+    def test_database_cut_matches_python(self):
+        from .fast_serializers import short_description, short_description_expression
+
+        texts = [
+            "", "   ", "Short.", "\n\tTabbed intro\n", "x" * 120, "x" * 121,
+            " " + "word " * 40, "a" * 116 + "   tail" + "z" * 10, "é" * 130,
+        ]
+        category = Category.objects.create(title="Books")
+        for position, text in enumerate(texts):
+            make_product(category, name=f"Book number {position}", description=text)
+        rows = Product.objects.order_by("pk").annotate(short=short_description_expression()).values_list(
+            "description", "short"
+        )
+        for text, short in rows:
+            self.assertEqual(short, short_description(text), repr(text))
+
+    def test_list_defers_description(self):
+        product = make_product(description="Long course outline. " * 200)
+        with CaptureQueriesContext(connection) as queries:
+            row = self.client.get("/api/products/").json()["results"][0]
+        self.assertNotIn("description", row)
+        self.assertTrue(row["short_description"].endswith("Long course..."))
+        self.assertNotIn('"store_product"."description" AS', queries.captured_queries[-1]["sql"])
+
+        detail = self.client.get(f"/api/products/{product.pk}/").json()
+        self.assertEqual(detail["description"], product.description)
+        self.assertEqual(detail["short_description"], row["short_description"])
+        row = self.client.get("/api/products/", {"fields": "description"}).json()["results"][0]
+        self.assertEqual(row, {"description": product.description})
@@ -1,6 +1,7 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter, SimpleRouter
-from .views import CategoryViewSet, ProductViewSet, DiscountViewSet, CommentViewSet, CartViewSet
+from . import async_views
+from .views import CategoryViewSet, ProductViewSet, DiscountViewSet, CommentViewSet, CartViewSet, cache_stats
 
 router = DefaultRouter()
 router.register(r"categories", CategoryViewSet, basename="category")
@@ -10,5 +11,11 @@ router.register(r"comments", CommentViewSet, basename="comment")
 router.register(r"carts", CartViewSet, basename="cart")
 
 urlpatterns = [
+    path("cache/stats/", cache_stats, name="cache-stats"),
+    # Async ORM variants of the read-only catalog routes (served natively under ASGI)
+    path("async/products/", async_views.product_list, name="async-product-list"),
+    path("async/products/<int:pk>/", async_views.product_detail, name="async-product-detail"),
+    path("async/categories/", async_views.category_list, name="async-category-list"),
+    path("async/discounts/", async_views.discount_list, name="async-discount-list"),
     path("", include(router.urls)),
 ]
\ No newline at end of file
@@ -1,7 +1,8 @@
-from django.db.models import Count, Min, Max, Avg, Q, OuterRef, Subquery, Sum, F
+from django.db.models import Count, F, Max
 from django.db.models.functions import Coalesce
 from rest_framework import status
-from rest_framework.decorators import action
+from rest_framework.decorators import action, api_view, permission_classes
+from rest_framework.exceptions import ValidationError
 from rest_framework.filters import SearchFilter, OrderingFilter
 from rest_framework.generics import get_object_or_404
 from rest_framework.permissions import IsAdminUser
@@ -9,100 +10,158 @@ from rest_framework.response import Response
 from rest_framework.mixins import ListModelMixin, RetrieveModelMixin
 from rest_framework.viewsets import GenericViewSet, ModelViewSet, ReadOnlyModelViewSet
 from django_filters.rest_framework import DjangoFilterBackend
-from .models import Product, Order, Comment, Cart, Category, Customer, CartItem, Discount
-from .serializers import CategorySerializer, ProductSerializer, DiscountSerializer, CommentSerializer, CartSerializer
+from .models import Product, Order, Comment, Cart, Category, Customer, Discount
+from .serializers import (
+    CategorySerializer, ProductSerializer, DiscountSerializer, CommentSerializer, CartSerializer,
+    CartBulkUpdateSerializer, CommentModerationSerializer, OrderSerializer,
+)
 from .filters import ProductFilter
+from .carts import UnknownProducts, add_cart_line, apply_cart_lines, touch_cart
+from .checkout import EmptyCart, InsufficientStock, checkout_cart
+from .cache import CachedResponseMixin, stats as response_cache_stats
+from .conditional import ConditionalGetMixin
+from .facets import product_facets
+from .fieldsets import SparseFieldsetMixin
+from .moderation import moderate_comments
+from .fast_serializers import (
+    FastCategorySerializer, FastListMixin, FastProductSerializer, short_description_expression,
+)
+from .pagination import KeysetPagination
+from .search import FullTextSearchFilter, RankedOrderingFilter
 from django.shortcuts import render
+from core.audit import AuditMutationsMixin, audit
 
 
-class CategoryViewSet(ReadOnlyModelViewSet):
+class CategoryViewSet(ConditionalGetMixin, CachedResponseMixin, FastListMixin, ReadOnlyModelViewSet):
     serializer_class = CategorySerializer
+    fast_serializer_class = FastCategorySerializer
+    cache_models = (Category, Product)
     filter_backends = [OrderingFilter]
     ordering_fields = ["product_count", "min_price", "max_price", "avg_price"]
     ordering = ["-product_count"]
 
+    def get_content_modified(self, request, *args, **kwargs):
+        return Product.objects.aggregate(modified=Max("datetime_modified"))["modified"]
+
     def get_queryset(self):
-        cheapest_id = Subquery(
-            Product.objects.filter(category=OuterRef('pk')).order_by('unit_price').values('id')[:1]
-        )
-        priciest_id = Subquery(
-            Product.objects.filter(category=OuterRef('pk')).order_by('-unit_price').values('id')[:1]
-        )
+        # Aggregates are materialized in CategorySummary (see store/stats.py)
         return (
             Category.objects
             .annotate(
-                product_count=Count('products', distinct=True),
-                in_stock_count=Count('products', filter=Q(products__inventory__gt=0), distinct=True),
-                min_price=Min('products__unit_price'),
-                max_price=Max('products__unit_price'),
-                avg_price=Avg('products__unit_price'),
-                cheapest_product_id=cheapest_id,
-                priciest_product_id=priciest_id,
+                product_count=F("summary__product_count"),
+                in_stock_count=F("summary__in_stock_count"),
+                min_price=F("summary__min_price"),
+                max_price=F("summary__max_price"),
+                avg_price=F("summary__avg_price"),
+                cheapest_product_id=F("summary__cheapest_product_id"),
+                priciest_product_id=F("summary__priciest_product_id"),
             )
         )
 
 
-class ProductViewSet(ReadOnlyModelViewSet):
+class ProductViewSet(ConditionalGetMixin, CachedResponseMixin, SparseFieldsetMixin, FastListMixin, ReadOnlyModelViewSet):
     serializer_class = ProductSerializer
-    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
+    fast_serializer_class = FastProductSerializer
+    field_sources = FastProductSerializer.field_sources
+    # Lists carry short_description; the full text is only read for detail
+    deferred_fields = {"list": ("description",)}
+    cache_models = (Product, Category, Discount, Comment, Order)
+    filter_backends = [DjangoFilterBackend, FullTextSearchFilter, RankedOrderingFilter]
     filterset_class = ProductFilter
     search_fields = ["name", "description"]
-    ordering_fields = ["unit_price", "approved_comments_count", "total_sold", "best_discount_percent"]
+    ordering_fields = ["unit_price", "effective_price", "approved_comments_count", "total_sold", "best_discount_percent"]
     ordering = ["-total_sold"]
+    pagination_class = KeysetPagination
+    keyset_tie_breakers = {"total_sold": "stats__product", "approved_comments_count": "stats__product"}
+    cached_actions = ("list", "retrieve", "facets")
+    conditional_actions = ("list", "retrieve", "facets")
+
+    def get_content_modified(self, request, *args, **kwargs):
+        if self.action == "retrieve":
+            try:
+                modified = Product.objects.filter(pk=kwargs.get("pk")).values_list("datetime_modified", flat=True)
+                return modified.first()
+            except (TypeError, ValueError):
+                return None
+        return Product.objects.aggregate(modified=Max("datetime_modified"))["modified"]
 
     def get_queryset(self):
-        best_discount = Subquery(
-            Discount.objects
-            .filter(products__pk=OuterRef('pk'))
-            .order_by('-discount')
-            .values('discount')[:1]
-        )
-        
-        return (
-            Product.objects
-            .select_related("category")
-            .prefetch_related("discounts")
-            .annotate(
-                best_discount_percent=Coalesce(best_discount, 0.0),
-                approved_comments_count=Count(
-                    "comments",
-                    filter=Q(comments__status=Comment.COMMENT_STATUS_APPROVED),
-                    distinct=True
-                ),
-                total_sold=Coalesce(
-                    Sum("order_items__quantity", filter=Q(order_items__order__status=Order.ORDER_STATUS_PAID)),
-                    0
-                ),
-            )
-        )
+        queryset = Product.objects.all()
+        # None when every field is returned; otherwise only what the returned
+        # fields and the ordering read is joined, annotated and selected
+        sources = self.get_required_sources(queryset)
+        # Maintained incrementally in ProductStats (see store/stats.py)
+        stats = {"approved_comments_count": "stats__approved_comments_count", "total_sold": "stats__total_sold"}
+        listing = self.action == "list"
+        annotations = {
+            # A detail lookup left-joins the stats, so a product whose row is
+            # missing (bulk_create before rebuild_stats) is still found
+            **{name: F(path) if listing else Coalesce(F(path), 0) for name, path in stats.items()},
+            "short_description": short_description_expression(),
+        }
+        if sources is not None:
+            annotations = {name: value for name, value in annotations.items() if name in sources}
+        if listing and annotations.keys() & stats.keys():
+            # Every product gets a stats row on creation (fixtures included);
+            # the inner join lets SQLite walk the ProductStats indexes for
+            # best-seller ordering.
+            queryset = queryset.filter(stats__isnull=False)
+        if sources is None or "category__title" in sources:
+            queryset = queryset.select_related("category")
+        if annotations:
+            queryset = queryset.annotate(**annotations)
+        if sources is not None:
+            columns = {field.attname: field.name for field in Product._meta.concrete_fields}
+            only = [columns[source] for source in sources if source in columns]
+            if "category__title" in sources:
+                only.append("category__title")
+            queryset = queryset.only(*only)
+        return queryset
 
+    @action(detail=False)
+    def facets(self, request):
+        # Sidebar counts for the current filters and search; cached like list()
+        return self.dispatch_conditional(request, self.dispatch_cached, self.compute_facets)
 
-class DiscountViewSet(ReadOnlyModelViewSet):
+    def compute_facets(self, request):
+        filterset = ProductFilter(request.query_params, queryset=Product.objects.none(), request=request)
+        if not filterset.is_valid():
+            raise ValidationError(filterset.errors)
+        queryset = FullTextSearchFilter().filter_queryset(request, Product.objects.filter(stats__isnull=False), self)
+        return Response(product_facets(queryset, filterset.conditions()))
+
+
+class DiscountViewSet(CachedResponseMixin, ReadOnlyModelViewSet):
     serializer_class = DiscountSerializer
+    cache_models = (Discount, Product)
     filter_backends = [SearchFilter, OrderingFilter]
     search_fields = ["description"]
     ordering_fields = ["discount", ]
     ordering = ["-discount"]
+    pagination_class = KeysetPagination
 
     def get_queryset(self):
         return Discount.objects.annotate(application_count=Count("products", distinct=True))
 
 
-class CommentViewSet(ModelViewSet):
+class CommentViewSet(AuditMutationsMixin, ModelViewSet):
     queryset = Comment.objects.all()
     serializer_class = CommentSerializer
-    filter_backends = [SearchFilter, OrderingFilter]
+    filter_backends = [FullTextSearchFilter, RankedOrderingFilter]
     search_fields = ["name", "body"]
     ordering = ["-datetime_created"]
+    pagination_class = KeysetPagination
 
     def perform_create(self, serializer):
         serializer.save(status=Comment.COMMENT_STATUS_WAITING)
+        self._audit("create", serializer.instance)
 
     @action(detail=True, methods=["post"], permission_classes=[IsAdminUser])
     def approve(self, request, pk=None):
         obj = self.get_object()
         obj.status = Comment.COMMENT_STATUS_APPROVED
         obj.save(update_fields=["status"])
+        self._audit("approve", obj)
         return Response({"detail": "approved"}, status=status.HTTP_200_OK)
 
     @action(detail=True, methods=["post"], permission_classes=[IsAdminUser])
@@ -110,8 +169,25 @@ class CommentViewSet(ModelViewSet):
         obj = self.get_object()
         obj.status = Comment.COMMENT_STATUS_NOT_APPROVED
         obj.save(update_fields=["status"])
+        self._audit("reject", obj)
         return Response({"detail": "rejected"}, status=status.HTTP_200_OK)
 
+    def _moderate_many(self, request, verb, comment_status):
+        payload = CommentModerationSerializer(data=request.data)
+        payload.is_valid(raise_exception=True)
+        ids = moderate_comments(payload.filter(Comment.objects.all()), comment_status)
+        audit(f"{self.basename}.bulk_{verb}", model=Comment._meta.label, actor=request.user,
+              meta={"count": len(ids), "ids": ids})
+        return Response({"detail": verb + "d", "updated": len(ids)}, status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=["post"], url_path="bulk-approve", permission_classes=[IsAdminUser])
+    def bulk_approve(self, request):
+        return self._moderate_many(request, "approve", Comment.COMMENT_STATUS_APPROVED)
+
+    @action(detail=False, methods=["post"], url_path="bulk-reject", permission_classes=[IsAdminUser])
+    def bulk_reject(self, request):
+        return self._moderate_many(request, "reject", Comment.COMMENT_STATUS_NOT_APPROVED)
+
 
 class CartViewSet(ModelViewSet):
     # Set lookup_field to 'id' since Cart uses UUID as primary key
@@ -119,20 +195,13 @@ class CartViewSet(ModelViewSet):
     serializer_class = CartSerializer
 
     def get_queryset(self):
-        # Annotate products in cart items for final_price calculation
-        best_discount = Subquery(
-            Discount.objects
-            .filter(products__pk=OuterRef('product'))
-            .order_by('-discount')
-            .values('discount')[:1]
-        )
-        
-        return Cart.objects.prefetch_related(
-            'items__product'
-        ).annotate(
-            best_discount_percent=Coalesce(best_discount, 0.0)
-        )
+        # Lines, discounts and totals are priced in one query by store.pricing
+        return Cart.objects.all()
 
+    def retrieve(self, request, *args, **kwargs):
+        cart = self.get_object()
+        touch_cart(cart)
+        return Response(self.get_serializer(cart).data)
 
     def create(self, request, *args, **kwargs):
         # Custom create to just generate a new Cart UUID
@@ -156,20 +225,58 @@ class CartViewSet(ModelViewSet):
         if not product_id:
             return Response({"detail": "product_id is required"}, status=status.HTTP_400_BAD_REQUEST)
         
-        product = get_object_or_404(Product, pk=product_id)
-        
-        item, created = CartItem.objects.get_or_create(cart=cart, product=product, defaults={"quantity": quantity})
-        if not created:
-            # Safely increment quantity
-            item.quantity = F("quantity") + quantity
-            item.save(update_fields=["quantity"])
-            item.refresh_from_db()
+        product = get_object_or_404(Product.objects.only("pk"), pk=product_id)
+
+        add_cart_line(cart, product, quantity)
 
         # Serialize the updated cart to return total items/price
         cart_serializer = self.get_serializer(cart)
         return Response(cart_serializer.data, status=status.HTTP_200_OK)
-    
-    
+
+    @action(detail=True, methods=["post"])
+    def bulk_items(self, request, id=None):
+        # Add, set or remove many lines in one transaction, then price the cart once
+        cart = self.get_object()
+        payload = CartBulkUpdateSerializer(data=request.data)
+        payload.is_valid(raise_exception=True)
+        lines = [(line["op"], line["product_id"], line["quantity"]) for line in payload.validated_data["items"]]
+        try:
+            apply_cart_lines(cart, lines)
+        except UnknownProducts as exc:
+            return Response(
+                {"detail": "unknown product ids", "product_ids": exc.product_ids},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        return Response(self.get_serializer(cart).data, status=status.HTTP_200_OK)
+
+    @action(detail=True, methods=["post"])
+    def checkout(self, request, id=None):
+        cart = self.get_object()
+        customer_id = request.data.get("customer_id")
+        if not customer_id:
+            return Response({"detail": "customer_id is required"}, status=status.HTTP_400_BAD_REQUEST)
+        customer = get_object_or_404(Customer, pk=customer_id)
+        try:
+            order = checkout_cart(cart, customer)
+        except EmptyCart:
+            return Response({"detail": "cart is empty"}, status=status.HTTP_400_BAD_REQUEST)
+        except InsufficientStock as exc:
+            return Response(
+                {"detail": "insufficient stock", "product_ids": exc.product_ids},
+                status=status.HTTP_409_CONFLICT,
+            )
+        order = Order.objects.prefetch_related("items").get(pk=order.pk)
+        return Response(OrderSerializer(order).data, status=status.HTTP_201_CREATED)
+
+
+
+@api_view(["GET"])
+@permission_classes([IsAdminUser])
+def cache_stats(request):
+    # Hit/miss counters of this worker's catalog response cache
+    return Response(response_cache_stats.as_dict())
+
+
 def courses_page(request):
     return render(request, "store/courses_list.html")
 